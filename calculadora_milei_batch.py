@@ -0,0 +1,679 @@
+# -*- coding: utf-8 -*-
+"""
+calculadora_milei_batch.py — Repricing de catálogo completo (sin GUI)
+
+Lee el último costo > 0 de cada artículo en it_comp (misma lógica que
+_get_cost_for_sku del facturador), lo pasa en lotes por el cálculo en lote de
+calculadora_milei_core y escribe las tablas de sueltos y packs a un CSV a
+medida que avanza. La memoria no depende del tamaño del catálogo.
+
+También corre escenarios "what-if" (otra comisión, otra ganancia u otra
+tabla de costos fijos) repartiendo (escenario x bloque de catálogo) en un
+ProcessPoolExecutor.
+
+Los tramos de costo fijo se toman de --brackets (JSON versionado, ver
+calculadora_milei_brackets) si el archivo existe; cada corrida usa una sola
+versión de principio a fin.
+
+"historico" recalcula el margen real de cada línea de it_vent con la tabla de
+tramos que regía en ventas.fecha (historial de calculadora_milei_brackets),
+leyendo y escribiendo por lotes.
+
+Uso:
+    python -m calculadora_milei_core reprice --db gestion.sqlite3 --out precios.csv
+    python -m calculadora_milei_core escenarios --db gestion.sqlite3 --out esc.csv --escenario base:100:0.16 --escenario alta:100:0.18
+    python -m calculadora_milei_core historico --db gestion.sqlite3 --out margenes.csv --desde 2025-01-01
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import calculadora_milei_brackets as milei_brackets
+import calculadora_milei_core as core
+
+DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
+
+CANTIDADES_SUELTOS: Tuple[int, ...] = (1, 5, 10, 15, 20, 25, 50, 100)
+UNIDADES_PACK: Tuple[int, ...] = (2, 3, 4, 5, 10, 50, 100, 150, 200, 250)
+
+CSV_COLUMNAS = ("codigo", "costo_unitario", "tabla", "cantidad", "costo_total", "precio_ml")
+
+
+# ---------------- lectura de costos ----------------
+def _conectar_ro(db_path: str) -> sqlite3.Connection:
+    """Conexión de sólo lectura (no bloquea a los que escriben)."""
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _col_codigo_it_comp(con: sqlite3.Connection) -> str:
+    cols = [r[1].lower() for r in con.execute("PRAGMA table_info(it_comp)").fetchall()]
+    return 'codigo' if 'codigo' in cols else ('articulo' if 'articulo' in cols else ('sku' if 'sku' in cols else 'codigo'))
+
+
+def iter_costos_catalogo(con: sqlite3.Connection, batch_size: int = 5000) -> Iterator[List[Tuple[str, float]]]:
+    """
+    Devuelve lotes de (codigo, costo) con el último costo > 0 de cada artículo.
+
+    Mismo criterio que _get_cost_for_sku (ORDER BY fecha de compra DESC,
+    rowid DESC), pero para todo el catálogo en una sola consulta con
+    ROW_NUMBER(). El ordenamiento lo hace SQLite; acá sólo se leen
+    `batch_size` filas por vez.
+    """
+    col_codigo = _col_codigo_it_comp(con)
+    cur = con.execute(
+        "SELECT art, costo FROM ("
+        f"  SELECT ic.{col_codigo} AS art, ic.costo AS costo,"
+        f"         ROW_NUMBER() OVER (PARTITION BY ic.{col_codigo}"
+        "                             ORDER BY COALESCE(c.fecha, '') DESC, ic.rowid DESC) AS rn"
+        "    FROM it_comp AS ic"
+        "    LEFT JOIN compras AS c ON c.remito = ic.remito"
+        "   WHERE ic.costo > 0"
+        ") WHERE rn = 1 ORDER BY art"
+    )
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [(str(art).strip(), float(costo)) for art, costo in rows if art is not None]
+
+
+# ---------------- cálculo por lote ----------------
+def _precios_lote(
+    costos_unitarios: Sequence[float],
+    cantidades: Sequence[int],
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets,
+):
+    """
+    Precios de todo el lote x todas las cantidades en UNA llamada al cálculo
+    en lote. El resultado está ordenado por artículo y luego por cantidad.
+    """
+    costos_totales = [cu * cant for cu in costos_unitarios for cant in cantidades]
+    precios = core.precios_objetivo_batch(costos_totales, ganancia_factor, comision_ml, brackets)
+    return costos_totales, precios
+
+
+def _escribir_lote(writer, lote, cantidades, tabla_nombre, costos_unitarios, costos_totales, precios) -> int:
+    n_cant = len(cantidades)
+    filas = 0
+    for i, (codigo, _costo) in enumerate(lote):
+        base = i * n_cant
+        for j, cant in enumerate(cantidades):
+            writer.writerow((
+                codigo,
+                f"{costos_unitarios[i]:.4f}",
+                tabla_nombre,
+                cant,
+                f"{costos_totales[base + j]:.4f}",
+                f"{float(precios[base + j]):.2f}",
+            ))
+            filas += 1
+    return filas
+
+
+def reprice_catalogo(
+    db_path: str,
+    out_path: str,
+    ganancia_factor: float = 1.0,
+    comision_ml: float = 0.16,
+    cantidades: Sequence[int] = CANTIDADES_SUELTOS,
+    unidades_pack: Sequence[int] = UNIDADES_PACK,
+    batch_size: int = 5000,
+    log=None,
+) -> dict:
+    """
+    Repricea todo el catálogo y escribe el CSV de forma incremental.
+
+    Para packs se usa costo_pack_10 = costo_unitario * 10, igual que cargarlo
+    a mano en la pestaña "Pack x 10".
+    Devuelve un resumen con artículos, filas escritas, segundos y filas/seg.
+    """
+    if log is None:
+        log = lambda msg: None
+
+    cantidades = [c for c in cantidades if c > 0]
+    unidades_pack = [u for u in unidades_pack if u > 0]
+    # Tablas tomadas una sola vez: si se recargan los tramos a mitad de la
+    # corrida, este CSV sigue saliendo entero con la misma versión
+    tabla_sueltos, tabla_pack10 = core.TABLA_SUELTOS, core.TABLA_PACK10
+
+    t0 = time.perf_counter()
+    articulos = 0
+    filas = 0
+    con = _conectar_ro(db_path)
+    try:
+        with open(out_path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(CSV_COLUMNAS)
+            for lote in iter_costos_catalogo(con, batch_size=batch_size):
+                costos_u = [costo for _codigo, costo in lote]
+
+                tot_s, precios_s = _precios_lote(costos_u, cantidades, ganancia_factor, comision_ml, tabla_sueltos)
+                filas += _escribir_lote(writer, lote, cantidades, "sueltos", costos_u, tot_s, precios_s)
+
+                costos_u_pack = [core.costo_unitario_pack10(cu * 10.0) for cu in costos_u]
+                tot_p, precios_p = _precios_lote(costos_u_pack, unidades_pack, ganancia_factor, comision_ml, tabla_pack10)
+                filas += _escribir_lote(writer, lote, unidades_pack, "pack10", costos_u_pack, tot_p, precios_p)
+
+                articulos += len(lote)
+                seg = time.perf_counter() - t0
+                log(f"{articulos} artículos, {filas} filas, {filas / seg if seg else 0:,.0f} filas/seg")
+    finally:
+        con.close()
+
+    seg = time.perf_counter() - t0
+    return {
+        "articulos": articulos,
+        "filas": filas,
+        "segundos": seg,
+        "filas_por_seg": (filas / seg) if seg else 0.0,
+    }
+
+
+# ---------------- escenarios en paralelo ----------------
+TramosTupla = Tuple[Tuple[float, float, float], ...]
+
+
+@dataclass(frozen=True)
+class Escenario:
+    """
+    Un escenario "what-if". brackets=None usa la tabla de sueltos activa en
+    el proceso que lanza la corrida (no la de cada worker).
+    """
+    nombre: str
+    ganancia_factor: float = 1.0
+    comision_ml: float = 0.16
+    brackets: Optional[TramosTupla] = None
+
+
+def _tramos_a_tupla(brackets) -> TramosTupla:
+    return tuple((float(br.minimo), float(br.maximo), float(br.fijo)) for br in brackets)
+
+
+def _trabajo_escenario(tarea) -> Tuple[int, int, bytes]:
+    """
+    Worker: precios de un bloque de costos para un escenario.
+    Entrada y salida viajan como tuplas y bytes de array('d') (pickle liviano).
+    """
+    idx_esc, idx_bloque, costos_bytes, cantidades, ganancia_factor, comision_ml, tramos = tarea
+    costos_u = array("d")
+    costos_u.frombytes(costos_bytes)
+    tabla = core.compilar_brackets(core.Bracket(minimo=a, maximo=b, fijo=f) for a, b, f in tramos)
+    _tot, precios = _precios_lote(costos_u, cantidades, ganancia_factor, comision_ml, tabla)
+    # precios_objetivo_batch devuelve ndarray float64 o array('d'): ambos tienen tobytes()
+    return idx_esc, idx_bloque, precios.tobytes()
+
+
+def correr_escenarios(
+    costos_unitarios: Sequence[float],
+    escenarios: Sequence[Escenario],
+    cantidades: Sequence[int] = CANTIDADES_SUELTOS,
+    bloque: int = 20000,
+    max_workers: Optional[int] = None,
+) -> Dict[str, array]:
+    """
+    Precios de todo el catálogo para cada escenario.
+
+    Reparte (escenario x bloque de `bloque` artículos) en un
+    ProcessPoolExecutor y une los resultados en orden. Para cada escenario
+    devuelve un array('d') ordenado por artículo y luego por cantidad (mismo
+    orden que _precios_lote). Con max_workers=1 corre todo en este proceso.
+    """
+    cantidades = tuple(c for c in cantidades if c > 0)
+    costos = array("d", costos_unitarios)
+    tramos_activos = _tramos_a_tupla(core.TABLA_SUELTOS)
+
+    tareas = []
+    for i, esc in enumerate(escenarios):
+        tramos = esc.brackets if esc.brackets is not None else tramos_activos
+        for j, ini in enumerate(range(0, len(costos), bloque)):
+            tareas.append((
+                i, j, costos[ini:ini + bloque].tobytes(), cantidades,
+                float(esc.ganancia_factor), float(esc.comision_ml), tramos,
+            ))
+
+    partes: Dict[Tuple[int, int], bytes] = {}
+    if max_workers == 1 or len(tareas) <= 1:
+        for tarea in tareas:
+            i, j, datos = _trabajo_escenario(tarea)
+            partes[(i, j)] = datos
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            for i, j, datos in ex.map(_trabajo_escenario, tareas):
+                partes[(i, j)] = datos
+
+    resultado: Dict[str, array] = {}
+    n_bloques = (len(costos) + bloque - 1) // bloque
+    for i, esc in enumerate(escenarios):
+        precios = array("d")
+        for j in range(n_bloques):
+            precios.frombytes(partes[(i, j)])
+        resultado[esc.nombre] = precios
+    return resultado
+
+
+def correr_escenarios_catalogo(
+    db_path: str,
+    out_path: str,
+    escenarios: Sequence[Escenario],
+    cantidades: Sequence[int] = CANTIDADES_SUELTOS,
+    bloque: int = 20000,
+    max_workers: Optional[int] = None,
+    log=None,
+) -> dict:
+    """
+    Lee los costos del catálogo, corre los escenarios en paralelo y escribe un
+    CSV con una columna de precio por escenario.
+    """
+    if log is None:
+        log = lambda msg: None
+
+    t0 = time.perf_counter()
+    codigos: List[str] = []
+    costos = array("d")
+    con = _conectar_ro(db_path)
+    try:
+        for lote in iter_costos_catalogo(con):
+            for codigo, costo in lote:
+                codigos.append(codigo)
+                costos.append(costo)
+    finally:
+        con.close()
+    log(f"{len(codigos)} artículos leídos en {time.perf_counter() - t0:.2f}s")
+
+    cantidades = [c for c in cantidades if c > 0]
+    precios = correr_escenarios(costos, escenarios, cantidades, bloque=bloque, max_workers=max_workers)
+    t_calc = time.perf_counter()
+
+    n_cant = len(cantidades)
+    columnas = [precios[esc.nombre] for esc in escenarios]
+    with open(out_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["codigo", "costo_unitario", "cantidad"] + [f"precio_{esc.nombre}" for esc in escenarios])
+        for i, codigo in enumerate(codigos):
+            for j, cant in enumerate(cantidades):
+                k = i * n_cant + j
+                writer.writerow([codigo, f"{costos[i]:.4f}", cant] + [f"{col[k]:.2f}" for col in columnas])
+
+    seg = time.perf_counter() - t0
+    filas = len(codigos) * n_cant * len(escenarios)
+    return {
+        "articulos": len(codigos),
+        "escenarios": len(escenarios),
+        "precios": filas,
+        "segundos": seg,
+        "segundos_calculo": t_calc - t0,
+        "precios_por_seg": (filas / seg) if seg else 0.0,
+    }
+
+
+# ---------------- márgenes históricos ----------------
+HISTORICO_COLUMNAS = (
+    "remito", "fecha", "articulo", "cantidad", "precio_unit", "costo_unit",
+    "comision_variable", "comision_fija", "limpio", "ganancia_neta", "version_tramos",
+)
+
+_CANDIDATOS_IT_VENT = {
+    "remito": ("remito", "mr", "nroremito", "id_remito"),
+    "articulo": ("articulo", "codigo", "sku", "cod_art"),
+    "cantidad": ("cantidad", "cant"),
+    "precio": ("venta", "precio", "precio_unit", "punit", "importe"),
+    "costo": ("costo", "cost", "precio_costo", "pcosto"),
+}
+_CANDIDATOS_VENTAS = {
+    "remito": ("remito", "mr", "nroremito", "id_remito"),
+    "fecha": ("fecha", "fech", "fch", "dia"),
+}
+
+
+def _resolver_columnas(con: sqlite3.Connection, tabla: str, candidatos: Dict[str, Sequence[str]]) -> Dict[str, Optional[str]]:
+    """Nombre real de cada columna lógica (None si la tabla no la tiene)."""
+    cols = {r[1].lower(): r[1] for r in con.execute(f"PRAGMA table_info({tabla})").fetchall()}
+    return {clave: next((cols[c] for c in opciones if c in cols), None) for clave, opciones in candidatos.items()}
+
+
+@dataclass
+class LoteHistorico:
+    """
+    Un lote de líneas de venta con su desglose. Los campos de `desglose`
+    son por unidad (como se cargó el precio en it_vent); desglose_linea(i)
+    los devuelve multiplicados por la cantidad.
+    """
+    remitos: List[Any]
+    fechas: List[str]
+    articulos: List[str]
+    cantidades: array
+    versiones: List[int]
+    desglose: core.DesgloseArrays
+
+    def __len__(self) -> int:
+        return len(self.remitos)
+
+    def desglose_linea(self, i: int) -> core.DesgloseVenta:
+        d, cant = self.desglose, self.cantidades[i]
+        return core.DesgloseVenta(
+            precio_venta=float(d.precio_venta[i]) * cant,
+            costo_total=float(d.costo_total[i]) * cant,
+            comision_variable=float(d.comision_variable[i]) * cant,
+            comision_fija=float(d.comision_fija[i]) * cant,
+            limpio=float(d.limpio[i]) * cant,
+            ganancia_neta=float(d.ganancia_neta[i]) * cant,
+        )
+
+
+def _desglose_por_tabla(precios: array, costos: array, indices: List[int],
+                        registro: "milei_brackets.RegistroBrackets", comision_ml: float,
+                        tabla: str) -> core.DesgloseArrays:
+    """
+    Desglose de un lote donde cada fila puede usar otra tabla del registro.
+    Casi siempre el lote entero cae en una sola vigencia: una sola llamada.
+    """
+    usados = sorted(set(indices))
+    if len(usados) == 1:
+        return core.desglose_lote(precios, costos, comision_ml, getattr(registro.config(usados[0]), tabla))
+
+    n = len(precios)
+    campos = ("precio_venta", "costo_total", "comision_variable", "comision_fija", "limpio", "ganancia_neta")
+    salida = {c: array("d", bytes(8 * n)) for c in campos}
+    tramos = array("l", bytes(array("l").itemsize * n))
+    for idx in usados:
+        pos = [i for i, x in enumerate(indices) if x == idx]
+        parcial = core.desglose_lote(
+            array("d", (precios[i] for i in pos)), array("d", (costos[i] for i in pos)),
+            comision_ml, getattr(registro.config(idx), tabla),
+        )
+        for c in campos:
+            destino, origen = salida[c], getattr(parcial, c)
+            for j, i in enumerate(pos):
+                destino[i] = origen[j]
+        for j, i in enumerate(pos):
+            tramos[i] = int(parcial.tramo[j])
+    return core.DesgloseArrays(tramo=tramos, **salida)
+
+
+def iter_desglose_historico(
+    con: sqlite3.Connection,
+    registro: "milei_brackets.RegistroBrackets",
+    comision_ml: float,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    batch_size: int = 20000,
+    tabla: str = "sueltos",
+) -> Iterator[LoteHistorico]:
+    """
+    Recorre it_vent JOIN ventas (por remito) y devuelve lotes con el desglose
+    de cada línea usando la tabla de tramos vigente en la fecha de la venta.
+
+    desde/hasta (inclusive, 'YYYY-MM-DD') se filtran en SQL: ventas.fecha se
+    guarda con ese formato. Las líneas sin fecha válida se saltean.
+    """
+    civ = _resolver_columnas(con, "it_vent", _CANDIDATOS_IT_VENT)
+    cv = _resolver_columnas(con, "ventas", _CANDIDATOS_VENTAS)
+    faltan = [f"it_vent.{k}" for k in ("remito", "articulo", "precio") if civ[k] is None]
+    faltan += [f"ventas.{k}" for k, v in cv.items() if v is None]
+    if faltan:
+        raise ValueError(f"Faltan columnas: {', '.join(faltan)}")
+
+    cant_sql = f"iv.{civ['cantidad']}" if civ["cantidad"] else "1"
+    costo_sql = f"iv.{civ['costo']}" if civ["costo"] else "0"
+    where, params = [], []
+    if desde:
+        where.append(f"v.{cv['fecha']} >= ?")
+        params.append(milei_brackets.fecha_iso(desde))
+    if hasta:
+        # substr: una fecha con hora ('2025-08-15 10:30') también entra en hasta=2025-08-15
+        where.append(f"substr(v.{cv['fecha']}, 1, 10) <= ?")
+        params.append(milei_brackets.fecha_iso(hasta))
+    cur = con.execute(
+        f"SELECT iv.{civ['remito']}, v.{cv['fecha']}, iv.{civ['articulo']}, {cant_sql},"
+        f"       iv.{civ['precio']}, {costo_sql}"
+        "  FROM it_vent AS iv"
+        f"  JOIN ventas AS v ON v.{cv['remito']} = iv.{civ['remito']}"
+        + (" WHERE " + " AND ".join(where) if where else ""),
+        params,
+    )
+
+    # Pocas fechas distintas y muchas líneas: se resuelve cada fecha una sola vez
+    cache_fechas: Dict[Any, Optional[Tuple[str, int]]] = {}
+
+    def _fecha(valor: Any) -> Optional[Tuple[str, int]]:
+        res = cache_fechas.get(valor, False)
+        if res is False:
+            try:
+                iso = milei_brackets.fecha_iso(valor)
+                res = (iso, registro.indice(iso))
+            except ValueError:
+                res = None
+            cache_fechas[valor] = res
+        return res
+
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            break
+        remitos: List[Any] = []
+        fechas: List[str] = []
+        articulos: List[str] = []
+        indices: List[int] = []
+        cantidades = array("d")
+        precios = array("d")
+        costos = array("d")
+        for remito, fecha, articulo, cant, precio, costo in rows:
+            f = _fecha(fecha)
+            if f is None:
+                continue
+            remitos.append(remito)
+            fechas.append(f[0])
+            articulos.append(str(articulo or "").strip())
+            indices.append(f[1])
+            cantidades.append(float(cant or 0))
+            precios.append(float(precio or 0))
+            costos.append(float(costo or 0))
+        if not remitos:
+            continue
+        yield LoteHistorico(
+            remitos=remitos,
+            fechas=fechas,
+            articulos=articulos,
+            cantidades=cantidades,
+            versiones=[registro.config(i).version for i in indices],
+            desglose=_desglose_por_tabla(precios, costos, indices, registro, comision_ml, tabla),
+        )
+
+
+def desglose_historico(
+    db_path: str,
+    out_path: str,
+    registro: "milei_brackets.RegistroBrackets",
+    comision_ml: float = 0.16,
+    desde: Optional[str] = None,
+    hasta: Optional[str] = None,
+    batch_size: int = 20000,
+    log=None,
+) -> dict:
+    """
+    Escribe un CSV (HISTORICO_COLUMNAS) con el margen de cada línea de venta.
+    Importes por línea (unitario x cantidad), salvo precio_unit y costo_unit.
+    """
+    if log is None:
+        log = lambda msg: None
+
+    t0 = time.perf_counter()
+    lineas = 0
+    ganancia_total = 0.0
+    con = _conectar_ro(db_path)
+    try:
+        with open(out_path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(HISTORICO_COLUMNAS)
+            for lote in iter_desglose_historico(con, registro, comision_ml, desde, hasta, batch_size):
+                d = lote.desglose
+                for i in range(len(lote)):
+                    cant = lote.cantidades[i]
+                    neta = float(d.ganancia_neta[i]) * cant
+                    ganancia_total += neta
+                    writer.writerow((
+                        lote.remitos[i],
+                        lote.fechas[i],
+                        lote.articulos[i],
+                        f"{cant:g}",
+                        f"{float(d.precio_venta[i]):.2f}",
+                        f"{float(d.costo_total[i]):.4f}",
+                        f"{float(d.comision_variable[i]) * cant:.2f}",
+                        f"{float(d.comision_fija[i]) * cant:.2f}",
+                        f"{float(d.limpio[i]) * cant:.2f}",
+                        f"{neta:.2f}",
+                        lote.versiones[i],
+                    ))
+                lineas += len(lote)
+                seg = time.perf_counter() - t0
+                log(f"{lineas} líneas, {lineas / seg if seg else 0:,.0f} líneas/seg")
+    finally:
+        con.close()
+
+    seg = time.perf_counter() - t0
+    return {
+        "lineas": lineas,
+        "ganancia_neta": ganancia_total,
+        "segundos": seg,
+        "lineas_por_seg": (lineas / seg) if seg else 0.0,
+    }
+
+
+# ---------------- CLI ----------------
+def _parse_int_csv(text: str) -> List[int]:
+    return [int(p) for p in text.split(",") if p.strip()]
+
+
+def _parse_escenario(text: str) -> Escenario:
+    try:
+        nombre, ganancia, comision = text.split(":")
+        return Escenario(nombre=nombre, ganancia_factor=float(ganancia) / 100.0, comision_ml=float(comision))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Escenario inválido '{text}' (usar nombre:ganancia%:comision)")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m calculadora_milei_core")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    rp = sub.add_parser("reprice", help="Repricear todo el catálogo a CSV.")
+    rp.add_argument("--db", default=DB_PATH, help="Ruta a gestion.sqlite3")
+    rp.add_argument("--out", required=True, help="CSV de salida")
+    rp.add_argument("--ganancia", type=float, default=100.0, help="Ganancia %% (100 = factor 1.0)")
+    rp.add_argument("--comision", type=float, default=0.16, help="Comisión ML (ej: 0.16)")
+    rp.add_argument("--cantidades", type=_parse_int_csv, default=list(CANTIDADES_SUELTOS))
+    rp.add_argument("--unidades-pack", type=_parse_int_csv, default=list(UNIDADES_PACK))
+    rp.add_argument("--batch", type=int, default=5000, help="Artículos por lote")
+    rp.add_argument("--brackets", default=milei_brackets.BRACKETS_PATH,
+                    help="JSON de tramos de costo fijo (si no existe, tablas por defecto)")
+
+    es = sub.add_parser("escenarios", help="Correr escenarios what-if en paralelo.")
+    es.add_argument("--db", default=DB_PATH, help="Ruta a gestion.sqlite3")
+    es.add_argument("--out", required=True, help="CSV de salida")
+    es.add_argument(
+        "--escenario", action="append", type=_parse_escenario, required=True,
+        help="nombre:ganancia%%:comision (ej: base:100:0.16). Repetible.",
+    )
+    es.add_argument("--cantidades", type=_parse_int_csv, default=list(CANTIDADES_SUELTOS))
+    es.add_argument("--bloque", type=int, default=20000, help="Artículos por tarea")
+    es.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos")
+    es.add_argument("--brackets", default=milei_brackets.BRACKETS_PATH,
+                    help="JSON de tramos de costo fijo (si no existe, tablas por defecto)")
+
+    hi = sub.add_parser("historico", help="Margen real de cada línea de venta con los tramos de su fecha.")
+    hi.add_argument("--db", default=DB_PATH, help="Ruta a gestion.sqlite3")
+    hi.add_argument("--out", required=True, help="CSV de salida")
+    hi.add_argument("--historial", default=milei_brackets.HISTORIAL_PATH,
+                    help="JSON de historial de tramos (si no existe, se usan las tablas activas)")
+    hi.add_argument("--comision", type=float, default=0.16, help="Comisión ML (ej: 0.16)")
+    hi.add_argument("--desde", help="Fecha desde (YYYY-MM-DD o DD/MM/YYYY)")
+    hi.add_argument("--hasta", help="Fecha hasta, inclusive")
+    hi.add_argument("--batch", type=int, default=20000, help="Líneas por lote")
+    hi.add_argument("--brackets", default=milei_brackets.BRACKETS_PATH,
+                    help="JSON de tramos de costo fijo (si no existe, tablas por defecto)")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+
+    def _log(msg: str) -> None:
+        print(msg, file=sys.stderr, flush=True)
+
+    vigilante = milei_brackets.VigilanteBrackets(args.brackets)
+    if vigilante.revisar(forzar=True):
+        _log(f"Tramos: versión {vigilante.activa.version} de {args.brackets}")
+    elif vigilante.ultimo_error:
+        _log(f"Tramos inválidos en {args.brackets}: {vigilante.ultimo_error}")
+        return 2
+
+    if args.comando == "reprice":
+        res = reprice_catalogo(
+            db_path=args.db,
+            out_path=args.out,
+            ganancia_factor=args.ganancia / 100.0,
+            comision_ml=args.comision,
+            cantidades=args.cantidades,
+            unidades_pack=args.unidades_pack,
+            batch_size=args.batch,
+            log=_log,
+        )
+        _log(
+            f"Listo: {res['articulos']} artículos, {res['filas']} filas en "
+            f"{res['segundos']:.2f}s ({res['filas_por_seg']:,.0f} filas/seg)."
+        )
+    elif args.comando == "escenarios":
+        res = correr_escenarios_catalogo(
+            db_path=args.db,
+            out_path=args.out,
+            escenarios=args.escenario,
+            cantidades=args.cantidades,
+            bloque=args.bloque,
+            max_workers=args.workers,
+            log=_log,
+        )
+        _log(
+            f"Listo: {res['articulos']} artículos x {res['escenarios']} escenarios, "
+            f"{res['precios']} precios en {res['segundos']:.2f}s "
+            f"({res['precios_por_seg']:,.0f} precios/seg)."
+        )
+    elif args.comando == "historico":
+        if os.path.exists(args.historial):
+            try:
+                registro = milei_brackets.leer_historial(args.historial)
+            except (OSError, ValueError) as exc:
+                _log(f"Historial de tramos inválido en {args.historial}: {exc}")
+                return 2
+        else:
+            _log(f"No existe {args.historial}: se usan las tablas activas para todas las fechas")
+            registro = milei_brackets.registro_actual()
+        res = desglose_historico(
+            db_path=args.db,
+            out_path=args.out,
+            registro=registro,
+            comision_ml=args.comision,
+            desde=args.desde,
+            hasta=args.hasta,
+            batch_size=args.batch,
+            log=_log,
+        )
+        _log(
+            f"Listo: {res['lineas']} líneas, ganancia neta {res['ganancia_neta']:,.2f} en "
+            f"{res['segundos']:.2f}s ({res['lineas_por_seg']:,.0f} líneas/seg)."
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+calculadora_milei_bench.py — Benchmarks del motor de precios
+
+Corre sin base de datos ni Tk (sólo calculadora_milei_core) y emite JSON con
+ops/seg y latencia p50/p99 por llamada para cada caso:
+
+  - escalar:       _calc_precio_objetivo con costos variados
+  - buscar:        _buscar_bracket sobre la tabla compilada
+  - escalera:      tabla_sueltos con la escalera por defecto (8 cantidades)
+  - catalogo:      precios_objetivo_batch sobre un catálogo sintético
+  - bordes:        costos cuyo precio cae junto a 15.000 / 25.000 / 33.000
+  - descuentos:    recálculo de ganancia % para cada descuento del GUI
+  - descuentos_cache: lo mismo con desglose_venta_cached
+  - matriz_descuentos: todas las filas x todos los descuentos en una llamada
+
+Uso:
+    python calculadora_milei_bench.py --out bench.json
+    python calculadora_milei_bench.py --compare bench_base.json --umbral 0.10
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import calculadora_milei_core as core
+
+DESCUENTOS_PCT = core.DESCUENTOS_PCT
+CANTIDADES = (1, 5, 10, 15, 20, 25, 50, 100)
+
+
+def _percentil(ordenados: Sequence[float], q: float) -> float:
+    if not ordenados:
+        return 0.0
+    idx = min(len(ordenados) - 1, max(0, int(round(q * (len(ordenados) - 1)))))
+    return ordenados[idx]
+
+
+def _medir(fn: Callable[[], object], items_por_llamada: int, repeticiones: int, calentamiento: int = 3) -> dict:
+    """Mide `repeticiones` llamadas a fn (latencias en microsegundos)."""
+    for _ in range(calentamiento):
+        fn()
+    lat: List[float] = []
+    reloj = time.perf_counter_ns
+    t_total = reloj()
+    for _ in range(repeticiones):
+        t0 = reloj()
+        fn()
+        lat.append((reloj() - t0) / 1000.0)
+    total_s = (reloj() - t_total) / 1e9
+    lat.sort()
+    return {
+        "llamadas": repeticiones,
+        "items_por_llamada": items_por_llamada,
+        "ops_por_seg": (repeticiones * items_por_llamada / total_s) if total_s else 0.0,
+        "p50_us": _percentil(lat, 0.50),
+        "p99_us": _percentil(lat, 0.99),
+    }
+
+
+# ---------------- casos ----------------
+def _costos_sinteticos(n: int, semilla: int = 2026) -> List[float]:
+    rnd = random.Random(semilla)
+    return [rnd.uniform(50.0, 25000.0) for _ in range(n)]
+
+
+def _costos_borde(comision_ml: float, ganancia_factor: float) -> List[float]:
+    """Costos cuyo precio objetivo queda a +-50 de cada límite de tramo."""
+    den = 1 - comision_ml
+    out: List[float] = []
+    for br in core.TABLA_SUELTOS:
+        if br.maximo == float("inf"):
+            continue
+        for delta in range(-50, 51, 5):
+            precio = br.maximo + delta
+            out.append(max(0.0, (precio * den - br.fijo) / (1 + ganancia_factor)))
+    return out
+
+
+def correr_benchmarks(escala: float = 1.0, tamano_catalogo: int = 100_000) -> Dict[str, dict]:
+    comision, ganancia = 0.16, 1.0
+    tabla = core.TABLA_SUELTOS
+    reps = lambda n: max(5, int(n * escala))
+
+    costos = _costos_sinteticos(2000)
+    bordes = _costos_borde(comision, ganancia)
+    catalogo = _costos_sinteticos(tamano_catalogo, semilla=7)
+
+    # Infinitos: las repeticiones crecen con --escala
+    it_costos = itertools.cycle(costos)
+    it_precios = itertools.cycle([c * 2.4 for c in costos])
+
+    escalera = core.tabla_precios(1234.0, ganancia, comision, CANTIDADES, tabla)
+    precios_base = list(escalera.precio_ml)
+    costos_esc = list(escalera.costo_total)
+
+    def _descuentos(desglose_fn) -> None:
+        for pct in DESCUENTOS_PCT:
+            for precio, costo in zip(precios_base, costos_esc):
+                nuevo = max(0.0, precio * (1.0 - pct / 100.0))
+                desglose_fn(nuevo, costo, comision, tabla)
+
+    resultados: Dict[str, dict] = {}
+    resultados["escalar"] = _medir(
+        lambda: core._calc_precio_objetivo(next(it_costos), ganancia, comision, tabla), 1, reps(20000))
+    resultados["buscar"] = _medir(
+        lambda: core._buscar_bracket(next(it_precios), tabla), 1, reps(50000))
+    resultados["escalera"] = _medir(
+        lambda: core.tabla_sueltos(1234.0, ganancia, comision, CANTIDADES), len(CANTIDADES), reps(2000))
+    resultados["catalogo"] = _medir(
+        lambda: core.precios_objetivo_batch(catalogo, ganancia, comision, tabla), len(catalogo), reps(10))
+    resultados["bordes"] = _medir(
+        lambda: [core._calc_precio_objetivo(c, ganancia, comision, tabla) for c in bordes], len(bordes), reps(500))
+    n_desc = len(DESCUENTOS_PCT) * len(precios_base)
+    resultados["descuentos"] = _medir(lambda: _descuentos(core.desglose_venta), n_desc, reps(1000))
+    resultados["descuentos_cache"] = _medir(lambda: _descuentos(core.desglose_venta_cached), n_desc, reps(1000))
+    resultados["matriz_descuentos"] = _medir(
+        lambda: core.matriz_descuentos(precios_base, costos_esc, comision, tabla).ganancia_pct(), n_desc, reps(1000))
+    return resultados
+
+
+def _meta() -> dict:
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": getattr(core._np(), "__version__", None),
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+# ---------------- comparación ----------------
+def comparar(actual: Dict[str, dict], base: Dict[str, dict], umbral: float) -> List[str]:
+    """
+    Compara ops/seg contra una corrida guardada. Devuelve los casos que
+    empeoraron más que `umbral` (0.10 = 10 % más lentos).
+    """
+    regresiones: List[str] = []
+    print(f"{'caso':<18}{'base ops/s':>14}{'actual ops/s':>14}{'cambio':>9}{'p99 base':>11}{'p99 act':>11}")
+    for nombre, res in actual.items():
+        ref = base.get(nombre)
+        if not ref:
+            print(f"{nombre:<18}{'-':>14}{res['ops_por_seg']:>14,.0f}{'nuevo':>9}")
+            continue
+        cambio = (res["ops_por_seg"] / ref["ops_por_seg"] - 1.0) if ref["ops_por_seg"] else 0.0
+        marca = ""
+        if cambio < -umbral:
+            regresiones.append(nombre)
+            marca = "  <-- REGRESIÓN"
+        print(
+            f"{nombre:<18}{ref['ops_por_seg']:>14,.0f}{res['ops_por_seg']:>14,.0f}"
+            f"{cambio * 100:>8.1f}%{ref['p99_us']:>11.1f}{res['p99_us']:>11.1f}{marca}"
+        )
+    return regresiones
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de calculadora_milei_core")
+    parser.add_argument("--out", help="Guardar resultados JSON en este archivo (si no, stdout)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Regresión tolerada (0.10 = 10%%)")
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica la cantidad de repeticiones")
+    parser.add_argument("--catalogo", type=int, default=100_000, help="Tamaño del catálogo sintético")
+    args = parser.parse_args(argv)
+
+    resultados = correr_benchmarks(escala=args.escala, tamano_catalogo=args.catalogo)
+    doc = {"meta": _meta(), "resultados": resultados}
+    texto = json.dumps(doc, indent=2, ensure_ascii=False)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(texto + "\n")
+    elif not args.compare:
+        print(texto)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            base = json.load(fh).get("resultados", {})
+        regresiones = comparar(resultados, base, args.umbral)
+        if regresiones:
+            print(f"Regresiones: {', '.join(regresiones)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
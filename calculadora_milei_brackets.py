@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+calculadora_milei_brackets.py — Tramos de costo fijo de ML desde un JSON versionado
+
+Cuando MercadoLibre cambia los costos fijos se edita el JSON (subiendo
+"version") y las calculadoras abiertas lo toman solas, sin reiniciar:
+
+    {
+      "version": 3,
+      "sueltos": [
+        {"minimo": 0,     "maximo": 15000, "fijo": 1115},
+        {"minimo": 15000, "maximo": 25000, "fijo": 2300},
+        {"minimo": 25000, "maximo": 33000, "fijo": 2810},
+        {"minimo": 33000, "maximo": null,  "fijo": 0}
+      ],
+      "pack10": [...]            (opcional: si falta se usa "sueltos")
+    }
+
+- leer_config valida y compila las tablas (core.compilar_brackets); si algo
+  está mal no se activa nada y se informa el error.
+- VigilanteBrackets.revisar() sólo hace os.stat (como mucho una vez cada
+  `intervalo` segundos); si cambió mtime/tamaño relee el archivo y, si la
+  versión es otra, reemplaza las tablas activas con core.activar_brackets.
+  Los caches de precios usan la versión de la tabla en la clave, así que los
+  resultados viejos no se vuelven a usar.
+
+Historial (para recalcular márgenes de ventas viejas con la tabla que regía
+ese día) en otro JSON, una entrada por cambio de tarifas:
+
+    {"historial": [
+      {"vigente_desde": "2025-01-01", "version": 1, "sueltos": [...]},
+      {"vigente_desde": "2025-08-15", "version": 2, "sueltos": [...], "pack10": [...]}
+    ]}
+
+RegistroBrackets.para_fecha(fecha) busca con bisect la tabla vigente.
+
+Uso:
+    python calculadora_milei_brackets.py --validar ml_brackets.json
+    python calculadora_milei_brackets.py --exportar ml_brackets.json   (tablas actuales)
+    python calculadora_milei_brackets.py --historial ml_brackets_historial.json
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import logging
+import math
+import os
+import sys
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+import calculadora_milei_core as core
+
+BRACKETS_PATH = r"C:\!GESTION2026\ml_brackets.json"
+HISTORIAL_PATH = r"C:\!GESTION2026\ml_brackets_historial.json"
+
+LOG = logging.getLogger("GESTION2026.CALCULADORA_MILEI")
+
+
+@dataclass(frozen=True)
+class ConfigBrackets:
+    version: int
+    sueltos: core.BracketTable
+    pack10: core.BracketTable
+    origen: str = ""
+
+
+def _tramos_desde_json(datos: Any, nombre: str) -> List[core.Bracket]:
+    if not isinstance(datos, list) or not datos:
+        raise ValueError(f"'{nombre}' tiene que ser una lista de tramos no vacía")
+    tramos: List[core.Bracket] = []
+    for i, t in enumerate(datos, start=1):
+        if not isinstance(t, dict):
+            raise ValueError(f"'{nombre}' tramo {i}: se esperaba un objeto")
+        try:
+            minimo = float(t["minimo"])
+            maximo = math.inf if t.get("maximo") is None else float(t["maximo"])
+            fijo = float(t["fijo"])
+        except KeyError as exc:
+            raise ValueError(f"'{nombre}' tramo {i}: falta {exc.args[0]!r}") from None
+        except (TypeError, ValueError):
+            raise ValueError(f"'{nombre}' tramo {i}: valores no numéricos") from None
+        if math.isnan(minimo) or math.isnan(maximo) or not math.isfinite(fijo) or fijo < 0:
+            raise ValueError(f"'{nombre}' tramo {i}: valores inválidos")
+        tramos.append(core.Bracket(minimo=minimo, maximo=maximo, fijo=fijo))
+    return tramos
+
+
+def config_desde_dict(datos: Any, origen: str = "") -> ConfigBrackets:
+    """Valida y compila un dict con el formato del JSON."""
+    if not isinstance(datos, dict):
+        raise ValueError("La configuración tiene que ser un objeto JSON")
+    version = datos.get("version")
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        raise ValueError("'version' tiene que ser un entero >= 1")
+    sueltos = core.compilar_brackets(_tramos_desde_json(datos.get("sueltos"), "sueltos"))
+    if datos.get("pack10") is None:
+        pack10 = sueltos
+    else:
+        pack10 = core.compilar_brackets(_tramos_desde_json(datos["pack10"], "pack10"))
+    return ConfigBrackets(version=version, sueltos=sueltos, pack10=pack10, origen=origen)
+
+
+def leer_config(path: str) -> ConfigBrackets:
+    """Lee, valida y compila el JSON. ValueError/OSError si no sirve."""
+    with open(path, "r", encoding="utf-8") as fh:
+        try:
+            datos = json.load(fh)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"JSON inválido: {exc}") from None
+    return config_desde_dict(datos, origen=path)
+
+
+def config_a_dict(version: int, sueltos, pack10=None) -> dict:
+    def _lista(tramos) -> list:
+        return [
+            {"minimo": br.minimo, "maximo": None if math.isinf(br.maximo) else br.maximo, "fijo": br.fijo}
+            for br in tramos
+        ]
+
+    out = {"version": int(version), "sueltos": _lista(sueltos)}
+    if pack10 is not None:
+        out["pack10"] = _lista(pack10)
+    return out
+
+
+def guardar_config(path: str, version: int, sueltos, pack10=None) -> None:
+    """Escribe el JSON de forma atómica (archivo temporal + os.replace)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(config_a_dict(version, sueltos, pack10), fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    os.replace(tmp, path)
+
+
+class VigilanteBrackets:
+    """
+    Mira el archivo de configuración y activa las tablas nuevas.
+
+    Pensado para llamarse seguido (after() de Tk, cada lote de un batch):
+    entre revisiones sólo hay un os.stat cada `intervalo` segundos.
+    """
+
+    def __init__(self, path: str = BRACKETS_PATH, intervalo: float = 2.0) -> None:
+        self.path = path
+        self.intervalo = intervalo
+        self.activa: Optional[ConfigBrackets] = None
+        self.ultimo_error: Optional[str] = None
+        self._firma: Optional[Tuple[int, int]] = None
+        self._ultima_revision = 0.0
+
+    def revisar(self, forzar: bool = False) -> bool:
+        """True si se activó una versión nueva de las tablas."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_revision < self.intervalo:
+            return False
+        self._ultima_revision = ahora
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False  # sin archivo: siguen las tablas que haya
+        firma = (st.st_mtime_ns, st.st_size)
+        if firma == self._firma:
+            return False
+        self._firma = firma
+
+        try:
+            cfg = leer_config(self.path)
+        except (OSError, ValueError) as exc:
+            # Se queda la tabla anterior; se vuelve a intentar cuando cambie el archivo
+            self.ultimo_error = str(exc)
+            LOG.warning("Tramos en %s inválidos, se mantienen los actuales: %s", self.path, exc)
+            return False
+
+        self.ultimo_error = None
+        if self.activa is not None and cfg.version == self.activa.version:
+            return False
+        core.activar_brackets(sueltos=cfg.sueltos, pack10=cfg.pack10)
+        anterior = self.activa.version if self.activa is not None else None
+        self.activa = cfg
+        LOG.info("Tramos de costo fijo: versión %s activa (antes %s) desde %s", cfg.version, anterior, self.path)
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Historial de tablas por fecha de vigencia
+# ---------------------------------------------------------------------------
+
+_FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def fecha_iso(valor: Any) -> str:
+    """
+    Normaliza una fecha ('2025-08-15', '2025-08-15 10:30:00', '15/08/2025',
+    date/datetime) a 'YYYY-MM-DD'. ValueError si no se reconoce.
+    """
+    if isinstance(valor, (dt.date, dt.datetime)):
+        return valor.strftime("%Y-%m-%d")
+    texto = str(valor or "").strip()
+    base = texto[:10]
+    for fmt in _FORMATOS_FECHA:
+        try:
+            return dt.datetime.strptime(base, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no reconocida: {valor!r}")
+
+
+class RegistroBrackets:
+    """
+    Tablas de costo fijo con fecha de vigencia. para_fecha(f) devuelve la
+    última tabla con vigente_desde <= f; las fechas anteriores a la primera
+    entrada usan la primera (es lo más parecido que hay).
+    """
+
+    def __init__(self) -> None:
+        self._desde: List[str] = []
+        self._configs: List[ConfigBrackets] = []
+
+    def agregar(self, vigente_desde: Any, cfg: ConfigBrackets) -> None:
+        desde = fecha_iso(vigente_desde)
+        i = bisect_right(self._desde, desde)
+        if i > 0 and self._desde[i - 1] == desde:
+            raise ValueError(f"Ya hay una tabla vigente desde {desde}")
+        self._desde.insert(i, desde)
+        self._configs.insert(i, cfg)
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def __iter__(self):
+        return iter(zip(self._desde, self._configs))
+
+    def indice(self, fecha_iso_: str) -> int:
+        """Posición de la tabla vigente para una fecha YA normalizada (fecha_iso)."""
+        if not self._configs:
+            raise LookupError("Registro de tramos vacío")
+        return max(0, bisect_right(self._desde, fecha_iso_) - 1)
+
+    def config(self, indice: int) -> ConfigBrackets:
+        return self._configs[indice]
+
+    def para_fecha(self, fecha: Any) -> ConfigBrackets:
+        return self._configs[self.indice(fecha_iso(fecha))]
+
+
+def leer_historial(path: str) -> RegistroBrackets:
+    """Lee y valida el JSON de historial (ver docstring del módulo)."""
+    with open(path, "r", encoding="utf-8") as fh:
+        try:
+            datos = json.load(fh)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"JSON inválido: {exc}") from None
+    entradas = datos.get("historial") if isinstance(datos, dict) else None
+    if not isinstance(entradas, list) or not entradas:
+        raise ValueError("'historial' tiene que ser una lista no vacía")
+    registro = RegistroBrackets()
+    for i, entrada in enumerate(entradas, start=1):
+        if not isinstance(entrada, dict) or "vigente_desde" not in entrada:
+            raise ValueError(f"historial[{i}]: falta 'vigente_desde'")
+        try:
+            registro.agregar(entrada["vigente_desde"], config_desde_dict(entrada, origen=f"{path}#{i}"))
+        except ValueError as exc:
+            raise ValueError(f"historial[{i}]: {exc}") from None
+    return registro
+
+
+def registro_actual() -> RegistroBrackets:
+    """Registro con una sola entrada: las tablas activas, vigentes desde siempre."""
+    registro = RegistroBrackets()
+    registro.agregar("0001-01-01", ConfigBrackets(version=0, sueltos=core.TABLA_SUELTOS,
+                                                  pack10=core.TABLA_PACK10, origen="activas"))
+    return registro
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tramos de costo fijo de MercadoLibre (JSON)")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--validar", metavar="JSON", help="Valida el archivo y muestra las tablas")
+    grupo.add_argument("--exportar", metavar="JSON", help="Escribe las tablas actuales como JSON")
+    grupo.add_argument("--historial", metavar="JSON", help="Valida un JSON de historial y lista las vigencias")
+    parser.add_argument("--version", type=int, default=1, help="Versión a grabar con --exportar")
+    args = parser.parse_args(argv)
+
+    if args.exportar:
+        guardar_config(args.exportar, args.version, core.TABLA_SUELTOS, core.TABLA_PACK10)
+        print(f"Escrito {args.exportar} (versión {args.version}).")
+        return 0
+
+    if args.historial:
+        try:
+            registro = leer_historial(args.historial)
+        except (OSError, ValueError) as exc:
+            print(f"Inválido: {exc}", file=sys.stderr)
+            return 1
+        for desde, cfg in registro:
+            print(f"desde {desde}: versión {cfg.version}  sueltos={cfg.sueltos!r}")
+        return 0
+
+    try:
+        cfg = leer_config(args.validar)
+    except (OSError, ValueError) as exc:
+        print(f"Inválido: {exc}", file=sys.stderr)
+        return 1
+    print(f"Versión {cfg.version}")
+    print(f"  sueltos: {cfg.sueltos!r}")
+    print(f"  pack10:  {cfg.pack10!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
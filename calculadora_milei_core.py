@@ -1,8 +1,37 @@
 
 from __future__ import annotations
 
+import itertools
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple
+from typing import Any, Callable, Hashable, Iterable, List, Sequence, Tuple
+
+# NumPy es opcional: si está instalado se usa para el cálculo en lote. Se
+# importa recién la primera vez que hace falta (_np), así importar este
+# módulo sigue siendo liviano (la GUI arranca sin pagar el import de NumPy).
+_NUMPY: Any = None
+_NUMPY_CARGADO = False
+
+
+def _np():
+    """Módulo numpy (importado la primera vez) o None si no está instalado."""
+    global _NUMPY, _NUMPY_CARGADO
+    if not _NUMPY_CARGADO:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - depende del entorno
+            numpy = None
+        _NUMPY = numpy
+        _NUMPY_CARGADO = True
+    return _NUMPY
+
+
+def precargar_numpy() -> bool:
+    """Importa NumPy de antemano (p.ej. en segundo plano); True si está disponible."""
+    return _np() is not None
 
 
 @dataclass
@@ -38,12 +67,126 @@ BRACKETS_SUELTOS: List[Bracket] = [
 BRACKETS_PACK10: List[Bracket] = list(BRACKETS_SUELTOS)
 
 
+# Cada BracketTable nueva recibe un número de versión distinto
+_VERSIONES_TABLA = itertools.count(1)
+
+
+class BracketTable:
+    """
+    Tabla de tramos "compilada": se arma una vez y después cada búsqueda es
+    O(log n) con bisect sobre los mínimos.
+
+    Es iterable de Bracket, así que se puede pasar en cualquier lugar donde
+    antes se pasaba una lista de Bracket. `version` identifica la tabla en
+    las claves del cache de precios.
+    """
+
+    __slots__ = ("brackets", "minimos", "maximos", "fijos", "version")
+
+    def __init__(self, brackets: Iterable[Bracket]) -> None:
+        brs = sorted(brackets, key=lambda b: b.minimo)
+        if not brs:
+            raise ValueError("La tabla de costos fijos está vacía.")
+        for br in brs:
+            if not br.minimo < br.maximo:
+                raise ValueError(f"Tramo inválido: mínimo {br.minimo} >= máximo {br.maximo}.")
+        for prev, sig in zip(brs, brs[1:]):
+            if sig.minimo < prev.maximo:
+                raise ValueError(f"Tramos superpuestos: {prev} y {sig}.")
+            if sig.minimo > prev.maximo:
+                raise ValueError(f"Tramos no contiguos: hueco entre {prev.maximo} y {sig.minimo}.")
+
+        # Copia propia: si alguien modifica la lista original, la tabla no cambia
+        self.brackets: Tuple[Bracket, ...] = tuple(
+            Bracket(minimo=br.minimo, maximo=br.maximo, fijo=br.fijo) for br in brs
+        )
+        self.minimos = array("d", (br.minimo for br in self.brackets))
+        self.maximos = array("d", (br.maximo for br in self.brackets))
+        self.fijos = array("d", (br.fijo for br in self.brackets))
+        self.version = next(_VERSIONES_TABLA)
+
+    def indice(self, precio_venta: float) -> int:
+        """Índice del tramo que contiene el precio (fallback: último)."""
+        idx = bisect_right(self.minimos, precio_venta) - 1
+        if idx < 0 or not precio_venta < self.maximos[idx]:
+            return len(self.brackets) - 1
+        return idx
+
+    def buscar(self, precio_venta: float) -> Bracket:
+        return self.brackets[self.indice(precio_venta)]
+
+    def __iter__(self):
+        return iter(self.brackets)
+
+    def __len__(self) -> int:
+        return len(self.brackets)
+
+    def __getitem__(self, idx: int) -> Bracket:
+        return self.brackets[idx]
+
+    def __repr__(self) -> str:
+        return f"BracketTable({list(self.brackets)!r}, version={self.version})"
+
+
+# Tablas compiladas por contenido (LRU): la misma lista siempre da la misma
+# tabla, y con ella la misma `version` para las claves de PricingCache. Al
+# llenarse se descarta sólo la menos usada, no todas.
+TABLAS_COMPILADAS_MAX = 64
+_TABLAS_COMPILADAS: "OrderedDict[tuple, BracketTable]" = OrderedDict()
+# Atajo por identidad para listas/tuplas ya vistas: id -> (objeto, clave, tabla).
+# Se guarda el objeto para que su id no se reutilice mientras esté en el cache.
+_TABLAS_POR_ID: "OrderedDict[int, tuple]" = OrderedDict()
+_TABLAS_LOCK = threading.Lock()
+
+
+def compilar_brackets(brackets: Iterable[Bracket]) -> BracketTable:
+    """
+    Devuelve la BracketTable de una lista de Bracket.
+
+    Una lista/tupla ya compilada se resuelve por identidad (O(1)); el
+    contenido se compara sólo la primera vez. Una lista modificada en el
+    lugar después de usarla NO se detecta: para tramos nuevos usar una lista
+    nueva. Los caminos calientes (GUI, lotes, solver) tienen que pasar la
+    BracketTable directamente (TABLA_SUELTOS / TABLA_PACK10 / leer_config).
+    """
+    if isinstance(brackets, BracketTable):
+        return brackets
+    por_id = isinstance(brackets, (list, tuple))
+    if por_id:
+        with _TABLAS_LOCK:
+            visto = _TABLAS_POR_ID.get(id(brackets))
+            if visto is not None and visto[0] is brackets:
+                _obj, clave, tabla = visto
+                _TABLAS_POR_ID.move_to_end(id(brackets))
+                # Sigue en uso: que tampoco salga del LRU por contenido
+                _TABLAS_COMPILADAS[clave] = tabla
+                _TABLAS_COMPILADAS.move_to_end(clave)
+                return tabla
+    brs = list(brackets)
+    clave = tuple((br.minimo, br.maximo, br.fijo) for br in brs)
+    with _TABLAS_LOCK:
+        tabla = _TABLAS_COMPILADAS.get(clave)
+        if tabla is None:
+            tabla = BracketTable(brs)
+            _TABLAS_COMPILADAS[clave] = tabla
+            while len(_TABLAS_COMPILADAS) > TABLAS_COMPILADAS_MAX:
+                _TABLAS_COMPILADAS.popitem(last=False)
+        else:
+            _TABLAS_COMPILADAS.move_to_end(clave)
+        if por_id:
+            _TABLAS_POR_ID[id(brackets)] = (brackets, clave, tabla)
+            while len(_TABLAS_POR_ID) > TABLAS_COMPILADAS_MAX:
+                _TABLAS_POR_ID.popitem(last=False)
+    return tabla
+
+
+TABLA_SUELTOS: BracketTable = compilar_brackets(BRACKETS_SUELTOS)
+TABLA_PACK10: BracketTable = compilar_brackets(BRACKETS_PACK10)
+
+
 def _buscar_bracket(precio_venta: float, brackets: Iterable[Bracket]) -> Bracket:
-    for br in brackets:
-        if br.minimo <= precio_venta < br.maximo:
-            return br
-    # fallback: último
-    return list(brackets)[-1]
+    """Tramo del precio. Con una BracketTable es una bisección; con una lista pasa por compilar_brackets."""
+    return compilar_brackets(brackets).buscar(precio_venta)
 
 
 def desglose_venta(
@@ -58,7 +201,7 @@ def desglose_venta(
     - precio_venta: precio final cobrado al cliente
     - costo_total: costo de la mercadería
     - comision_ml: porcentaje de comisión variable (ej: 0.1435 = 14,35%)
-    - brackets: tabla de costos fijos según rango de precio
+    - brackets: tabla de costos fijos según rango de precio (lista o BracketTable)
     """
     br = _buscar_bracket(precio_venta, brackets)
     comision_variable = precio_venta * comision_ml
@@ -75,6 +218,83 @@ def desglose_venta(
     )
 
 
+@dataclass
+class SolucionPrecio:
+    """
+    Resultado del solver de precio objetivo.
+
+    - precio: precio a publicar (>= 0)
+    - bracket / indice: tramo de costo fijo que aplica a ese precio
+    - borde: ningún tramo tiene un precio lineal consistente y se tomó el
+      mínimo del tramo (el margen queda apenas por encima del objetivo)
+    - ambiguo: más de un tramo tiene un precio consistente; se eligió el menor
+    """
+
+    precio: float
+    bracket: Bracket
+    indice: int
+    borde: bool = False
+    ambiguo: bool = False
+
+
+def _denominador(comision_ml: float) -> float:
+    denominador = 1 - comision_ml
+    if denominador <= 0:
+        denominador = 0.01
+    return denominador
+
+
+def resolver_precio_objetivo(
+    costo_total: float,
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> SolucionPrecio:
+    """
+    Solver cerrado del precio objetivo.
+
+    Dentro de cada tramo el costo fijo es constante, así que el precio es
+    lineal:
+
+        precio = (costo_total * (1 + ganancia_factor) + fijo) / (1 - comision_ml)
+
+    Se calcula el candidato de cada tramo en una pasada y se queda el menor
+    precio que cumple el margen:
+      - si el candidato cae dentro de su tramo, es una solución exacta;
+      - si cae por debajo del mínimo del tramo, cualquier precio del tramo
+        cumple y se toma el mínimo (caso "borde", p.ej. justo en 33.000);
+      - si cae por encima del máximo, el tramo no sirve.
+    Costo constante por llamada, sin iteraciones que oscilen en los bordes.
+    """
+    brackets = compilar_brackets(brackets)
+    base = costo_total * (1 + ganancia_factor)
+    denominador = _denominador(comision_ml)
+
+    mejor: SolucionPrecio | None = None
+    consistentes = 0
+    for idx, br in enumerate(brackets):
+        candidato = (base + br.fijo) / denominador
+        if br.minimo <= candidato < br.maximo:
+            consistentes += 1
+            precio, borde = candidato, False
+        elif candidato < br.minimo:
+            precio, borde = float(br.minimo), True
+        else:
+            continue
+        if mejor is None or precio < mejor.precio:
+            mejor = SolucionPrecio(precio=precio, bracket=br, indice=idx, borde=borde)
+
+    if mejor is None:
+        # fallback: último tramo, igual que _buscar_bracket
+        idx = len(brackets) - 1
+        br = brackets[idx]
+        mejor = SolucionPrecio(precio=(base + br.fijo) / denominador, bracket=br, indice=idx, borde=True)
+
+    mejor.ambiguo = consistentes > 1
+    mejor.precio = max(0.0, mejor.precio)
+    return mejor
+
+
 def _calc_precio_objetivo(
     costo_total: float,
     ganancia_factor: float,
@@ -90,20 +310,334 @@ def _calc_precio_objetivo(
 
     Resolvemos la ecuación:
         precio * (1 - comision_ml) - fijo - costo_total = costo_total * ganancia_factor
+
+    Ver resolver_precio_objetivo para el detalle del tramo elegido.
     """
-    # Como el costo fijo depende del precio, iteramos unas veces hasta converger.
-    precio_est = costo_total * (1 + ganancia_factor) / max(0.01, (1 - comision_ml))
-    for _ in range(6):
-        br = _buscar_bracket(precio_est, brackets)
-        numerador = costo_total * (1 + ganancia_factor) + br.fijo
-        denominador = 1 - comision_ml
-        if denominador <= 0:
-            denominador = 0.01
-        nuevo = numerador / denominador
-        if abs(nuevo - precio_est) < 1e-3:
-            break
-        precio_est = nuevo
-    return max(0.0, precio_est)
+    return resolver_precio_objetivo(costo_total, ganancia_factor, comision_ml, brackets).precio
+
+
+def _resolver_numpy(
+    costos: Sequence[float],
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Sequence[Bracket],
+):
+    """
+    Mismo solver que resolver_precio_objetivo, pero sobre arrays de NumPy.
+    Devuelve (precios, indices_de_tramo).
+    """
+    np = _np()
+    costos_np = np.asarray(costos, dtype=np.float64)
+    base = costos_np * (1 + ganancia_factor)
+    denominador = _denominador(comision_ml)
+
+    # Una fila por tramo: precio factible mínimo dentro del tramo (inf si no sirve)
+    factibles = np.empty((len(brackets),) + costos_np.shape, dtype=np.float64)
+    for idx, br in enumerate(brackets):
+        candidato = (base + br.fijo) / denominador
+        factibles[idx] = np.where(
+            (br.minimo <= candidato) & (candidato < br.maximo),
+            candidato,
+            np.where(candidato < br.minimo, float(br.minimo), np.inf),
+        )
+
+    # argmin devuelve el primer mínimo: mismo desempate que el solver escalar
+    indices = np.argmin(factibles, axis=0)
+    precios = np.take_along_axis(factibles, indices[np.newaxis, ...], axis=0)[0]
+
+    sin_solucion = np.isinf(precios)
+    if sin_solucion.any():
+        ultimo = len(brackets) - 1
+        precios[sin_solucion] = (base[sin_solucion] + brackets[ultimo].fijo) / denominador
+        indices[sin_solucion] = ultimo
+    return np.maximum(0.0, precios), indices
+
+
+def precios_objetivo_batch(
+    costos: Iterable[float],
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+):
+    """
+    Versión en lote de _calc_precio_objetivo: recibe una secuencia de costos
+    totales y devuelve los precios objetivo en el mismo orden.
+
+    Usa NumPy si está instalado (devuelve numpy.ndarray) y si no, Python puro
+    (devuelve array('d')). En ambos casos el resultado es idéntico bit a bit
+    al de llamar a _calc_precio_objetivo costo por costo.
+    """
+    brackets = compilar_brackets(brackets)
+    if not hasattr(costos, "__len__"):
+        costos = list(costos)
+    np = _np()
+    if np is not None:
+        return _resolver_numpy(costos, ganancia_factor, comision_ml, brackets)[0]
+    return array(
+        "d",
+        (
+            _calc_precio_objetivo(
+                costo_total=costo,
+                ganancia_factor=ganancia_factor,
+                comision_ml=comision_ml,
+                brackets=brackets,
+            )
+            for costo in costos
+        ),
+    )
+
+
+def _a_array_d(valores) -> array:
+    """Convierte un numpy.ndarray (o cualquier iterable) a array('d')."""
+    np = _NUMPY  # si NumPy todavía no se importó, no puede ser un ndarray
+    if np is not None and isinstance(valores, np.ndarray):
+        out = array("d")
+        out.frombytes(np.ascontiguousarray(valores, dtype=np.float64).tobytes())
+        return out
+    return valores if isinstance(valores, array) else array("d", valores)
+
+
+def _indices_tramo_numpy(tabla: BracketTable, precios):
+    """BracketTable.indice vectorizado (searchsorted + fallback al último tramo)."""
+    np = _np()
+    idx = np.searchsorted(np.asarray(tabla.minimos), precios, side="right") - 1
+    idx_ok = np.clip(idx, 0, len(tabla) - 1)
+    fuera = (idx < 0) | ~(precios < np.asarray(tabla.maximos)[idx_ok])
+    idx_ok[fuera] = len(tabla) - 1
+    return idx_ok
+
+
+class TablaPrecios:
+    """
+    Tabla de precios en formato columnar: una array('d') por campo en lugar
+    de un dict por fila. Trae el desglose completo calculado en la misma
+    pasada, así la GUI no necesita volver a llamar a desglose_venta por fila.
+
+    Columnas: cantidad, costo_total, precio_ml, comision_variable,
+    comision_fija, ganancia_neta.
+    """
+
+    __slots__ = (
+        "cantidad",
+        "costo_total",
+        "precio_ml",
+        "comision_variable",
+        "comision_fija",
+        "ganancia_neta",
+    )
+
+    def __init__(self, cantidad, costo_total, precio_ml, comision_variable, comision_fija, ganancia_neta) -> None:
+        self.cantidad = _a_array_d(cantidad)
+        self.costo_total = _a_array_d(costo_total)
+        self.precio_ml = _a_array_d(precio_ml)
+        self.comision_variable = _a_array_d(comision_variable)
+        self.comision_fija = _a_array_d(comision_fija)
+        self.ganancia_neta = _a_array_d(ganancia_neta)
+
+    def __len__(self) -> int:
+        return len(self.precio_ml)
+
+    def ganancia_pct(self, idx: int) -> float:
+        """Ganancia neta como % del costo total (0 si el costo es 0)."""
+        costo = self.costo_total[idx]
+        if costo > 0:
+            return (self.ganancia_neta[idx] / costo) * 100.0
+        return 0.0
+
+    def desglose(self, idx: int) -> DesgloseVenta:
+        precio = self.precio_ml[idx]
+        return DesgloseVenta(
+            precio_venta=precio,
+            costo_total=self.costo_total[idx],
+            comision_variable=self.comision_variable[idx],
+            comision_fija=self.comision_fija[idx],
+            limpio=precio - self.comision_variable[idx] - self.comision_fija[idx],
+            ganancia_neta=self.ganancia_neta[idx],
+        )
+
+    def rebanada(self, desde: int, hasta: int) -> "TablaPrecios":
+        """Filas [desde, hasta) como una tabla nueva."""
+        return TablaPrecios(
+            cantidad=self.cantidad[desde:hasta],
+            costo_total=self.costo_total[desde:hasta],
+            precio_ml=self.precio_ml[desde:hasta],
+            comision_variable=self.comision_variable[desde:hasta],
+            comision_fija=self.comision_fija[desde:hasta],
+            ganancia_neta=self.ganancia_neta[desde:hasta],
+        )
+
+    def como_dicts(self, clave_cantidad: str = "cantidad") -> List[dict]:
+        """Filas en el formato histórico (lista de dicts) de tabla_sueltos / tabla_pack_x10."""
+        return [
+            {
+                clave_cantidad: int(cant),
+                "costo_total": costo,
+                "precio_ml": precio,
+            }
+            for cant, costo, precio in zip(self.cantidad, self.costo_total, self.precio_ml)
+        ]
+
+
+def tabla_precios(
+    costo_unitario: float,
+    ganancia_factor: float,
+    comision_ml: float,
+    cantidades: Iterable[int],
+    brackets: Iterable[Bracket],
+) -> TablaPrecios:
+    """
+    Precio objetivo + desglose para cada cantidad (> 0) en una sola pasada.
+
+    Las columnas del desglose se calculan con las mismas operaciones que
+    desglose_venta, así que coinciden exactamente con llamarla fila por fila.
+    """
+    tabla = compilar_brackets(brackets)
+    cants = [cant for cant in cantidades if cant > 0]
+    costos = [costo_unitario * cant for cant in cants]
+    return _tabla_desde_costos(cants, costos, ganancia_factor, comision_ml, tabla)
+
+
+def tablas_precios_lote(
+    pedidos: Iterable[Tuple[float, Iterable[int]]],
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> List[TablaPrecios]:
+    """
+    Varias tablas (costo_unitario, cantidades) con un único cálculo: se
+    concatenan los costos de todos los pedidos, se resuelven juntos y el
+    resultado se corta por pedido. Cada tabla coincide exactamente con
+    tabla_precios(costo_unitario, ganancia_factor, comision_ml, cantidades).
+    """
+    tabla = compilar_brackets(brackets)
+    cants: List[int] = []
+    costos: List[float] = []
+    cortes = [0]
+    for costo_unitario, cantidades in pedidos:
+        for cant in cantidades:
+            if cant > 0:
+                cants.append(cant)
+                costos.append(costo_unitario * cant)
+        cortes.append(len(cants))
+    total = _tabla_desde_costos(cants, costos, ganancia_factor, comision_ml, tabla)
+    return [total.rebanada(a, b) for a, b in zip(cortes, cortes[1:])]
+
+
+def tabla_precios_lineas(
+    lineas: Iterable[Tuple[float, int]],
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> TablaPrecios:
+    """
+    Una fila por línea (costo_unitario, cantidad), en el mismo orden, para
+    cotizaciones de varios artículos. Todas las líneas se resuelven en un
+    solo cálculo en lote; cada fila coincide con tabla_precios(costo, ...,
+    [cantidad]). Las cantidades tienen que ser > 0.
+    """
+    tabla = compilar_brackets(brackets)
+    cants: List[int] = []
+    costos: List[float] = []
+    for costo_unitario, cant in lineas:
+        if cant <= 0:
+            raise ValueError(f"Cantidad inválida en la línea {len(cants) + 1}: {cant}")
+        cants.append(cant)
+        costos.append(costo_unitario * cant)
+    return _tabla_desde_costos(cants, costos, ganancia_factor, comision_ml, tabla)
+
+
+def _tabla_desde_costos(
+    cants: List[int],
+    costos: List[float],
+    ganancia_factor: float,
+    comision_ml: float,
+    tabla: BracketTable,
+) -> TablaPrecios:
+    precios = precios_objetivo_batch(costos, ganancia_factor, comision_ml, tabla)
+
+    np = _np()
+    if np is not None:
+        costos_np = np.asarray(costos, dtype=np.float64)
+        comision_fija = np.asarray(tabla.fijos)[_indices_tramo_numpy(tabla, precios)]
+        comision_variable = precios * comision_ml
+        ganancia_neta = (precios - comision_variable - comision_fija) - costos_np
+    else:
+        comision_variable = array("d")
+        comision_fija = array("d")
+        ganancia_neta = array("d")
+        for costo, precio in zip(costos, precios):
+            cv = precio * comision_ml
+            cf = tabla.fijos[tabla.indice(precio)]
+            comision_variable.append(cv)
+            comision_fija.append(cf)
+            ganancia_neta.append(precio - cv - cf - costo)
+
+    return TablaPrecios(
+        cantidad=cants,
+        costo_total=costos,
+        precio_ml=precios,
+        comision_variable=comision_variable,
+        comision_fija=comision_fija,
+        ganancia_neta=ganancia_neta,
+    )
+
+
+def escalera_optima(
+    costo_unitario: float,
+    ganancia_factor: float,
+    comision_ml: float,
+    n_max: int,
+    brackets: Iterable[Bracket],
+    max_filas: int | None = None,
+) -> TablaPrecios:
+    """
+    Busca en las cantidades 1..n_max los puntos de quiebre de costo fijo.
+
+    Se resuelve el tramo de cada cantidad en un barrido vectorizado y se
+    devuelven (como TablaPrecios, ordenada por cantidad):
+      - la cantidad 1 (referencia),
+      - para cada cambio de tramo, la última cantidad del tramo anterior
+        (costo fijo por unidad más bajo dentro de ese tramo) y la primera
+        del tramo nuevo (justo por encima del máximo).
+
+    Con max_filas se quedan las de mayor ahorro de costo fijo por unidad
+    respecto de vender de a 1.
+    """
+    tabla = compilar_brackets(brackets)
+    n_max = int(n_max)
+    if n_max < 1:
+        return tabla_precios(costo_unitario, ganancia_factor, comision_ml, [], tabla)
+
+    np = _np()
+    if np is not None:
+        costos = np.arange(1, n_max + 1, dtype=np.float64) * costo_unitario
+        _precios, tramos = _resolver_numpy(costos, ganancia_factor, comision_ml, tabla)
+        cambios = (np.flatnonzero(tramos[1:] != tramos[:-1]) + 1).tolist()
+        tramos = tramos.tolist()
+    else:
+        costos = [costo_unitario * q for q in range(1, n_max + 1)]
+        tramos = [resolver_precio_objetivo(c, ganancia_factor, comision_ml, tabla).indice for c in costos]
+        cambios = [i for i in range(1, len(tramos)) if tramos[i] != tramos[i - 1]]
+
+    # índice i (base 0) = cantidad i + 1
+    elegidas = {1}
+    for i in cambios:
+        elegidas.add(i)       # última cantidad del tramo anterior
+        elegidas.add(i + 1)   # primera cantidad del tramo nuevo
+
+    if max_filas is not None and len(elegidas) > max_filas:
+        fijo_1 = tabla.fijos[tramos[0]]
+        ahorro = {q: fijo_1 - tabla.fijos[tramos[q - 1]] / q for q in elegidas}
+        elegidas = set(sorted(elegidas, key=lambda q: (-ahorro[q], q))[:max(0, max_filas)])
+
+    return tabla_precios(costo_unitario, ganancia_factor, comision_ml, sorted(elegidas), tabla)
+
+
+def costo_unitario_pack10(costo_pack_10: float) -> float:
+    """Costo unitario a partir del costo de un pack de 10 (negativos => 0)."""
+    if costo_pack_10 < 0:
+        costo_pack_10 = 0.0
+    return costo_pack_10 / 10.0 if costo_pack_10 else 0.0
 
 
 def tabla_sueltos(
@@ -111,6 +645,8 @@ def tabla_sueltos(
     ganancia_factor: float,
     comision_ml: float,
     cantidades: Iterable[int],
+    brackets: Iterable[Bracket] | None = None,
+    optimizar_hasta: int | None = None,
 ):
     """
     Devuelve una lista de filas para la pestaña de ARTÍCULOS SUELTOS.
@@ -119,26 +655,21 @@ def tabla_sueltos(
         - cantidad
         - costo_total
         - precio_ml  (float, sin redondear)
+
+    brackets: tabla de costos fijos (por defecto TABLA_SUELTOS).
+    optimizar_hasta: si se indica, se ignoran `cantidades` y se usa la
+        escalera de quiebres de costo fijo en 1..optimizar_hasta
+        (ver escalera_optima).
     """
-    filas = []
-    for cant in cantidades:
-        if cant <= 0:
-            continue
-        costo_total = costo_unitario * cant
-        precio_ml = _calc_precio_objetivo(
-            costo_total=costo_total,
-            ganancia_factor=ganancia_factor,
-            comision_ml=comision_ml,
-            brackets=BRACKETS_SUELTOS,
-        )
-        filas.append(
-            {
-                "cantidad": cant,
-                "costo_total": costo_total,
-                "precio_ml": precio_ml,
-            }
-        )
-    return filas
+    if brackets is None:
+        brackets = TABLA_SUELTOS
+    if optimizar_hasta:
+        return escalera_optima(
+            costo_unitario, ganancia_factor, comision_ml, optimizar_hasta, brackets
+        ).como_dicts("cantidad")
+    return tabla_precios(
+        costo_unitario, ganancia_factor, comision_ml, cantidades, brackets
+    ).como_dicts("cantidad")
 
 
 def tabla_pack_x10(
@@ -146,6 +677,7 @@ def tabla_pack_x10(
     ganancia_factor: float,
     comision_ml: float,
     unidades_en_pack: Iterable[int],
+    brackets: Iterable[Bracket] | None = None,
 ):
     """
     Devuelve una lista de filas para la pestaña PACK x 10.
@@ -154,29 +686,411 @@ def tabla_pack_x10(
     - ganancia_factor: factor de ganancia sobre el costo total
     - comision_ml: porcentaje de comisión variable
     - unidades_en_pack: cantidades finales (ej: 2,3,4,5,10,50,...)
+    - brackets: tabla de costos fijos (por defecto TABLA_PACK10)
 
     Se parte de un costo unitario = costo_pack_10 / 10.
     """
-    if costo_pack_10 < 0:
-        costo_pack_10 = 0.0
-    costo_unitario = costo_pack_10 / 10.0 if costo_pack_10 else 0.0
+    if brackets is None:
+        brackets = TABLA_PACK10
+    costo_unitario = costo_unitario_pack10(costo_pack_10)
 
-    filas = []
-    for unidades in unidades_en_pack:
-        if unidades <= 0:
-            continue
-        costo_total = costo_unitario * unidades
-        precio_ml = _calc_precio_objetivo(
-            costo_total=costo_total,
-            ganancia_factor=ganancia_factor,
-            comision_ml=comision_ml,
-            brackets=BRACKETS_PACK10,
+    return tabla_precios(
+        costo_unitario, ganancia_factor, comision_ml, unidades_en_pack, brackets
+    ).como_dicts("unidades_en_pack")
+
+
+# ---------------------------------------------------------------------------
+# Barrido inverso: precio -> margen
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class DesgloseArrays:
+    """
+    Los campos de DesgloseVenta como arrays (numpy.ndarray si NumPy está
+    instalado, array('d') / array('l') si no). `tramo` es el índice del
+    tramo de costo fijo de cada precio: donde cambia hay un salto de margen.
+    """
+
+    precio_venta: Any
+    costo_total: Any
+    comision_variable: Any
+    comision_fija: Any
+    limpio: Any
+    ganancia_neta: Any
+    tramo: Any
+
+    def __len__(self) -> int:
+        return len(self.precio_venta)
+
+    def saltos(self) -> List[int]:
+        """Posiciones i donde el precio i cae en otro tramo que el i-1."""
+        tramo = self.tramo
+        return [i for i in range(1, len(tramo)) if tramo[i] != tramo[i - 1]]
+
+    def ganancia_pct(self):
+        """
+        Ganancia neta como % del costo total (0 donde el costo es 0), con la
+        misma forma que los campos (matriz, vector o lista de arrays).
+        """
+        np = _np()
+        if np is not None and isinstance(self.ganancia_neta, np.ndarray):
+            costo = np.asarray(self.costo_total)
+            con_costo = costo > 0
+            return np.where(con_costo, (self.ganancia_neta / np.where(con_costo, costo, 1.0)) * 100.0, 0.0)
+
+        def _fila(netas, costos) -> array:
+            return array("d", ((n / c) * 100.0 if c > 0 else 0.0 for n, c in zip(netas, costos)))
+
+        if isinstance(self.ganancia_neta, list):
+            return [_fila(n, c) for n, c in zip(self.ganancia_neta, self.costo_total)]
+        return _fila(self.ganancia_neta, self.costo_total)
+
+
+def sweep_margen(
+    precios: Iterable[float],
+    costo_total: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> DesgloseArrays:
+    """
+    Desglose de venta para cada precio de `precios` (p.ej. de X a Y con paso
+    Z) con un costo total fijo. Mismas operaciones que desglose_venta, así que
+    cada posición coincide con llamarla precio por precio.
+    """
+    tabla = compilar_brackets(brackets)
+    np = _np()
+    if np is not None:
+        p = np.asarray(list(precios) if not hasattr(precios, "__len__") else precios, dtype=np.float64)
+        tramo = _indices_tramo_numpy(tabla, p)
+        comision_variable = p * comision_ml
+        comision_fija = np.asarray(tabla.fijos)[tramo]
+        limpio = p - comision_variable - comision_fija
+        return DesgloseArrays(
+            precio_venta=p,
+            costo_total=np.full(p.shape, float(costo_total)),
+            comision_variable=comision_variable,
+            comision_fija=comision_fija,
+            limpio=limpio,
+            ganancia_neta=limpio - costo_total,
+            tramo=tramo,
         )
-        filas.append(
-            {
-                "unidades_en_pack": unidades,
-                "costo_total": costo_total,
-                "precio_ml": precio_ml,
-            }
+
+    p = array("d", precios)
+    tramo = array("l", (tabla.indice(x) for x in p))
+    comision_variable = array("d", (x * comision_ml for x in p))
+    comision_fija = array("d", (tabla.fijos[i] for i in tramo))
+    limpio = array("d", (x - cv - cf for x, cv, cf in zip(p, comision_variable, comision_fija)))
+    return DesgloseArrays(
+        precio_venta=p,
+        costo_total=array("d", [float(costo_total)]) * len(p),
+        comision_variable=comision_variable,
+        comision_fija=comision_fija,
+        limpio=limpio,
+        ganancia_neta=array("d", (x - costo_total for x in limpio)),
+        tramo=tramo,
+    )
+
+
+def grilla_margen(
+    precios: Iterable[float],
+    comisiones: Iterable[float],
+    costo_total: float,
+    brackets: Iterable[Bracket],
+) -> DesgloseArrays:
+    """
+    Versión 2D de sweep_margen: precio x comisión.
+
+    Con NumPy cada campo es una matriz (len(comisiones), len(precios)).
+    Sin NumPy cada campo es una lista con una array('d') por comisión.
+    El tramo depende sólo del precio, así que `tramo` es 1D en ambos casos.
+    """
+    precios = list(precios)
+    comisiones = list(comisiones)
+    tabla = compilar_brackets(brackets)
+
+    np = _np()
+    if np is not None:
+        p = np.asarray(precios, dtype=np.float64)
+        c = np.asarray(comisiones, dtype=np.float64)[:, np.newaxis]
+        tramo = _indices_tramo_numpy(tabla, p)
+        comision_variable = p[np.newaxis, :] * c
+        comision_fija = np.broadcast_to(np.asarray(tabla.fijos)[tramo], comision_variable.shape)
+        precio_venta = np.broadcast_to(p, comision_variable.shape)
+        limpio = precio_venta - comision_variable - comision_fija
+        return DesgloseArrays(
+            precio_venta=precio_venta,
+            costo_total=np.full(comision_variable.shape, float(costo_total)),
+            comision_variable=comision_variable,
+            comision_fija=comision_fija,
+            limpio=limpio,
+            ganancia_neta=limpio - costo_total,
+            tramo=tramo,
+        )
+
+    filas = [sweep_margen(precios, costo_total, com, tabla) for com in comisiones]
+    return DesgloseArrays(
+        precio_venta=[f.precio_venta for f in filas],
+        costo_total=[f.costo_total for f in filas],
+        comision_variable=[f.comision_variable for f in filas],
+        comision_fija=[f.comision_fija for f in filas],
+        limpio=[f.limpio for f in filas],
+        ganancia_neta=[f.ganancia_neta for f in filas],
+        tramo=filas[0].tramo if filas else array("l"),
+    )
+
+
+# Opciones de descuento de la GUI (radio buttons), en %
+DESCUENTOS_PCT: Tuple[float, ...] = (0.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0)
+
+
+def matriz_descuentos(
+    precios_base: Iterable[float],
+    costos_totales: Iterable[float],
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+    descuentos_pct: Iterable[float] = DESCUENTOS_PCT,
+) -> DesgloseArrays:
+    """
+    Cada fila (precio base, costo total) contra cada descuento, en una sola
+    pasada: precio = max(0, base * (1 - pct / 100)) y su desglose. Son las
+    mismas operaciones que aplicar el descuento en la GUI y llamar a
+    desglose_venta, así que cada celda coincide con hacerlo fila por fila.
+
+    Con NumPy cada campo (y `tramo`) es una matriz (len(descuentos), len(filas)).
+    Sin NumPy cada campo es una lista con una array por descuento.
+    """
+    bases = list(precios_base)
+    costos = list(costos_totales)
+    if len(bases) != len(costos):
+        raise ValueError("precios_base y costos_totales tienen que tener el mismo largo")
+    descuentos = list(descuentos_pct)
+    tabla = compilar_brackets(brackets)
+
+    np = _np()
+    if np is not None:
+        b = np.asarray(bases, dtype=np.float64)
+        k = np.asarray(costos, dtype=np.float64)
+        d = np.asarray(descuentos, dtype=np.float64)[:, np.newaxis]
+        p = np.maximum(0.0, b[np.newaxis, :] * (1.0 - d / 100.0))
+        tramo = _indices_tramo_numpy(tabla, p)
+        comision_variable = p * comision_ml
+        comision_fija = np.asarray(tabla.fijos)[tramo]
+        limpio = p - comision_variable - comision_fija
+        return DesgloseArrays(
+            precio_venta=p,
+            costo_total=np.broadcast_to(k, p.shape),
+            comision_variable=comision_variable,
+            comision_fija=comision_fija,
+            limpio=limpio,
+            ganancia_neta=limpio - k[np.newaxis, :],
+            tramo=tramo,
         )
-    return filas
+
+    campos: dict = {n: [] for n in ("precio_venta", "costo_total", "comision_variable",
+                                     "comision_fija", "limpio", "ganancia_neta", "tramo")}
+    for pct in descuentos:
+        p = array("d", (max(0.0, base * (1.0 - pct / 100.0)) for base in bases))
+        tramo = array("l", (tabla.indice(x) for x in p))
+        cv = array("d", (x * comision_ml for x in p))
+        cf = array("d", (tabla.fijos[i] for i in tramo))
+        limpio = array("d", (x - v - f for x, v, f in zip(p, cv, cf)))
+        campos["precio_venta"].append(p)
+        campos["costo_total"].append(array("d", costos))
+        campos["comision_variable"].append(cv)
+        campos["comision_fija"].append(cf)
+        campos["limpio"].append(limpio)
+        campos["ganancia_neta"].append(array("d", (x - c for x, c in zip(limpio, costos))))
+        campos["tramo"].append(tramo)
+    return DesgloseArrays(**campos)
+
+
+def desglose_lote(
+    precios_venta: Iterable[float],
+    costos_totales: Iterable[float],
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> DesgloseArrays:
+    """
+    desglose_venta para muchas filas (precio, costo) con una misma tabla de
+    tramos. Da lo mismo que llamar a desglose_venta fila por fila.
+
+    Con NumPy cada campo es un ndarray; sin NumPy, una array('d') / array('l').
+    """
+    tabla = compilar_brackets(brackets)
+    if not hasattr(precios_venta, "__len__"):
+        precios_venta = list(precios_venta)
+    if not hasattr(costos_totales, "__len__"):
+        costos_totales = list(costos_totales)
+    np = _np()
+    if np is not None:
+        p = np.asarray(precios_venta, dtype=np.float64)
+        k = np.asarray(costos_totales, dtype=np.float64)
+        if p.shape != k.shape:
+            raise ValueError("precios_venta y costos_totales tienen que tener el mismo largo")
+        tramo = _indices_tramo_numpy(tabla, p)
+        comision_variable = p * comision_ml
+        comision_fija = np.asarray(tabla.fijos)[tramo]
+        limpio = p - comision_variable - comision_fija
+        return DesgloseArrays(
+            precio_venta=p,
+            costo_total=k,
+            comision_variable=comision_variable,
+            comision_fija=comision_fija,
+            limpio=limpio,
+            ganancia_neta=limpio - k,
+            tramo=tramo,
+        )
+
+    p = _a_array_d(precios_venta)
+    k = _a_array_d(costos_totales)
+    if len(p) != len(k):
+        raise ValueError("precios_venta y costos_totales tienen que tener el mismo largo")
+    tramo = array("l", (tabla.indice(x) for x in p))
+    cv = array("d", (x * comision_ml for x in p))
+    cf = array("d", (tabla.fijos[i] for i in tramo))
+    limpio = array("d", (x - v - f for x, v, f in zip(p, cv, cf)))
+    return DesgloseArrays(
+        precio_venta=p,
+        costo_total=k,
+        comision_variable=cv,
+        comision_fija=cf,
+        limpio=limpio,
+        ganancia_neta=array("d", (x - c for x, c in zip(limpio, k))),
+        tramo=tramo,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cache de precios (LRU acotado, thread-safe)
+# ---------------------------------------------------------------------------
+
+
+class PricingCache:
+    """
+    LRU acotado y thread-safe para resultados de precios.
+
+    Las claves incluyen la versión de la BracketTable usada, así que un
+    resultado calculado con una tabla vieja nunca se devuelve para la nueva.
+    Los objetos devueltos se comparten entre llamadas: no modificarlos.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._datos: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        with self._lock:
+            try:
+                valor = self._datos[clave]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return valor
+
+        # Se calcula fuera del lock; si dos hilos calculan lo mismo, gana el último
+        valor = calcular()
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+        return valor
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tamano": len(self._datos),
+                "maxsize": self.maxsize,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._datos)
+
+
+PRICING_CACHE = PricingCache()
+
+
+def desglose_venta_cached(
+    precio_venta: float,
+    costo_total: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> DesgloseVenta:
+    """desglose_venta memoizado en PRICING_CACHE."""
+    tabla = compilar_brackets(brackets)
+    clave = ("desglose", precio_venta, costo_total, comision_ml, tabla.version)
+    return PRICING_CACHE.obtener(
+        clave, lambda: desglose_venta(precio_venta, costo_total, comision_ml, tabla)
+    )
+
+
+def precio_objetivo_cached(
+    costo_total: float,
+    ganancia_factor: float,
+    comision_ml: float,
+    brackets: Iterable[Bracket],
+) -> float:
+    """_calc_precio_objetivo memoizado en PRICING_CACHE."""
+    tabla = compilar_brackets(brackets)
+    clave = ("precio", costo_total, ganancia_factor, comision_ml, tabla.version)
+    return PRICING_CACHE.obtener(
+        clave, lambda: _calc_precio_objetivo(costo_total, ganancia_factor, comision_ml, tabla)
+    )
+
+
+def tabla_precios_cached(
+    costo_unitario: float,
+    ganancia_factor: float,
+    comision_ml: float,
+    cantidades: Iterable[int],
+    brackets: Iterable[Bracket],
+) -> TablaPrecios:
+    """tabla_precios memoizado en PRICING_CACHE (la tabla devuelta es compartida)."""
+    tabla = compilar_brackets(brackets)
+    cants = tuple(cantidades)
+    clave = ("tabla", costo_unitario, ganancia_factor, comision_ml, cants, tabla.version)
+    return PRICING_CACHE.obtener(
+        clave, lambda: tabla_precios(costo_unitario, ganancia_factor, comision_ml, cants, tabla)
+    )
+
+
+def activar_brackets(
+    sueltos: Iterable[Bracket] | None = None,
+    pack10: Iterable[Bracket] | None = None,
+) -> None:
+    """
+    Reemplaza las tablas activas de costos fijos (TABLA_SUELTOS / TABLA_PACK10
+    y sus listas BRACKETS_*) y vacía el cache de precios.
+    """
+    global BRACKETS_SUELTOS, BRACKETS_PACK10, TABLA_SUELTOS, TABLA_PACK10
+    # Se compila todo antes de tocar los globales: si algo es inválido no cambia nada
+    nueva_sueltos = compilar_brackets(sueltos) if sueltos is not None else TABLA_SUELTOS
+    nueva_pack10 = compilar_brackets(pack10) if pack10 is not None else TABLA_PACK10
+
+    BRACKETS_SUELTOS = list(nueva_sueltos)
+    BRACKETS_PACK10 = list(nueva_pack10)
+    TABLA_SUELTOS = nueva_sueltos
+    TABLA_PACK10 = nueva_pack10
+    PRICING_CACHE.limpiar()
+
+
+if __name__ == "__main__":
+    # CLI headless: python -m calculadora_milei_core reprice --db ... --out ...
+    from calculadora_milei_batch import main
+
+    raise SystemExit(main())
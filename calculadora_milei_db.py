@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+calculadora_milei_db.py — Acceso de sólo lectura a gestion.sqlite3 para la calculadora
+
+- Una conexión persistente abierta con URI mode=ro (no bloquea a quien escribe).
+- El esquema de 'articulo' (columna de descripción) y de 'it_comp' se
+  resuelve una sola vez.
+- Último costo de compra de un artículo (costo_ultimo), con la misma consulta
+  que _get_cost_for_sku del facturador.
+- Índice en memoria codigo -> descripción, armado en un hilo en segundo plano
+  (con su propia conexión, así no frena al hilo de Tk) la primera vez que se
+  lo pide; con el índice listo, la búsqueda por código y por prefijo no toca
+  el disco. Los códigos se comparan igual que en SQL: sin espacios a los
+  costados y, si articulo.codigo tiene afinidad numérica, '0123' == 123.
+- Índice de trigramas sobre las descripciones normalizadas (sin tildes, en
+  minúsculas) para sugerir por texto parcial o aproximado (buscar_texto).
+  No se usa FTS5: la conexión es de sólo lectura y no se puede crear la tabla
+  virtual sin escribir en gestion.sqlite3.
+"""
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
+
+DESC_CANDIDATOS = ("descripcion", "detalle", "descrip", "nombre")
+
+_SIN_RESOLVER = object()
+
+# Parámetros por consulta con IN (...): por debajo del límite de 999 de SQLite viejos
+LOTE_IN = 500
+
+# Búsqueda aproximada: fracción mínima de trigramas de la consulta que tiene
+# que compartir una descripción, y trigramas demasiado frecuentes (presentes
+# en más de esta fracción del catálogo) que no se cuentan.
+FUZZY_MIN_COINCIDENCIA = 0.5
+FUZZY_TRIGRAMA_COMUN = 0.2
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y con espacios simples."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(ch for ch in texto if not unicodedata.combining(ch))
+    return " ".join(texto.lower().split())
+
+
+def trigramas(texto: str) -> set:
+    """Trigramas de cada palabra (con un espacio de relleno a cada lado)."""
+    out = set()
+    for palabra in texto.split():
+        p = f" {palabra} "
+        for i in range(len(p) - 2):
+            out.add(p[i:i + 3])
+    return out
+
+
+def afinidad_numerica(tipo_declarado: str) -> bool:
+    """True si SQLite convierte a número el texto guardado/comparado en una columna de ese tipo."""
+    t = (tipo_declarado or "").upper()
+    if "INT" in t:
+        return True
+    if any(x in t for x in ("CHAR", "CLOB", "TEXT")) or "BLOB" in t or not t:
+        return False
+    return True   # REAL / FLOA / DOUB / NUMERIC / cualquier otro
+
+
+def clave_numerica(codigo: str) -> Optional[str]:
+    """'0123' -> '123', '12.0' -> '12', '1.5' -> '1.5'; None si no es un número."""
+    if not codigo or "_" in codigo:
+        return None
+    try:
+        num = float(codigo)
+    except ValueError:
+        return None
+    if not math.isfinite(num):
+        return None
+    return str(int(num)) if num.is_integer() else repr(num)
+
+
+def conectar_ro(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Abre la base en sólo lectura (URI mode=ro)."""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+
+
+class ArticulosRepo:
+    """Búsqueda de artículos sobre una conexión de sólo lectura persistente."""
+
+    def __init__(self, db_path: str = DB_PATH) -> None:
+        self.db_path = db_path
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._desc_col = _SIN_RESOLVER
+        self._codigo_numerico = False           # afinidad de articulo.codigo
+        self._col_it_comp = _SIN_RESOLVER
+        self._it_comp_numerico = False          # afinidad de la columna de código de it_comp
+
+        self._codigos: List[str] = []          # ordenados, para búsqueda por prefijo
+        self._desc_por_codigo: Dict[str, str] = {}
+        self._desc_norm: List[str] = []        # alineada con self._codigos
+        self._trigramas: Dict[str, array] = {}  # trigrama -> posiciones en self._codigos
+        self._indice_listo = threading.Event()
+        self._hilo_indice: Optional[threading.Thread] = None
+        self.error_indice: Optional[Exception] = None
+
+    # ---------------- conexión y esquema ----------------
+    def _conexion(self) -> sqlite3.Connection:
+        if self._con is None:
+            # La usan el hilo de Tk y el del índice: se serializa con self._lock
+            self._con = conectar_ro(self.db_path, check_same_thread=False)
+        return self._con
+
+    def columna_descripcion(self) -> Optional[str]:
+        """Columna de descripción de 'articulo' (se resuelve una vez)."""
+        with self._lock:
+            if self._desc_col is _SIN_RESOLVER:
+                info = self._conexion().execute("PRAGMA table_info(articulo)").fetchall()
+                cols = [r[1] for r in info]
+                tipo_codigo = next((r[2] for r in info if str(r[1]).lower() == "codigo"), "")
+                self._codigo_numerico = afinidad_numerica(tipo_codigo)
+                self._desc_col = next((c for c in DESC_CANDIDATOS if c in cols), None)
+            return self._desc_col
+
+    def _resolver(self, por_codigo: Dict[str, Any], codigo: str, numerico: Optional[bool] = None) -> Any:
+        """
+        Valor de `codigo` en un dict codigo guardado -> valor, con el mismo
+        criterio que `codigo = ?` en SQL. numerico: afinidad de la columna
+        (por defecto, la de articulo.codigo).
+        """
+        if numerico is None:
+            numerico = self._codigo_numerico
+        clave = str(codigo).strip()
+        valor = por_codigo.get(clave)
+        if valor is None and numerico:
+            num = clave_numerica(clave)
+            if num is not None and num != clave:
+                valor = por_codigo.get(num)
+        return valor
+
+    def columna_codigo_it_comp(self) -> str:
+        """Columna de código en 'it_comp' (mismo criterio que _get_cost_for_sku)."""
+        with self._lock:
+            if self._col_it_comp is _SIN_RESOLVER:
+                info = self._conexion().execute("PRAGMA table_info(it_comp)").fetchall()
+                cols = [r[1].lower() for r in info]
+                self._col_it_comp = (
+                    'codigo' if 'codigo' in cols else ('articulo' if 'articulo' in cols else ('sku' if 'sku' in cols else 'codigo'))
+                )
+                tipo = next((r[2] for r in info if str(r[1]).lower() == self._col_it_comp), "")
+                self._it_comp_numerico = afinidad_numerica(tipo)
+            return self._col_it_comp
+
+    def costo_ultimo(self, codigo: str) -> float:
+        """Último costo > 0 del artículo en it_comp (0.0 si no tiene compras)."""
+        col = self.columna_codigo_it_comp()
+        with self._lock:
+            row = self._conexion().execute(
+                "SELECT ic.costo FROM it_comp AS ic "
+                "LEFT JOIN compras AS c ON c.remito = ic.remito "
+                f"WHERE ic.{col} = ? AND ic.costo > 0 "
+                "ORDER BY COALESCE(c.fecha, '' ) DESC, ic.rowid DESC "
+                "LIMIT 1",
+                (str(codigo).strip(),),
+            ).fetchone()
+        return float(row[0] or 0.0) if row and row[0] is not None else 0.0
+
+    def costos_ultimos(self, codigos: Iterable[str]) -> Dict[str, float]:
+        """
+        Último costo > 0 de cada código en UNA consulta por bloque de
+        LOTE_IN códigos (ROW_NUMBER() por artículo, mismo orden que
+        costo_ultimo). El resultado va por código pedido (como costo_ultimo,
+        '0123' encuentra al 123 si la columna es numérica); los códigos sin
+        compras no aparecen.
+        """
+        col = self.columna_codigo_it_comp()
+        pedidos = list(dict.fromkeys(c for c in codigos if str(c).strip()))
+        claves = list(dict.fromkeys(str(c).strip() for c in pedidos))
+        encontrados: Dict[str, float] = {}
+        for i in range(0, len(claves), LOTE_IN):
+            bloque = claves[i:i + LOTE_IN]
+            marcas = ",".join("?" * len(bloque))
+            with self._lock:
+                rows = self._conexion().execute(
+                    "SELECT art, costo FROM ("
+                    f"  SELECT ic.{col} AS art, ic.costo AS costo,"
+                    f"         ROW_NUMBER() OVER (PARTITION BY ic.{col}"
+                    "                             ORDER BY COALESCE(c.fecha, '') DESC, ic.rowid DESC) AS rn"
+                    "    FROM it_comp AS ic"
+                    "    LEFT JOIN compras AS c ON c.remito = ic.remito"
+                    f"   WHERE ic.costo > 0 AND ic.{col} IN ({marcas})"
+                    ") WHERE rn = 1",
+                    bloque,
+                ).fetchall()
+            for art, costo in rows:
+                if art is not None and costo is not None:
+                    encontrados[str(art).strip()] = float(costo)
+        out: Dict[str, float] = {}
+        for c in pedidos:
+            costo = self._resolver(encontrados, c, numerico=self._it_comp_numerico)
+            if costo is not None:
+                out[c] = costo
+        return out
+
+    def descripciones(self, codigos: Iterable[str]) -> Dict[str, str]:
+        """codigo -> descripción (del índice si está listo; si no, con IN por bloques)."""
+        pedidos = list(dict.fromkeys(codigos))
+        if self._indice_listo.is_set():
+            encontrados = self._desc_por_codigo
+        else:
+            desc_col = self.columna_descripcion()
+            if not desc_col:
+                return {}
+            encontrados = {}
+            claves = list(dict.fromkeys(str(c).strip() for c in pedidos))
+            # Primero por codigo (usa el índice de la tabla); los que falten, por TRIM(codigo)
+            for expr in ("codigo", "TRIM(codigo)"):
+                for i in range(0, len(claves), LOTE_IN):
+                    bloque = claves[i:i + LOTE_IN]
+                    marcas = ",".join("?" * len(bloque))
+                    with self._lock:
+                        rows = self._conexion().execute(
+                            f"SELECT codigo, {desc_col} FROM articulo WHERE {expr} IN ({marcas})", bloque
+                        ).fetchall()
+                    encontrados.update((str(cod).strip(), "" if desc is None else str(desc)) for cod, desc in rows)
+                claves = [c for c in claves if self._resolver(encontrados, c) is None]
+                if not claves:
+                    break
+        # Por código pedido (así '0123' encuentra al 123 guardado como número)
+        out: Dict[str, str] = {}
+        for c in pedidos:
+            desc = self._resolver(encontrados, c)
+            if desc is not None:
+                out[c] = desc
+        return out
+
+    def cerrar(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                try:
+                    self._con.close()
+                except Exception:
+                    pass
+                self._con = None
+
+    # ---------------- índice en memoria ----------------
+    def iniciar_indice(self) -> None:
+        """Arma el índice en un hilo en segundo plano (sólo la primera vez)."""
+        with self._lock:
+            if self._hilo_indice is not None:
+                return
+            self._hilo_indice = threading.Thread(
+                target=self._armar_indice, name="articulos-indice", daemon=True
+            )
+            self._hilo_indice.start()
+
+    @property
+    def indice_listo(self) -> bool:
+        return self._indice_listo.is_set()
+
+    def _armar_indice(self) -> None:
+        try:
+            desc_col = self.columna_descripcion()
+            if not desc_col:
+                return
+            # Conexión propia: el hilo de Tk sigue usando la compartida sin esperar este SELECT
+            con = conectar_ro(self.db_path)
+            try:
+                rows = con.execute(
+                    f"SELECT codigo, {desc_col} FROM articulo WHERE codigo IS NOT NULL"
+                ).fetchall()
+            finally:
+                con.close()
+            desc_por_codigo = {str(cod).strip(): ("" if desc is None else str(desc)) for cod, desc in rows}
+            codigos = sorted(desc_por_codigo)
+            desc_norm = [normalizar(desc_por_codigo[c]) for c in codigos]
+            indice_tri: Dict[str, array] = {}
+            for pos, texto in enumerate(desc_norm):
+                for tri in trigramas(texto):
+                    lista = indice_tri.get(tri)
+                    if lista is None:
+                        lista = indice_tri[tri] = array("I")
+                    lista.append(pos)
+            # Se publican ya armados: los lectores nunca ven un índice a medias
+            self._desc_por_codigo = desc_por_codigo
+            self._desc_norm = desc_norm
+            self._trigramas = indice_tri
+            self._codigos = codigos
+            self._indice_listo.set()
+        except Exception as exc:
+            self.error_indice = exc
+
+    # ---------------- búsquedas ----------------
+    def buscar(self, codigo: str) -> Optional[str]:
+        """Descripción del artículo con ese código exacto, o None si no existe."""
+        if self._indice_listo.is_set():
+            return self._resolver(self._desc_por_codigo, codigo)
+        desc_col = self.columna_descripcion()
+        if not desc_col:
+            return None
+        clave = str(codigo).strip()
+        with self._lock:
+            row = self._conexion().execute(
+                f"SELECT {desc_col} FROM articulo WHERE codigo = ?", (clave,)
+            ).fetchone()
+            if row is None:
+                # Código guardado con espacios (el índice los recorta)
+                row = self._conexion().execute(
+                    f"SELECT {desc_col} FROM articulo WHERE TRIM(codigo) = ? LIMIT 1", (clave,)
+                ).fetchone()
+        return None if row is None else str(row[0])
+
+    def sugerir_prefijo(self, prefijo: str, limite: int = 20) -> List[Tuple[str, str]]:
+        """(codigo, descripción) cuyos códigos empiezan con `prefijo` (requiere índice)."""
+        if not self._indice_listo.is_set():
+            return []
+        codigos = self._codigos
+        out: List[Tuple[str, str]] = []
+        i = bisect_left(codigos, prefijo)
+        while i < len(codigos) and len(out) < limite and codigos[i].startswith(prefijo):
+            out.append((codigos[i], self._desc_por_codigo[codigos[i]]))
+            i += 1
+        return out
+
+    def buscar_texto(self, consulta: str, limite: int = 20) -> List[Tuple[str, str]]:
+        """
+        Sugerencias para lo que se está tipeando (requiere índice), en orden:
+          1) código exacto y códigos que empiezan con la consulta,
+          2) descripciones que contienen todas las palabras de la consulta,
+          3) si faltan, descripciones parecidas por trigramas compartidos.
+        """
+        if not self._indice_listo.is_set():
+            return []
+        codigos, desc_norm = self._codigos, self._desc_norm
+        consulta = consulta.strip()
+        if not consulta:
+            return []
+
+        elegidos: List[int] = []
+        vistos = set()
+
+        def _agregar(pos: int) -> bool:
+            if pos not in vistos:
+                vistos.add(pos)
+                elegidos.append(pos)
+            return len(elegidos) >= limite
+
+        # 1) Por código (exacto primero: es el menor de su prefijo)
+        for pref in dict.fromkeys((consulta, consulta.upper())):
+            i = bisect_left(codigos, pref)
+            while i < len(codigos) and codigos[i].startswith(pref):
+                if _agregar(i):
+                    return self._armar(elegidos)
+                i += 1
+
+        q = normalizar(consulta)
+        palabras = q.split()
+        if not palabras:
+            return self._armar(elegidos)
+
+        # 2) Todas las palabras como subcadena. Los candidatos salen del
+        #    trigrama interior (sin relleno) más raro de la consulta; con
+        #    palabras de 2 letras, de las que empiezan así (" xy"). Una sola
+        #    letra no alcanza para buscar en descripciones.
+        tri_q = trigramas(q)
+        claves = [t for t in tri_q if " " not in t]
+        if not claves:
+            claves = [f" {p[:2]}" for p in palabras if len(p) >= 2]
+        if claves:
+            listas = [self._trigramas.get(t) for t in claves]
+            candidatos = () if any(lst is None for lst in listas) else min(listas, key=len)
+        else:
+            candidatos = ()
+        for pos in candidatos:
+            texto = desc_norm[pos]
+            if all(p in texto for p in palabras):
+                if _agregar(pos):
+                    return self._armar(elegidos)
+
+        # 3) Aproximada: cuenta trigramas compartidos, ignorando los muy comunes
+        if len(elegidos) < limite and tri_q:
+            tope = max(1, int(len(desc_norm) * FUZZY_TRIGRAMA_COMUN))
+            utiles = [t for t in tri_q if t in self._trigramas and len(self._trigramas[t]) <= tope]
+            if utiles:
+                votos: Counter = Counter()
+                for t in utiles:
+                    votos.update(self._trigramas[t])
+                minimo = max(1, int(len(tri_q) * FUZZY_MIN_COINCIDENCIA + 0.999))
+                minimo = min(minimo, len(utiles))
+                for pos, n in votos.most_common():
+                    if n < minimo:
+                        break
+                    if _agregar(pos):
+                        break
+        return self._armar(elegidos)
+
+    def _armar(self, posiciones: List[int]) -> List[Tuple[str, str]]:
+        codigos = self._codigos
+        return [(codigos[p], self._desc_por_codigo[codigos[p]]) for p in posiciones]
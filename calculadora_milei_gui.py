@@ -1,20 +1,67 @@
 
 from __future__ import annotations
 
+import time
+
+# Marca de arranque: se toma antes de importar Tk y el motor de cálculo
+_T_INICIO = time.perf_counter()
+
+import csv
+import logging
+import os
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import tkinter.font as tkfont
 
 # Importa el motor de cálculo
 try:
     import calculadora_milei_core as core
+    import calculadora_milei_brackets as milei_brackets
+    import calculadora_milei_db as milei_db
+    import calculadora_milei_jobs as milei_jobs
 except ImportError as exc:
     raise SystemExit(
-        "No se pudo importar 'calculadora_milei_core'.\n"
-        "Copiá calculadora_milei_core.py a la misma carpeta que este archivo."
+        f"No se pudo importar '{exc.name}'.\n"
+        "Copiá los módulos calculadora_milei_*.py a la misma carpeta que este archivo."
     ) from exc
 
 
+CALC_LOG = logging.getLogger("GESTION2026.CALCULADORA_MILEI")
+LOGS_DIR = r"C:\!GESTION2026\LOGS"
+
+
+def _configurar_log() -> None:
+    """Log a LOGS\\calculadora_milei.log (como web_facturator.log); si no se puede, sin archivo."""
+    CALC_LOG.setLevel(logging.INFO)
+    if any(getattr(h, "_g26_tag", "") == "calculadora_milei.log" for h in CALC_LOG.handlers):
+        return
+    try:
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        fh = logging.FileHandler(os.path.join(LOGS_DIR, "calculadora_milei.log"), encoding="utf-8")
+    except OSError:
+        return
+    fh.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
+    fh._g26_tag = "calculadora_milei.log"
+    CALC_LOG.addHandler(fh)
+
+
+def _ms_desde_inicio() -> float:
+    return (time.perf_counter() - _T_INICIO) * 1000.0
+
+
+# Búsqueda de artículos mientras se escribe
+SUGERENCIAS_MAX = 12
+SUGERENCIAS_DEBOUNCE_MS = 150
+
+# Cada cuánto se mira si cambió el JSON de tramos (sólo os.stat)
+BRACKETS_POLL_MS = 3000
+
+
+# Tiempo hasta tener importados Tk y los módulos calculadora_milei_*
+_T_MODULOS = _ms_desde_inicio()
+
+
 def _parse_float(text: str, default: float | None = None) -> float:
     """Convierte texto a float aceptando coma o punto."""
     if text is None:
@@ -48,6 +95,284 @@ def _parse_int_list(text: str, default: tuple[int, ...]) -> list[int]:
     return nums
 
 
+class _TreeSync:
+    """
+    Actualiza un Treeview por diferencias en lugar de borrar y reinsertar.
+
+    - Reutiliza los item ids existentes (en orden) y sólo llama a tree.item()
+      en las filas cuyos valores o tags cambiaron.
+    - Mide el ancho sólo de las celdas que cambiaron y guarda el ancho de cada
+      celda por columna, así el máximo de la columna se recalcula sin volver
+      a medir todo.
+    Todas las escrituras de celdas del tree deben pasar por acá (set_celda)
+    para que el cache no quede desfasado.
+    """
+
+    PADDING = 24
+
+    def __init__(self, tree: ttk.Treeview, font: tkfont.Font | None = None) -> None:
+        self.tree = tree
+        self.cols: tuple[str, ...] = tuple(tree["columns"])
+        self._font = font if font is not None else tkfont.nametofont("TkDefaultFont")
+        self._items: list[str] = []
+        self._valores: dict[str, tuple[str, ...]] = {}
+        self._tags: dict[str, tuple[str, ...]] = {}
+        self._anchos: dict[str, dict[str, int]] = {col: {} for col in self.cols}
+        self._ancho_header = {
+            col: self._font.measure(tree.heading(col, "text")) for col in self.cols
+        }
+        self._ancho_aplicado: dict[str, int] = {}
+
+    def items(self) -> list[str]:
+        return list(self._items)
+
+    def actualizar(self, filas: list[tuple], tags: list[tuple[str, ...]] | None = None) -> list[str]:
+        """Deja el tree con exactamente estas filas; devuelve los item ids en orden."""
+        tree = self.tree
+        cambiadas: set[str] = set()
+        nuevos: list[str] = []
+        for idx, fila in enumerate(filas):
+            valores = tuple(str(v) for v in fila)
+            tag = tuple(tags[idx]) if tags else ()
+            if idx < len(self._items):
+                item = self._items[idx]
+                if self._valores.get(item) != valores or self._tags.get(item) != tag:
+                    tree.item(item, values=valores, tags=tag)
+                    self._medir(item, valores, self._valores.get(item))
+                    cambiadas.update(self.cols)
+            else:
+                item = tree.insert("", "end", values=valores, tags=tag)
+                self._medir(item, valores, None)
+                cambiadas.update(self.cols)
+            self._valores[item] = valores
+            self._tags[item] = tag
+            nuevos.append(item)
+
+        sobrantes = self._items[len(filas):]
+        if sobrantes:
+            tree.delete(*sobrantes)
+            for item in sobrantes:
+                self._olvidar(item)
+            cambiadas.update(self.cols)
+
+        self._items = nuevos
+        self._aplicar_anchos(cambiadas)
+        return list(nuevos)
+
+    def set_celda(self, item: str, col: str, valor) -> None:
+        texto = str(valor)
+        actuales = self._valores.get(item)
+        if actuales is None:
+            self.tree.set(item, col, texto)
+            return
+        pos = self.cols.index(col)
+        if actuales[pos] == texto:
+            return
+        self.tree.set(item, col, texto)
+        self._valores[item] = actuales[:pos] + (texto,) + actuales[pos + 1:]
+        self._anchos[col][item] = self._font.measure(texto)
+        self._aplicar_anchos({col})
+
+    def get_celda(self, item: str, col: str) -> str:
+        actuales = self._valores.get(item)
+        if actuales is None:
+            return self.tree.set(item, col)
+        return actuales[self.cols.index(col)]
+
+    def limpiar(self) -> None:
+        if self._items:
+            self.tree.delete(*self._items)
+        self._items = []
+        self._valores.clear()
+        self._tags.clear()
+        for anchos in self._anchos.values():
+            anchos.clear()
+        self._aplicar_anchos(set(self.cols))
+
+    def _medir(self, item: str, valores: tuple[str, ...], previos: tuple[str, ...] | None) -> None:
+        for pos, col in enumerate(self.cols):
+            if previos is not None and previos[pos] == valores[pos]:
+                continue
+            self._anchos[col][item] = self._font.measure(valores[pos])
+
+    def _olvidar(self, item: str) -> None:
+        self._valores.pop(item, None)
+        self._tags.pop(item, None)
+        for anchos in self._anchos.values():
+            anchos.pop(item, None)
+
+    def _aplicar_anchos(self, cols) -> None:
+        for col in cols:
+            ancho = max(self._anchos[col].values(), default=0)
+            ancho = max(ancho, self._ancho_header[col]) + self.PADDING
+            if self._ancho_aplicado.get(col) != ancho:
+                self.tree.column(col, width=ancho)
+                self._ancho_aplicado[col] = ancho
+
+
+def _avance(trabajo: "milei_jobs.Trabajo | None", fraccion: float, texto: str) -> None:
+    """Avance para la barra de estado (sin trabajo, p. ej. llamado desde otro cálculo, no hace nada)."""
+    if trabajo is not None:
+        trabajo.progreso(fraccion, texto)
+
+
+def _calcular_tabla_sueltos(trabajo: "milei_jobs.Trabajo | None", costo_unitario: float,
+                            ganancia_factor: float, comision_ml: float,
+                            cantidades: list[int], escalera: bool,
+                            tabla_brackets: "core.BracketTable") -> "core.TablaPrecios":
+    """Cálculo de la pestaña Sueltos (corre en un hilo de trabajo, sin Tk)."""
+    if escalera:
+        _avance(trabajo, 0.0, f"escalera óptima 1..{max(cantidades)}")
+        return core.escalera_optima(
+            costo_unitario=costo_unitario,
+            ganancia_factor=ganancia_factor,
+            comision_ml=comision_ml,
+            n_max=max(cantidades),
+            brackets=tabla_brackets,
+        )
+    # Precio + desglose en una sola pasada (formato columnar)
+    return core.tabla_precios_cached(
+        costo_unitario=costo_unitario,
+        ganancia_factor=ganancia_factor,
+        comision_ml=comision_ml,
+        cantidades=cantidades,
+        brackets=tabla_brackets,
+    )
+
+
+def _calcular_tabla_packs(costo_pack10: float, ganancia_factor: float, comision_ml: float,
+                          unidades: list[int], tabla_brackets: "core.BracketTable") -> "core.TablaPrecios":
+    """Cálculo de la pestaña Packs x10 (corre en un hilo de trabajo, sin Tk)."""
+    return core.tabla_precios_cached(
+        costo_unitario=core.costo_unitario_pack10(costo_pack10),
+        ganancia_factor=ganancia_factor,
+        comision_ml=comision_ml,
+        cantidades=unidades,
+        brackets=tabla_brackets,
+    )
+
+
+def _tablas_articulo(trabajo: "milei_jobs.Trabajo | None", costo_unitario: float, costo_pack10: float,
+                     params: dict, tabla_sueltos: "core.BracketTable",
+                     tabla_pack10: "core.BracketTable") -> tuple["core.TablaPrecios", "core.TablaPrecios"]:
+    """Tablas de Sueltos y Packs x10; en un solo cálculo si comparten parámetros."""
+    g_s, c_s = params["ganancia_sueltos"], params["comision_sueltos"]
+    g_p, c_p = params["ganancia_packs"], params["comision_packs"]
+    if not params["escalera"] and tabla_sueltos is tabla_pack10 and (g_s, c_s) == (g_p, c_p):
+        return tuple(core.tablas_precios_lote(
+            [(costo_unitario, params["cantidades"]),
+             (core.costo_unitario_pack10(costo_pack10), params["unidades"])],
+            g_s, c_s, tabla_sueltos,
+        ))
+    sueltos = _calcular_tabla_sueltos(trabajo, costo_unitario, g_s, c_s, params["cantidades"],
+                                      params["escalera"], tabla_sueltos)
+    _avance(trabajo, 0.75, "packs x10")
+    return sueltos, _calcular_tabla_packs(costo_pack10, g_p, c_p, params["unidades"], tabla_pack10)
+
+
+def _cotizar_articulo(trabajo: "milei_jobs.Trabajo", repo: "milei_db.ArticulosRepo", codigo: str,
+                      params: dict | None, tabla_sueltos: "core.BracketTable",
+                      tabla_pack10: "core.BracketTable") -> tuple:
+    """
+    Costo de la última compra + tablas del artículo (corre en un hilo de
+    trabajo). Devuelve (costo_str, costo_pack10_str, tablas | None); los
+    costos van como texto para los Entry y las tablas se calculan con esos
+    mismos valores, igual que si se apretara "Calcular" en cada pestaña.
+    Las tablas quedan en PRICING_CACHE por artículo + costo + parámetros.
+    """
+    _avance(trabajo, 0.0, "buscando costo")
+    costo = repo.costo_ultimo(codigo)
+    if costo <= 0:
+        return None, None, None
+    costo_str = f"{costo:.2f}"
+    pack_str = f"{costo * 10:.2f}"
+    if params is None:
+        return costo_str, pack_str, None
+
+    if trabajo.cancelado:
+        return costo_str, pack_str, None
+    _avance(trabajo, 0.5, "calculando tablas")
+    costo_unitario, costo_pack10 = _parse_float(costo_str), _parse_float(pack_str)
+    clave = (
+        "articulo", codigo, costo_unitario, costo_pack10,
+        params["ganancia_sueltos"], params["comision_sueltos"], tuple(params["cantidades"]), params["escalera"],
+        params["ganancia_packs"], params["comision_packs"], tuple(params["unidades"]),
+        tabla_sueltos.version, tabla_pack10.version,
+    )
+    tablas = core.PRICING_CACHE.obtener(
+        clave, lambda: _tablas_articulo(trabajo, costo_unitario, costo_pack10, params, tabla_sueltos, tabla_pack10)
+    )
+    return costo_str, pack_str, tablas
+
+
+def _calcular_matriz(trabajo: "milei_jobs.Trabajo", precios_base: list[float], costos: list[float],
+                     comision_ml: float, brackets: "core.BracketTable",
+                     descuentos: tuple[float, ...]) -> tuple:
+    """Matriz de descuentos (hilo de trabajo): (precios[desc][fila], ganancia %[desc][fila])."""
+    _avance(trabajo, 0.0, f"{len(precios_base)} filas x {len(descuentos)} descuentos")
+    matriz = core.matriz_descuentos(precios_base, costos, comision_ml, brackets, descuentos)
+    _avance(trabajo, 0.6, "ganancias")
+    return matriz.precio_venta, matriz.ganancia_pct()
+
+
+def _fmt_miles(valor: float, decimales: int = 2) -> str:
+    """12345.678 -> '12.345,68' (separador de miles con punto, coma decimal)."""
+    return f"{valor:,.{decimales}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _parse_lineas_cotizacion(texto: str) -> list[tuple[str, int]]:
+    """
+    'CODIGO CANTIDAD' por línea (separado por espacio, tab, ';' o ',').
+    Sin cantidad => 1. Las líneas vacías o que empiezan con '#' se ignoran.
+    """
+    lineas: list[tuple[str, int]] = []
+    for nro, linea in enumerate((texto or "").splitlines(), start=1):
+        linea = linea.strip()
+        if not linea or linea.startswith("#"):
+            continue
+        partes = linea.replace(";", " ").replace(",", " ").split()
+        codigo = partes[0]
+        try:
+            cantidad = int(partes[1]) if len(partes) > 1 else 1
+        except ValueError:
+            raise ValueError(f"Línea {nro}: cantidad inválida '{partes[1]}'") from None
+        if cantidad <= 0:
+            raise ValueError(f"Línea {nro}: la cantidad tiene que ser mayor a 0")
+        lineas.append((codigo, cantidad))
+    return lineas
+
+
+def _cotizar_lineas(trabajo: "milei_jobs.Trabajo", repo: "milei_db.ArticulosRepo",
+                    lineas: list[tuple[str, int]], ganancia_factor: float, comision_ml: float,
+                    tabla_brackets: "core.BracketTable") -> dict | None:
+    """
+    Cotización de varios artículos (corre en un hilo de trabajo): costos y
+    descripciones con una consulta por bloque y todas las líneas con costo
+    en un solo cálculo en lote. Las líneas sin costo van en 'faltantes'.
+    Si la cotización se reemplazó por otra a mitad de camino devuelve None
+    (el resultado igual se descarta).
+    """
+    codigos = [cod for cod, _ in lineas]
+    _avance(trabajo, 0.0, f"costos de {len(codigos)} códigos")
+    costos = repo.costos_ultimos(codigos)
+    if trabajo.cancelado:
+        return None
+    _avance(trabajo, 0.4, "descripciones")
+    descs = repo.descripciones(codigos)
+    if trabajo.cancelado:
+        return None
+    ok = [(cod, cant) for cod, cant in lineas if costos.get(cod, 0.0) > 0]
+    _avance(trabajo, 0.7, f"precios de {len(ok)} líneas")
+    tabla = core.tabla_precios_lineas(
+        [(costos[cod], cant) for cod, cant in ok], ganancia_factor, comision_ml, tabla_brackets
+    )
+    return {
+        "lineas": [(cod, descs.get(cod, ""), cant, costos[cod]) for cod, cant in ok],
+        "faltantes": [cod for cod, _ in lineas if costos.get(cod, 0.0) <= 0],
+        "tabla": tabla,
+    }
+
+
 class MileiCalculatorApp(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
@@ -62,9 +387,27 @@ class MileiCalculatorApp(tk.Tk):
         # Valores actuales de Precio WEB (numéricos)
         self._precio_web_calc_val: float | None = None
         self._precio_web_set_val: float | None = None
+        # Actualización incremental de los Treeview (ver _TreeSync)
+        self._tree_syncs: dict[ttk.Treeview, _TreeSync] = {}
+        # Conexión de sólo lectura persistente + índice de artículos en memoria
+        self._articulos = milei_db.ArticulosRepo()
+        # Cálculos y búsquedas en hilos de trabajo; resultados vía after()
+        self._jobs = milei_jobs.JobScheduler(self, on_estado=lambda texto: self.status_var.set(texto))
+        self._sug_after_id: str | None = None
+
+        # Tramos de costo fijo desde el JSON versionado (si existe)
+        self._vigilante_brackets = milei_brackets.VigilanteBrackets(intervalo=0.0)
+        self._vigilante_brackets.revisar(forzar=True)
 
         self._build_style()
         self._build_ui()
+        self.after(BRACKETS_POLL_MS, self._revisar_brackets)
+
+        # Tiempos de arranque (ms desde _T_INICIO); se loguean al quedar interactiva
+        self._t_modulos = _T_MODULOS
+        self._t_construida = _ms_desde_inicio()
+        self._t_primer_paint: float | None = None
+        self.bind("<Map>", self._on_primer_map, add="+")
 
     def _build_style(self) -> None:
         style = ttk.Style(self)
@@ -74,19 +417,31 @@ class MileiCalculatorApp(tk.Tk):
         except tk.TclError:
             pass
 
+        # Fuentes creadas una sola vez (Tk no vuelve a resolver la tupla en
+        # cada widget que las usa)
+        self._fuentes = {
+            "header": tkfont.Font(self, family="Segoe UI", size=16, weight="bold"),
+            "normal": tkfont.Font(self, family="Segoe UI", size=11),
+            "bold": tkfont.Font(self, family="Segoe UI", size=11, weight="bold"),
+            "chica": tkfont.Font(self, family="Segoe UI", size=10),
+            "mono": tkfont.Font(self, family="Consolas", size=10),
+        }
+        # Fuente con la que _TreeSync mide el ancho de las celdas
+        self._fuente_medida = tkfont.nametofont("TkDefaultFont")
+        f = self._fuentes
+
         # Fuente un poco más grande
-        style.configure("Header.TLabel", font=("Segoe UI", 16, "bold"))
-        style.configure("SubHeader.TLabel", font=("Segoe UI", 11))
-        style.configure("Label.TLabel", font=("Segoe UI", 11))
-        style.configure("Accent.TButton", font=("Segoe UI", 11, "bold"))
-        style.configure("Secondary.TButton", font=("Segoe UI", 10))
+        style.configure("Header.TLabel", font=f["header"])
+        style.configure("SubHeader.TLabel", font=f["normal"])
+        style.configure("Label.TLabel", font=f["normal"])
+        style.configure("Secondary.TButton", font=f["chica"])
 
         # Botón naranja para "CALCULAR TABLA"
         style.configure(
             "Accent.TButton",
             background="#f97316",  # naranja
             foreground="white",
-            font=("Segoe UI", 11, "bold"),
+            font=f["bold"],
         )
         style.map(
             "Accent.TButton",
@@ -99,7 +454,7 @@ class MileiCalculatorApp(tk.Tk):
             "Treeview.Heading",
             background="black",
             foreground="white",
-            font=("Segoe UI", 11, "bold"),
+            font=f["bold"],
             relief="raised",
         )
         style.map(
@@ -108,7 +463,7 @@ class MileiCalculatorApp(tk.Tk):
             foreground=[("active", "white"), ("pressed", "white")],
         )
 
-        style.configure("Treeview", font=("Segoe UI", 11))
+        style.configure("Treeview", font=f["normal"])
 
         # Fondo del LabelFrame de Precio WEB igual al resto
         try:
@@ -146,9 +501,21 @@ class MileiCalculatorApp(tk.Tk):
         ttk.Label(frm_art, text="Código de artículo:", style="Label.TLabel").pack(side=tk.LEFT)
 
         self.art_codigo_var = tk.StringVar()
-        ent_codigo = ttk.Entry(frm_art, width=12, textvariable=self.art_codigo_var)
-        ent_codigo.pack(side=tk.LEFT, padx=(4, 4))
-        ent_codigo.bind("<Return>", self._on_buscar_articulo)
+        self.ent_codigo = ttk.Entry(frm_art, width=12, textvariable=self.art_codigo_var)
+        self.ent_codigo.pack(side=tk.LEFT, padx=(4, 4))
+        self.ent_codigo.bind("<Return>", self._on_buscar_articulo)
+        self.ent_codigo.bind("<KeyRelease>", self._on_codigo_tecleado, add="+")
+        self.ent_codigo.bind("<Down>", self._on_sugerencias_foco)
+        self.ent_codigo.bind("<Escape>", lambda e: self._ocultar_sugerencias())
+
+        # Sugerencias (código o texto de la descripción); se ubica con place()
+        # debajo del Entry sólo cuando hay resultados
+        self.lst_sugerencias = tk.Listbox(self, height=SUGERENCIAS_MAX, activestyle="dotbox",
+                                          font=self._fuentes["chica"], exportselection=False)
+        self.lst_sugerencias.bind("<Return>", self._on_sugerencia_elegida)
+        self.lst_sugerencias.bind("<Double-Button-1>", self._on_sugerencia_elegida)
+        self.lst_sugerencias.bind("<Escape>", lambda e: self._ocultar_sugerencias(enfocar=True))
+        self._sugerencias: list[tuple[str, str]] = []
 
         btn_buscar = ttk.Button(frm_art, text="Buscar", command=self._on_buscar_articulo)
         btn_buscar.pack(side=tk.LEFT, padx=(4, 10))
@@ -185,11 +552,22 @@ class MileiCalculatorApp(tk.Tk):
         self.tab_sueltos = ttk.Frame(notebook)
         self.tab_packs = ttk.Frame(notebook)
 
+        self.tab_cotizacion = ttk.Frame(notebook)
+
         notebook.add(self.tab_sueltos, text="Artículos sueltos")
         notebook.add(self.tab_packs, text="Pack x 10")
-
-        self._build_tab_sueltos(self.tab_sueltos)
-        self._build_tab_packs(self.tab_packs)
+        notebook.add(self.tab_cotizacion, text="Cotización")
+
+        # El contenido de cada pestaña se arma la primera vez que se la
+        # selecciona (ver _asegurar_tab); al arrancar sólo se arma la visible
+        self.notebook = notebook
+        self._tabs_pendientes = {
+            str(self.tab_sueltos): (self.tab_sueltos, self._build_tab_sueltos),
+            str(self.tab_packs): (self.tab_packs, self._build_tab_packs),
+            str(self.tab_cotizacion): (self.tab_cotizacion, self._build_tab_cotizacion),
+        }
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self._asegurar_tab(self.tab_sueltos)
 
         self.status_var = tk.StringVar(value="Listo.")
         status = ttk.Label(self,
@@ -198,24 +576,6 @@ class MileiCalculatorApp(tk.Tk):
                            style="SubHeader.TLabel")
         status.pack(side=tk.BOTTOM, fill=tk.X, padx=8, pady=(0, 4))
 
-    # ------------------------ util: autosize columnas ----------------------
-
-    def _autosize_tree_columns(self, tree: ttk.Treeview) -> None:
-        """Ajusta el ancho de las columnas al contenido (encabezado + filas)."""
-        font = tkfont.nametofont("TkDefaultFont")
-        for col in tree["columns"]:
-            header_text = tree.heading(col, "text")
-            width = font.measure(header_text)
-
-            for item in tree.get_children():
-                val = tree.set(item, col)
-                text = str(val)
-                w = font.measure(text)
-                if w > width:
-                    width = w
-            # un poco de padding
-            tree.column(col, width=width + 24)
-
     def _aplicar_descuento_item(
         self,
         item_id: str,
@@ -247,12 +607,14 @@ class MileiCalculatorApp(tk.Tk):
         nuevo = max(0.0, nuevo)
         nuevo_round = round(nuevo)
         precio_str = f"{nuevo_round:,}".replace(",", ".")
-        tree.set(item_id, price_col, precio_str)
+        sync = self._tree_syncs[tree]
+        sync.set_celda(item_id, price_col, precio_str)
 
         # Recalcular ganancia % para el nuevo precio
         costo_total = data.get("costo_total", 0.0)
         try:
-            desg = core.desglose_venta(
+            # Memoizado: al alternar descuentos se repiten los mismos precios
+            desg = core.desglose_venta_cached(
                 precio_venta=nuevo,
                 costo_total=costo_total,
                 comision_ml=comision_ml,
@@ -271,8 +633,58 @@ class MileiCalculatorApp(tk.Tk):
             .replace(".", ",")
             .replace("X", ".")
         ) + " %"
-        tree.set(item_id, ganancia_col, ganancia_str)
+        sync.set_celda(item_id, ganancia_col, ganancia_str)
+
+
+    # ------------------------ PESTAÑAS / ARRANQUE -------------------------
 
+    def _asegurar_tab(self, tab: ttk.Frame) -> None:
+        """Arma el contenido de la pestaña si todavía no se armó."""
+        pendiente = self._tabs_pendientes.pop(str(tab), None)
+        if pendiente is None:
+            return
+        t0 = time.perf_counter()
+        frame, build = pendiente
+        build(frame)
+        CALC_LOG.info("Pestaña %s armada en %.1f ms", self.notebook.tab(frame, "text"),
+                      (time.perf_counter() - t0) * 1000.0)
+
+    def _on_tab_changed(self, event: object | None = None) -> None:
+        actual = self.notebook.select()
+        if actual:
+            self._asegurar_tab(self.nametowidget(actual))
+
+    def _on_primer_map(self, event: tk.Event) -> None:
+        if event.widget is not self or self._t_primer_paint is not None:
+            return
+        self._t_primer_paint = _ms_desde_inicio()
+        # Los redibujos pendientes corren antes que este after_idle
+        self.after_idle(self._on_interactivo)
+
+    def _on_interactivo(self) -> None:
+        t_interactivo = _ms_desde_inicio()
+        CALC_LOG.info(
+            "Arranque: módulos %.0f ms, ventana armada %.0f ms, primer dibujo %.0f ms, interactivo %.0f ms",
+            self._t_modulos, self._t_construida, self._t_primer_paint, t_interactivo,
+        )
+        self.status_var.set(f"Listo. (abierto en {t_interactivo / 1000.0:.2f} s)")
+        # NumPy se importa en segundo plano, no en el primer cálculo
+        threading.Thread(target=core.precargar_numpy, name="precarga-numpy", daemon=True).start()
+
+    def _revisar_brackets(self) -> None:
+        """Si cambió el JSON de tramos, las tablas nuevas quedan activas para el próximo cálculo."""
+        vig = self._vigilante_brackets
+        error_previo = vig.ultimo_error
+        try:
+            if vig.revisar():
+                self.status_var.set(
+                    f"Tramos de costo fijo actualizados (versión {vig.activa.version}). "
+                    "Recalculá las tablas para usarlos."
+                )
+            elif vig.ultimo_error and vig.ultimo_error != error_previo:
+                self.status_var.set(f"Tramos inválidos, se mantienen los actuales: {vig.ultimo_error}")
+        finally:
+            self.after(BRACKETS_POLL_MS, self._revisar_brackets)
 
     # ------------------------ BÚSQUEDA DE ARTÍCULO -------------------------
 
@@ -280,39 +692,27 @@ class MileiCalculatorApp(tk.Tk):
         """
         Pide el código de artículo y, si existe en la tabla 'articulo' de
         C:\!GESTION2026\gestion.sqlite3, muestra la descripción en la barra
-        superior. No modifica ninguna lógica de cálculo existente.
+        superior. Además completa el costo con la última compra y calcula
+        las tablas de Sueltos y Packs x10 (ver _cotizar_articulo).
         """
+        self._ocultar_sugerencias()
         codigo = (self.art_codigo_var.get() or "").strip()
         if not codigo:
             messagebox.showwarning("Código vacío", "Ingresá un código de artículo.")
             return
 
-        conn = None
         try:
-            import sqlite3
-
-            conn = sqlite3.connect(r"C:\!GESTION2026\gestion.sqlite3")
-            cur = conn.cursor()
-
-            # Descubro columnas disponibles en 'articulo'
-            cur.execute("PRAGMA table_info(articulo)")
-            cols_info = cur.fetchall()
-            col_names = [c[1] for c in cols_info]
-
-            # Busco una columna de descripción razonable
-            desc_candidates = ["descripcion", "detalle", "descrip", "nombre"]
-            desc_col = next((c for c in desc_candidates if c in col_names), None)
-
-            if not desc_col:
+            if not self._articulos.columna_descripcion():
                 self.art_desc_var.set("(no hay columna de descripción en 'articulo')")
                 return
 
-            sql = f"SELECT {desc_col} FROM articulo WHERE codigo = ?"
-            cur.execute(sql, (codigo,))
-            row = cur.fetchone()
+            # Primera búsqueda: se arma el índice en memoria para las siguientes
+            self._articulos.iniciar_indice()
 
-            if row:
-                self.art_desc_var.set(str(row[0]))
+            desc = self._articulos.buscar(codigo)
+            if desc is not None:
+                self.art_desc_var.set(desc)
+                self._cotizar_articulo(codigo)
             else:
                 self.art_desc_var.set("(código no encontrado)")
         except Exception as exc:
@@ -321,12 +721,134 @@ class MileiCalculatorApp(tk.Tk):
                 "Error de base de datos",
                 f"No se pudo consultar la tabla 'articulo':\n{exc}",
             )
-        finally:
-            if conn is not None:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+
+    def _cotizar_articulo(self, codigo: str) -> None:
+        """
+        Trae el último costo de compra del artículo (en un hilo de trabajo),
+        lo carga en Sueltos y Packs x10 y calcula ambas tablas de una vez.
+        Si algún parámetro de las pestañas no es válido, sólo carga el costo.
+        """
+        # Se leen y completan entradas de las dos pestañas: tienen que estar armadas
+        self._asegurar_tab(self.tab_sueltos)
+        self._asegurar_tab(self.tab_packs)
+        try:
+            params = {
+                "ganancia_sueltos": _parse_float(self.ent_ganancia_sueltos.get(), default=100.0) / 100.0,
+                "comision_sueltos": _parse_float(self.ent_comision_sueltos.get(), default=0.16),
+                "cantidades": _parse_int_list(self.ent_cantidades.get(), default=(1, 5, 10, 15, 20, 25, 50, 100)),
+                "escalera": bool(self.escalera_optima_var.get()),
+                "ganancia_packs": _parse_float(self.ent_ganancia_packs.get(), default=100.0) / 100.0,
+                "comision_packs": _parse_float(self.ent_comision_packs.get(), default=0.16),
+                "unidades": _parse_int_list(self.ent_unidades_pack.get(),
+                                            default=(2, 3, 4, 5, 10, 50, 100, 150, 200, 250)),
+            }
+        except ValueError:
+            params = None
+
+        self._jobs.cancelar("sueltos")
+        self._jobs.cancelar("packs")
+        self.status_var.set(f"{codigo}: buscando costo…")
+        self._jobs.enviar(
+            "articulo",
+            _cotizar_articulo, self._articulos, codigo, params, core.TABLA_SUELTOS, core.TABLA_PACK10,
+            on_done=lambda res: self._mostrar_cotizacion(codigo, params, res),
+            on_error=self._on_error_calculo,
+            etiqueta=codigo,
+            con_progreso=True,
+        )
+
+    def _mostrar_cotizacion(self, codigo: str, params: dict | None, res: tuple) -> None:
+        costo_str, pack_str, tablas = res
+        if costo_str is None:
+            self.status_var.set(f"{codigo}: sin compras con costo > 0; ingresá el costo a mano.")
+            return
+        for ent, valor in ((self.ent_costo_unitario, costo_str), (self.ent_costo_pack10, pack_str)):
+            ent.delete(0, tk.END)
+            ent.insert(0, valor)
+        if tablas is None:
+            self.status_var.set(f"{codigo}: costo {costo_str} cargado (revisá los parámetros para calcular).")
+            return
+
+        ms = self._jobs.duraciones["articulo"] * 1000
+        tabla_sueltos, tabla_packs = tablas
+        self._mostrar_sueltos(tabla_sueltos, _parse_float(costo_str), params["ganancia_sueltos"] * 100.0,
+                              params["comision_sueltos"], ms)
+        self._mostrar_packs(tabla_packs, _parse_float(pack_str), params["ganancia_packs"] * 100.0,
+                            params["comision_packs"], ms)
+        self.status_var.set(
+            f"{codigo}: costo {costo_str} (última compra) — Sueltos y Packs x10 calculados en {ms:.1f} ms."
+        )
+
+    def _on_codigo_tecleado(self, event: object | None = None) -> None:
+        """
+        Búsqueda mientras se escribe: espera SUGERENCIAS_DEBOUNCE_MS sin
+        teclas nuevas y recién ahí encola la búsqueda (la anterior, si no
+        terminó, queda descartada).
+        """
+        if getattr(event, "keysym", "") in ("Return", "Down", "Up", "Escape", "Tab"):
+            return
+        self._articulos.iniciar_indice()
+        if self._sug_after_id is not None:
+            self.after_cancel(self._sug_after_id)
+        self._sug_after_id = self.after(SUGERENCIAS_DEBOUNCE_MS, self._pedir_sugerencias)
+
+    def _pedir_sugerencias(self) -> None:
+        self._sug_after_id = None
+        consulta = (self.art_codigo_var.get() or "").strip()
+        if not consulta:
+            self._ocultar_sugerencias()
+            return
+        if not self._articulos.indice_listo:
+            if self._articulos.error_indice is None:
+                # El índice se sigue armando: se reintenta sin bloquear Tk
+                self._sug_after_id = self.after(SUGERENCIAS_DEBOUNCE_MS * 2, self._pedir_sugerencias)
+            return
+        self._jobs.enviar(
+            "sugerencias",
+            self._articulos.buscar_texto, consulta, SUGERENCIAS_MAX,
+            on_done=lambda res: self._mostrar_sugerencias(consulta, res),
+            on_error=lambda exc: self._ocultar_sugerencias(),
+            etiqueta="Búsqueda",
+        )
+
+    def _mostrar_sugerencias(self, consulta: str, res: list[tuple[str, str]]) -> None:
+        if res and res[0][0] == consulta:
+            self.art_desc_var.set(res[0][1])
+        self._sugerencias = res
+        lst = self.lst_sugerencias
+        lst.delete(0, tk.END)
+        if not res:
+            self._ocultar_sugerencias()
+            return
+        for codigo, desc in res:
+            lst.insert(tk.END, f"{codigo}  —  {desc}")
+        lst.configure(height=min(SUGERENCIAS_MAX, len(res)))
+        lst.place(in_=self.ent_codigo, x=0, rely=1.0, y=2, width=520)
+        lst.lift()
+
+    def _ocultar_sugerencias(self, enfocar: bool = False) -> None:
+        self.lst_sugerencias.place_forget()
+        if enfocar:
+            self.ent_codigo.focus_set()
+
+    def _on_sugerencias_foco(self, event: object | None = None) -> str | None:
+        if not self._sugerencias or not self.lst_sugerencias.winfo_ismapped():
+            return None
+        self.lst_sugerencias.focus_set()
+        self.lst_sugerencias.selection_clear(0, tk.END)
+        self.lst_sugerencias.selection_set(0)
+        self.lst_sugerencias.activate(0)
+        return "break"
+
+    def _on_sugerencia_elegida(self, event: object | None = None) -> None:
+        sel = self.lst_sugerencias.curselection()
+        if not sel or sel[0] >= len(self._sugerencias):
+            return
+        codigo, _desc = self._sugerencias[sel[0]]
+        self.art_codigo_var.set(codigo)
+        self._ocultar_sugerencias(enfocar=True)
+        self.ent_codigo.icursor(tk.END)
+        self._on_buscar_articulo()
 
 
     # ------------------------ TAB: SUELTOS ---------------------------------
@@ -386,6 +908,14 @@ class MileiCalculatorApp(tk.Tk):
         )
         btn_clear.grid(row=0, column=3, sticky="w")
 
+        # Escalera óptima: busca en 1..(máx. de Cantidades) los quiebres de costo fijo
+        self.escalera_optima_var = tk.BooleanVar(value=False)
+        chk_escalera = ttk.Checkbutton(
+            frm2, text="Escalera óptima (1..máx.)",
+            variable=self.escalera_optima_var,
+        )
+        chk_escalera.grid(row=0, column=4, sticky="w", padx=(12, 0))
+
         frame_table = ttk.Frame(parent)
         frame_table.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
         frame_table.rowconfigure(0, weight=1)
@@ -416,6 +946,9 @@ class MileiCalculatorApp(tk.Tk):
         self.tree_sueltos.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
 
+        self._sync_sueltos = _TreeSync(self.tree_sueltos, self._fuente_medida)
+        self._tree_syncs[self.tree_sueltos] = self._sync_sueltos
+
         # Zebra amarillo
         self.tree_sueltos.tag_configure("odd", background="#fff9c4")   # amarillo suave
         self.tree_sueltos.tag_configure("even", background="#fffde7")  # casi blanco amarillento
@@ -436,6 +969,14 @@ class MileiCalculatorApp(tk.Tk):
         )
         btn_desglose.pack(side=tk.LEFT)
 
+        btn_matriz = ttk.Button(
+            frame_actions,
+            text="Matriz de descuentos",
+            style="Secondary.TButton",
+            command=self._on_matriz_sueltos,
+        )
+        btn_matriz.pack(side=tk.LEFT, padx=(8, 0))
+
         # Radio buttons de descuento
         self.descuento_var_sueltos = tk.StringVar(value="None")
         frm_rad = ttk.Frame(frame_actions)
@@ -470,9 +1011,9 @@ class MileiCalculatorApp(tk.Tk):
             comision_ml = 0.16
 
         if col == "#1":
-            current = self.tree_sueltos.set(row_id, "sel")
+            current = self._sync_sueltos.get_celda(row_id, "sel")
             new_val = "☑" if current != "☑" else "☐"
-            self.tree_sueltos.set(row_id, "sel", new_val)
+            self._sync_sueltos.set_celda(row_id, "sel", new_val)
 
             # Si destildo, vuelvo a precio base (sin descuento)
             if new_val == "☐":
@@ -487,7 +1028,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_SUELTOS,
+                    core.TABLA_SUELTOS,
                 )
                 self.descuento_var_sueltos.set(original)
             else:
@@ -500,7 +1041,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_SUELTOS,
+                    core.TABLA_SUELTOS,
                 )
 
         # seleccionamos la fila, pero el descuento depende del SEL
@@ -522,25 +1063,36 @@ class MileiCalculatorApp(tk.Tk):
             messagebox.showerror("Error en datos", f"Revisá los valores ingresados: {e}")
             return
 
-        try:
-            tabla = core.tabla_sueltos(
-                costo_unitario=costo_unitario,
-                ganancia_factor=ganancia_factor,
-                comision_ml=comision_ml,
-                cantidades=cantidades,
-            )
-        except Exception as e:  # noqa: BLE001
-            messagebox.showerror("Error de cálculo", f"Ocurrió un error al calcular:\n{e}")
-            return
-
-        # Limpiamos tabla y data interna
-        for item in self.tree_sueltos.get_children():
-            self.tree_sueltos.delete(item)
-        self._sueltos_data.clear()
+        # El cálculo corre en un hilo de trabajo; un cálculo nuevo reemplaza
+        # al anterior si todavía no terminó
+        self._jobs.cancelar("articulo")
+        self.status_var.set("Sueltos: calculando…")
+        self._jobs.enviar(
+            "sueltos",
+            _calcular_tabla_sueltos,
+            costo_unitario, ganancia_factor, comision_ml, cantidades,
+            bool(self.escalera_optima_var.get()), core.TABLA_SUELTOS,
+            on_done=lambda tabla: self._mostrar_sueltos(
+                tabla, costo_unitario, ganancia_pct, comision_ml, self._jobs.duraciones["sueltos"] * 1000),
+            on_error=self._on_error_calculo,
+            etiqueta="Sueltos",
+            con_progreso=True,
+        )
 
-        for idx, fila in enumerate(tabla):
+    def _on_error_calculo(self, e: Exception) -> None:
+        self.status_var.set("Error de cálculo.")
+        messagebox.showerror("Error de cálculo", f"Ocurrió un error al calcular:\n{e}")
+
+    def _mostrar_sueltos(self, tabla: "core.TablaPrecios", costo_unitario: float,
+                         ganancia_pct: float, comision_ml: float, ms: float) -> None:
+        # Armamos las filas; el tree se actualiza por diferencias (reusa items)
+        filas: list[tuple] = []
+        tags: list[tuple[str, ...]] = []
+        datos: list[dict] = []
+        for idx in range(len(tabla)):
             tag = "odd" if idx % 2 == 0 else "even"
-            costo_total = fila["costo_total"]
+            cantidad = int(tabla.cantidad[idx])
+            costo_total = tabla.costo_total[idx]
 
             # Costo con separador de miles y coma decimal: 12.345,67
             costo_str = (
@@ -550,24 +1102,12 @@ class MileiCalculatorApp(tk.Tk):
                 .replace("X", ".")
             )
             # Precio ML base (sin redondear), luego lo mostramos redondeado
-            precio_base = fila["precio_ml"]
+            precio_base = tabla.precio_ml[idx]
             precio_round = round(precio_base)
             precio_str = f"{precio_round:,}".replace(",", ".")
 
-            # Ganancia % con respecto al costo (usando precio_base)
-            try:
-                desg = core.desglose_venta(
-                    precio_venta=precio_base,
-                    costo_total=costo_total,
-                    comision_ml=comision_ml,
-                    brackets=core.BRACKETS_SUELTOS,
-                )
-                if costo_total > 0:
-                    gan_pct = (desg.ganancia_neta / costo_total) * 100.0
-                else:
-                    gan_pct = 0.0
-            except Exception:
-                gan_pct = 0.0
+            # Ganancia % con respecto al costo (ya viene en la tabla)
+            gan_pct = tabla.ganancia_pct(idx)
 
             ganancia_str = (
                 f"{gan_pct:,.1f}"
@@ -576,43 +1116,29 @@ class MileiCalculatorApp(tk.Tk):
                 .replace("X", ".")
             ) + " %"
 
-            item_id = self.tree_sueltos.insert(
-                "",
-                "end",
-                values=(
-                    "☐",
-                    fila["cantidad"],
-                    costo_str,
-                    precio_str,
-                    ganancia_str,
-                ),
-                tags=(tag,),
-            )
-            self._sueltos_data[item_id] = {
-                "cantidad": fila["cantidad"],
+            filas.append(("☐", cantidad, costo_str, precio_str, ganancia_str))
+            tags.append((tag,))
+            datos.append({
+                "cantidad": cantidad,
                 "costo_total": costo_total,
                 "precio_ml_base": precio_base,
                 "descuento_pct": 0.0,
-            }
+            })
+
+        # Sólo se tocan (y se miden) las filas que cambiaron
+        item_ids = self._sync_sueltos.actualizar(filas, tags)
+        self._sueltos_data.clear()
+        self._sueltos_data.update(zip(item_ids, datos))
 
-        
         # Calcular PRECIO WEB CALCULADO a partir de la fila de cantidad 1
         precio_web_calc = None
         try:
             # Buscar en la tabla de cálculo la fila con cantidad 1
-            for fila in tabla:
-                if fila.get("cantidad") == 1:
-                    precio_ml_1 = fila["precio_ml"]
-                    try:
-                        desg_web = core.desglose_venta(
-                            precio_venta=precio_ml_1,
-                            costo_total=0.0,
-                            comision_ml=comision_ml,
-                            brackets=core.BRACKETS_SUELTOS,
-                        )
-                        costo_fijo = desg_web.comision_fija
-                    except Exception:
-                        costo_fijo = 0.0
+            for idx in range(len(tabla)):
+                if tabla.cantidad[idx] == 1:
+                    precio_ml_1 = tabla.precio_ml[idx]
+                    # El costo fijo depende sólo del precio: ya está en la tabla
+                    costo_fijo = tabla.comision_fija[idx]
                     precio_web_calc = (precio_ml_1 - costo_fijo) * 0.90
                     if precio_web_calc < 0:
                         precio_web_calc = 0.0
@@ -623,12 +1149,10 @@ class MileiCalculatorApp(tk.Tk):
         # Actualizamos el s.t de Precio WEB (por ahora sin valor seteado)
         self._update_precio_web(precio_web_calc, None)
 
-# Ajuste perfecto de columnas según contenido
-        self._autosize_tree_columns(self.tree_sueltos)
-
         self.status_var.set(
             f"Sueltos: costo unitario={costo_unitario:.2f}, "
-            f"ganancia={ganancia_pct:.1f}%, comisión ML={comision_ml:.3f}."
+            f"ganancia={ganancia_pct:.1f}%, comisión ML={comision_ml:.3f} "
+            f"({len(tabla)} filas en {ms:.1f} ms)."
         )
 
     def _on_clear_sueltos(self) -> None:
@@ -638,8 +1162,8 @@ class MileiCalculatorApp(tk.Tk):
         self.ent_ganancia_sueltos.insert(0, "100")
         self.ent_comision_sueltos.delete(0, tk.END)
         self.ent_comision_sueltos.insert(0, "0.16")
-        for item in self.tree_sueltos.get_children():
-            self.tree_sueltos.delete(item)
+        self._jobs.cancelar("sueltos")
+        self._sync_sueltos.limpiar()
         self._sueltos_data.clear()
         self.descuento_var_sueltos.set("None")
         self.status_var.set("Sueltos: limpiado.")
@@ -702,8 +1226,8 @@ class MileiCalculatorApp(tk.Tk):
         except ValueError:
             comision_ml = 0.16
 
-        for item_id in self.tree_sueltos.get_children():
-            if self.tree_sueltos.set(item_id, "sel") == "☑":
+        for item_id in self._sync_sueltos.items():
+            if self._sync_sueltos.get_celda(item_id, "sel") == "☑":
                 self._aplicar_descuento_item(
                     item_id,
                     self._sueltos_data,
@@ -712,7 +1236,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_SUELTOS,
+                    core.TABLA_SUELTOS,
                 )
 
     def _on_desglose_sueltos(self) -> None:
@@ -744,7 +1268,7 @@ class MileiCalculatorApp(tk.Tk):
             precio_venta=precio_venta,
             costo_total=costo_total,
             comision_ml=comision_ml,
-            brackets=core.BRACKETS_SUELTOS,
+            brackets=core.TABLA_SUELTOS,
         )
         self._show_desglose_window(desg, titulo="Desglose – Artículo suelto")
 
@@ -833,6 +1357,9 @@ class MileiCalculatorApp(tk.Tk):
         self.tree_packs.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
 
+        self._sync_packs = _TreeSync(self.tree_packs, self._fuente_medida)
+        self._tree_syncs[self.tree_packs] = self._sync_packs
+
         # Zebra amarillo
         self.tree_packs.tag_configure("odd", background="#fff9c4")
         self.tree_packs.tag_configure("even", background="#fffde7")
@@ -852,6 +1379,14 @@ class MileiCalculatorApp(tk.Tk):
         )
         btn_desglose.pack(side=tk.LEFT)
 
+        btn_matriz = ttk.Button(
+            frame_actions,
+            text="Matriz de descuentos",
+            style="Secondary.TButton",
+            command=self._on_matriz_packs,
+        )
+        btn_matriz.pack(side=tk.LEFT, padx=(8, 0))
+
         # Radio buttons de descuento para packs
         self.descuento_var_packs = tk.StringVar(value="None")
         frm_rad = ttk.Frame(frame_actions)
@@ -885,9 +1420,9 @@ class MileiCalculatorApp(tk.Tk):
             comision_ml = 0.16
 
         if col == "#1":
-            current = self.tree_packs.set(row_id, "sel")
+            current = self._sync_packs.get_celda(row_id, "sel")
             new_val = "☑" if current != "☑" else "☐"
-            self.tree_packs.set(row_id, "sel", new_val)
+            self._sync_packs.set_celda(row_id, "sel", new_val)
 
             if new_val == "☐":
                 original = self.descuento_var_packs.get()
@@ -900,7 +1435,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_PACK10,
+                    core.TABLA_PACK10,
                 )
                 self.descuento_var_packs.set(original)
             else:
@@ -912,7 +1447,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_PACK10,
+                    core.TABLA_PACK10,
                 )
 
         self.tree_packs.selection_set(row_id)
@@ -934,47 +1469,38 @@ class MileiCalculatorApp(tk.Tk):
             messagebox.showerror("Error en datos", f"Revisá los valores ingresados: {e}")
             return
 
-        try:
-            tabla = core.tabla_pack_x10(
-                costo_pack_10=costo_pack10,
-                ganancia_factor=ganancia_factor,
-                comision_ml=comision_ml,
-                unidades_en_pack=unidades_list,
-            )
-        except Exception as e:  # noqa: BLE001
-            messagebox.showerror("Error de cálculo", f"Ocurrió un error al calcular:\n{e}")
-            return
-
-        for item in self.tree_packs.get_children():
-            self.tree_packs.delete(item)
-        self._packs_data.clear()
+        self._jobs.cancelar("articulo")
+        self.status_var.set("Packs: calculando…")
+        self._jobs.enviar(
+            "packs",
+            _calcular_tabla_packs,
+            costo_pack10, ganancia_factor, comision_ml, unidades_list, core.TABLA_PACK10,
+            on_done=lambda tabla: self._mostrar_packs(
+                tabla, costo_pack10, ganancia_pct, comision_ml, self._jobs.duraciones["packs"] * 1000),
+            on_error=self._on_error_calculo,
+            etiqueta="Packs",
+        )
 
-        for idx, fila in enumerate(tabla):
+    def _mostrar_packs(self, tabla: "core.TablaPrecios", costo_pack10: float,
+                       ganancia_pct: float, comision_ml: float, ms: float) -> None:
+        filas: list[tuple] = []
+        tags: list[tuple[str, ...]] = []
+        datos: list[dict] = []
+        for idx in range(len(tabla)):
             tag = "odd" if idx % 2 == 0 else "even"
-            costo_total = fila["costo_total"]
+            unidades = int(tabla.cantidad[idx])
+            costo_total = tabla.costo_total[idx]
             costo_str = (
                 f"{costo_total:,.2f}"
                 .replace(",", "X")
                 .replace(".", ",")
                 .replace("X", ".")
             )
-            precio_base = fila["precio_ml"]
+            precio_base = tabla.precio_ml[idx]
             precio_round = round(precio_base)
             precio_str = f"{precio_round:,}".replace(",", ".")
 
-            try:
-                desg = core.desglose_venta(
-                    precio_venta=precio_base,
-                    costo_total=costo_total,
-                    comision_ml=comision_ml,
-                    brackets=core.BRACKETS_PACK10,
-                )
-                if costo_total > 0:
-                    gan_pct = (desg.ganancia_neta / costo_total) * 100.0
-                else:
-                    gan_pct = 0.0
-            except Exception:
-                gan_pct = 0.0
+            gan_pct = tabla.ganancia_pct(idx)
 
             ganancia_str = (
                 f"{gan_pct:,.1f}"
@@ -983,30 +1509,23 @@ class MileiCalculatorApp(tk.Tk):
                 .replace("X", ".")
             ) + " %"
 
-            item_id = self.tree_packs.insert(
-                "",
-                "end",
-                values=(
-                    "☐",
-                    fila["unidades_en_pack"],
-                    costo_str,
-                    precio_str,
-                    ganancia_str,
-                ),
-                tags=(tag,),
-            )
-            self._packs_data[item_id] = {
-                "unidades_en_pack": fila["unidades_en_pack"],
+            filas.append(("☐", unidades, costo_str, precio_str, ganancia_str))
+            tags.append((tag,))
+            datos.append({
+                "unidades_en_pack": unidades,
                 "costo_total": costo_total,
                 "precio_ml_base": precio_base,
                 "descuento_pct": 0.0,
-            }
+            })
 
-        self._autosize_tree_columns(self.tree_packs)
+        item_ids = self._sync_packs.actualizar(filas, tags)
+        self._packs_data.clear()
+        self._packs_data.update(zip(item_ids, datos))
 
         self.status_var.set(
             f"Packs: costo pack x10={costo_pack10:.2f}, "
-            f"ganancia={ganancia_pct:.1f}%, comisión ML={comision_ml:.3f}."
+            f"ganancia={ganancia_pct:.1f}%, comisión ML={comision_ml:.3f} "
+            f"({len(tabla)} filas en {ms:.1f} ms)."
         )
 
     def _on_clear_packs(self) -> None:
@@ -1016,8 +1535,8 @@ class MileiCalculatorApp(tk.Tk):
         self.ent_ganancia_packs.insert(0, "100")
         self.ent_comision_packs.delete(0, tk.END)
         self.ent_comision_packs.insert(0, "0.16")
-        for item in self.tree_packs.get_children():
-            self.tree_packs.delete(item)
+        self._jobs.cancelar("packs")
+        self._sync_packs.limpiar()
         self._packs_data.clear()
         self.descuento_var_packs.set("None")
         self.status_var.set("Packs: limpiado.")
@@ -1028,8 +1547,8 @@ class MileiCalculatorApp(tk.Tk):
         except ValueError:
             comision_ml = 0.16
 
-        for item_id in self.tree_packs.get_children():
-            if self.tree_packs.set(item_id, "sel") == "☑":
+        for item_id in self._sync_packs.items():
+            if self._sync_packs.get_celda(item_id, "sel") == "☑":
                 self._aplicar_descuento_item(
                     item_id,
                     self._packs_data,
@@ -1038,7 +1557,7 @@ class MileiCalculatorApp(tk.Tk):
                     "precio_ml",
                     "ganancia_pct",
                     comision_ml,
-                    core.BRACKETS_PACK10,
+                    core.TABLA_PACK10,
                 )
 
     def _on_desglose_packs(self) -> None:
@@ -1068,10 +1587,287 @@ class MileiCalculatorApp(tk.Tk):
             precio_venta=precio_venta,
             costo_total=costo_total,
             comision_ml=comision_ml,
-            brackets=core.BRACKETS_PACK10,
+            brackets=core.TABLA_PACK10,
         )
         self._show_desglose_window(desg, titulo="Desglose – Pack")
 
+    # ------------------------ TAB: COTIZACIÓN ------------------------------
+
+    def _build_tab_cotizacion(self, parent: ttk.Frame) -> None:
+        parent.columnconfigure(1, weight=1)
+        parent.rowconfigure(0, weight=1)
+
+        # Izquierda: líneas "código cantidad" + parámetros
+        left = ttk.Frame(parent)
+        left.grid(row=0, column=0, sticky="nsw", padx=10, pady=10)
+
+        ttk.Label(left, text="Código y cantidad por línea:", style="Label.TLabel").pack(side=tk.TOP, anchor="w")
+        self.txt_cotizacion = tk.Text(left, width=24, height=14, font=self._fuentes["mono"])
+        self.txt_cotizacion.pack(side=tk.TOP, fill=tk.Y, expand=True, pady=(2, 6))
+
+        frm_par = ttk.Frame(left)
+        frm_par.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(frm_par, text="Ganancia %:", style="Label.TLabel").grid(row=0, column=0, sticky="w")
+        self.ent_ganancia_cotiz = ttk.Entry(frm_par, width=8)
+        self.ent_ganancia_cotiz.grid(row=0, column=1, sticky="w", padx=(4, 0))
+        self.ent_ganancia_cotiz.insert(0, "100")
+        ttk.Label(frm_par, text="Comisión ML:", style="Label.TLabel").grid(row=1, column=0, sticky="w", pady=(4, 0))
+        self.ent_comision_cotiz = ttk.Entry(frm_par, width=8)
+        self.ent_comision_cotiz.grid(row=1, column=1, sticky="w", padx=(4, 0), pady=(4, 0))
+        self.ent_comision_cotiz.insert(0, "0.16")
+
+        btn_cotizar = ttk.Button(left, text="COTIZAR", style="Accent.TButton", command=self._on_cotizar)
+        btn_cotizar.pack(side=tk.TOP, fill=tk.X, pady=(8, 2))
+        btn_csv = ttk.Button(left, text="Exportar CSV", style="Secondary.TButton", command=self._on_exportar_cotizacion)
+        btn_csv.pack(side=tk.TOP, fill=tk.X, pady=2)
+
+        # Derecha: tabla de líneas + totales
+        right = ttk.Frame(parent)
+        right.grid(row=0, column=1, sticky="nsew", padx=(0, 10), pady=10)
+        right.rowconfigure(0, weight=1)
+        right.columnconfigure(0, weight=1)
+
+        columns = ("codigo", "descripcion", "cantidad", "costo_unitario", "costo_total",
+                   "precio_ml", "ganancia_neta", "ganancia_pct")
+        self.tree_cotizacion = ttk.Treeview(right, columns=columns, show="headings")
+        for col, texto, anchor in (
+            ("codigo", "Código", "w"),
+            ("descripcion", "Descripción", "w"),
+            ("cantidad", "Cant.", "center"),
+            ("costo_unitario", "Costo unit.", "e"),
+            ("costo_total", "Costo total", "e"),
+            ("precio_ml", "Precio ML", "e"),
+            ("ganancia_neta", "Ganancia neta", "e"),
+            ("ganancia_pct", "Ganancia %", "e"),
+        ):
+            self.tree_cotizacion.heading(col, text=texto)
+            self.tree_cotizacion.column(col, anchor=anchor)
+
+        vsb = ttk.Scrollbar(right, orient="vertical", command=self.tree_cotizacion.yview)
+        self.tree_cotizacion.configure(yscrollcommand=vsb.set)
+        self.tree_cotizacion.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+
+        self._sync_cotizacion = _TreeSync(self.tree_cotizacion, self._fuente_medida)
+        self._tree_syncs[self.tree_cotizacion] = self._sync_cotizacion
+        self.tree_cotizacion.tag_configure("odd", background="#e3f2fd")
+        self.tree_cotizacion.tag_configure("even", background="#f5fbff")
+        self.tree_cotizacion.bind("<Double-Button-1>", lambda e: self._on_desglose_cotizacion())
+
+        frm_tot = ttk.Frame(right)
+        frm_tot.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(6, 0))
+        self.cotiz_totales_var = tk.StringVar(value="")
+        ttk.Label(frm_tot, textvariable=self.cotiz_totales_var, style="Label.TLabel").pack(side=tk.LEFT)
+        ttk.Button(frm_tot, text="Ver desglose de línea", style="Secondary.TButton",
+                   command=self._on_desglose_cotizacion).pack(side=tk.RIGHT)
+
+        # Última cotización mostrada (para desglose y CSV)
+        self._cotizacion: dict | None = None
+        self._cotiz_items: dict[str, int] = {}
+
+    def _on_cotizar(self) -> None:
+        try:
+            lineas = _parse_lineas_cotizacion(self.txt_cotizacion.get("1.0", tk.END))
+            ganancia_pct = _parse_float(self.ent_ganancia_cotiz.get(), default=100.0)
+            comision_ml = _parse_float(self.ent_comision_cotiz.get(), default=0.16)
+        except ValueError as e:
+            messagebox.showerror("Error en datos", f"Revisá los valores ingresados: {e}")
+            return
+        if not lineas:
+            messagebox.showwarning("Cotización", "Ingresá al menos un código.")
+            return
+
+        self.status_var.set(f"Cotización: {len(lineas)} líneas, buscando costos…")
+        self._jobs.enviar(
+            "cotizacion",
+            _cotizar_lineas, self._articulos, lineas, ganancia_pct / 100.0, comision_ml, core.TABLA_SUELTOS,
+            on_done=self._mostrar_cotizacion_lineas,
+            on_error=self._on_error_calculo,
+            etiqueta="Cotización",
+            con_progreso=True,
+        )
+
+    def _mostrar_cotizacion_lineas(self, res: dict) -> None:
+        tabla: core.TablaPrecios = res["tabla"]
+        filas: list[tuple] = []
+        tags: list[tuple[str, ...]] = []
+        for idx, (codigo, desc, cant, costo_u) in enumerate(res["lineas"]):
+            filas.append((
+                codigo, desc, cant,
+                _fmt_miles(costo_u),
+                _fmt_miles(tabla.costo_total[idx]),
+                f"{round(tabla.precio_ml[idx]):,}".replace(",", "."),
+                _fmt_miles(tabla.ganancia_neta[idx]),
+                _fmt_miles(tabla.ganancia_pct(idx), 1) + " %",
+            ))
+            tags.append(("odd" if idx % 2 == 0 else "even",))
+        item_ids = self._sync_cotizacion.actualizar(filas, tags)
+        self._cotizacion = res
+        self._cotiz_items = {item: idx for idx, item in enumerate(item_ids)}
+
+        costo = sum(tabla.costo_total)
+        precio = sum(tabla.precio_ml)
+        ganancia = sum(tabla.ganancia_neta)
+        gan_pct = (ganancia / costo * 100.0) if costo > 0 else 0.0
+        texto = (
+            f"Líneas: {len(tabla)}   Costo: {_fmt_miles(costo)}   Precio ML: {_fmt_miles(precio)}   "
+            f"Ganancia: {_fmt_miles(ganancia)} ({_fmt_miles(gan_pct, 1)} %)"
+        )
+        if res["faltantes"]:
+            texto += f"   Sin costo: {', '.join(res['faltantes'][:10])}" + ("…" if len(res["faltantes"]) > 10 else "")
+        self.cotiz_totales_var.set(texto)
+        self.status_var.set(
+            f"Cotización: {len(tabla)} líneas en {self._jobs.duraciones['cotizacion'] * 1000:.1f} ms"
+            + (f", {len(res['faltantes'])} sin costo." if res["faltantes"] else ".")
+        )
+
+    def _on_desglose_cotizacion(self) -> None:
+        sel = self.tree_cotizacion.selection()
+        if not sel or self._cotizacion is None or sel[0] not in self._cotiz_items:
+            messagebox.showinfo("Desglose", "Seleccioná una línea de la cotización primero.")
+            return
+        idx = self._cotiz_items[sel[0]]
+        codigo, _desc, cant, _costo = self._cotizacion["lineas"][idx]
+        self._show_desglose_window(self._cotizacion["tabla"].desglose(idx),
+                                   titulo=f"Desglose – {codigo} x {cant}")
+
+    def _on_exportar_cotizacion(self) -> None:
+        if not self._cotizacion or not self._cotizacion["lineas"]:
+            messagebox.showinfo("Exportar CSV", "No hay una cotización para exportar.")
+            return
+        ruta = filedialog.asksaveasfilename(
+            parent=self, title="Exportar cotización", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Todos", "*.*")],
+        )
+        if not ruta:
+            return
+        tabla: core.TablaPrecios = self._cotizacion["tabla"]
+        try:
+            with open(ruta, "w", newline="", encoding="utf-8-sig") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(("codigo", "descripcion", "cantidad", "costo_unitario", "costo_total",
+                                 "precio_ml", "comision_variable", "comision_fija", "limpio", "ganancia_neta",
+                                 "ganancia_pct"))
+                for idx, (codigo, desc, cant, costo_u) in enumerate(self._cotizacion["lineas"]):
+                    d = tabla.desglose(idx)
+                    writer.writerow((codigo, desc, cant, f"{costo_u:.2f}", f"{d.costo_total:.2f}",
+                                     f"{d.precio_venta:.2f}", f"{d.comision_variable:.2f}",
+                                     f"{d.comision_fija:.2f}", f"{d.limpio:.2f}", f"{d.ganancia_neta:.2f}",
+                                     f"{tabla.ganancia_pct(idx):.2f}"))
+                for codigo in self._cotizacion["faltantes"]:
+                    writer.writerow((codigo, "(sin costo)", "", "", "", "", "", "", "", "", ""))
+        except OSError as e:
+            messagebox.showerror("Exportar CSV", f"No se pudo guardar el archivo:\n{e}")
+            return
+        self.status_var.set(f"Cotización exportada a {ruta}.")
+
+    # ----------------------- MATRIZ DE DESCUENTOS --------------------------
+
+    def _on_matriz_sueltos(self) -> None:
+        try:
+            comision_ml = _parse_float(self.ent_comision_sueltos.get(), default=0.16)
+        except ValueError:
+            comision_ml = 0.16
+        self._mostrar_matriz_descuentos("Matriz de descuentos – Sueltos", self._sync_sueltos,
+                                        self._sueltos_data, "cantidad", comision_ml, core.TABLA_SUELTOS)
+
+    def _on_matriz_packs(self) -> None:
+        try:
+            comision_ml = _parse_float(self.ent_comision_packs.get(), default=0.16)
+        except ValueError:
+            comision_ml = 0.16
+        self._mostrar_matriz_descuentos("Matriz de descuentos – Pack", self._sync_packs,
+                                        self._packs_data, "unidades_en_pack", comision_ml, core.TABLA_PACK10)
+
+    def _mostrar_matriz_descuentos(self, titulo: str, sync: _TreeSync, data_dict: dict[str, dict],
+                                   clave_cantidad: str, comision_ml: float, brackets) -> None:
+        """
+        Todas las filas de la tabla contra todos los descuentos (precio y
+        ganancia %), calculado con una sola llamada a core.matriz_descuentos
+        en un hilo de trabajo. Las filas con algún descuento a pérdida se
+        marcan en rojo.
+        """
+        filas = [data_dict[item] for item in sync.items() if item in data_dict]
+        if not filas:
+            messagebox.showinfo("Matriz de descuentos", "Calculá la tabla primero.")
+            return
+
+        descuentos = tuple(core.DESCUENTOS_PCT)
+        self.status_var.set("Matriz de descuentos: calculando…")
+        self._jobs.enviar(
+            "matriz",
+            _calcular_matriz,
+            [f["precio_ml_base"] for f in filas],
+            [f["costo_total"] for f in filas],
+            comision_ml, brackets, descuentos,
+            on_done=lambda res: self._ventana_matriz(titulo, filas, clave_cantidad, descuentos, res),
+            on_error=self._on_error_calculo,
+            etiqueta="Matriz de descuentos",
+            con_progreso=True,
+        )
+
+    def _ventana_matriz(self, titulo: str, filas: list[dict], clave_cantidad: str,
+                        descuentos: tuple[float, ...], res: tuple) -> None:
+        precios, ganancias = res
+        ms = self._jobs.duraciones["matriz"] * 1000.0
+        self.status_var.set(f"Matriz de descuentos: {len(filas)} filas en {ms:.1f} ms.")
+
+        win = tk.Toplevel(self)
+        win.title(titulo)
+        win.geometry("1100x420")
+
+        frm = ttk.Frame(win)
+        frm.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        frm.rowconfigure(0, weight=1)
+        frm.columnconfigure(0, weight=1)
+
+        columnas = ["cantidad"]
+        for i in range(len(descuentos)):
+            columnas += [f"precio_{i}", f"gan_{i}"]
+        tree = ttk.Treeview(frm, columns=columnas, show="headings")
+        tree.heading("cantidad", text="Cant.")
+        tree.column("cantidad", width=60, anchor="center")
+        for i, pct in enumerate(descuentos):
+            etiqueta = f"{pct:g}%" if pct else "Sin desc."
+            tree.heading(f"precio_{i}", text=f"{etiqueta} precio")
+            tree.heading(f"gan_{i}", text=f"{etiqueta} gan.")
+            tree.column(f"precio_{i}", width=80, anchor="e")
+            tree.column(f"gan_{i}", width=70, anchor="e")
+
+        tree.tag_configure("ok", background="#ffffff")
+        tree.tag_configure("perdida", background="#ffcdd2")
+
+        negativas = 0
+        for j, fila in enumerate(filas):
+            valores: list[str] = [str(fila[clave_cantidad])]
+            perdida = False
+            for i in range(len(descuentos)):
+                gan = ganancias[i][j]
+                if gan < 0:
+                    perdida = True
+                    negativas += 1
+                valores.append(f"{round(precios[i][j]):,}".replace(",", "."))
+                valores.append(("▼ " if gan < 0 else "") + _fmt_miles(gan, 1) + " %")
+            tree.insert("", "end", values=valores, tags=("perdida" if perdida else "ok",))
+
+        vsb = ttk.Scrollbar(frm, orient="vertical", command=tree.yview)
+        hsb = ttk.Scrollbar(frm, orient="horizontal", command=tree.xview)
+        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+
+        pie = ttk.Frame(frm)
+        pie.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+        ttk.Label(
+            pie,
+            text=(f"{len(filas)} filas x {len(descuentos)} descuentos en {ms:.1f} ms — "
+                  f"{negativas} celdas a pérdida (▼)"),
+            style="Label.TLabel",
+        ).pack(side=tk.LEFT)
+        ttk.Button(pie, text="Cerrar", style="Secondary.TButton", command=win.destroy).pack(side=tk.RIGHT)
+        win.transient(self)
+
     # --------------------------- DESGLOSE ----------------------------------
 
     def _show_desglose_window(self, desg: "core.DesgloseVenta", titulo: str) -> None:
@@ -1121,6 +1917,7 @@ class MileiCalculatorApp(tk.Tk):
 
 
 def main() -> None:
+    _configurar_log()
     app = MileiCalculatorApp()
     app.mainloop()
 
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+calculadora_milei_jobs.py — Trabajos en segundo plano para la calculadora (Tk)
+
+Los cálculos se ejecutan en hilos de trabajo y el resultado vuelve al hilo de
+Tk por una cola que se revisa con after() (Tk no es thread-safe: los hilos de
+trabajo nunca tocan widgets).
+
+Cada trabajo tiene una clave ("sueltos", "packs", "sugerencias", ...). Enviar
+un trabajo nuevo con la misma clave deja obsoleto al anterior: si todavía no
+empezó, no se ejecuta; si ya estaba corriendo, su resultado se descarta.
+"""
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Trabajo:
+    """Un cálculo encolado. `fn` recibe el propio Trabajo si `con_progreso`."""
+
+    __slots__ = (
+        "clave", "gen", "fn", "args", "on_done", "on_error", "etiqueta",
+        "con_progreso", "t_envio", "t_inicio", "duracion", "_scheduler",
+    )
+
+    def __init__(self, scheduler: "JobScheduler", clave: str, gen: int, fn: Callable[..., Any],
+                 args: tuple, on_done: Callable[[Any], None],
+                 on_error: Optional[Callable[[Exception], None]],
+                 etiqueta: str, con_progreso: bool) -> None:
+        self._scheduler = scheduler
+        self.clave = clave
+        self.gen = gen
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.etiqueta = etiqueta
+        self.con_progreso = con_progreso
+        self.t_envio = time.perf_counter()
+        self.t_inicio = 0.0
+        self.duracion = 0.0   # segundos de cálculo (ya cargado al llamar on_done)
+
+    @property
+    def cancelado(self) -> bool:
+        """True si llegó otro trabajo con la misma clave (o se canceló)."""
+        return not self._scheduler.vigente(self)
+
+    def progreso(self, fraccion: float, texto: str = "") -> None:
+        """Informa avance (0..1); se muestra en la barra de estado."""
+        self._scheduler._resultados.put(("progreso", self, (fraccion, texto), 0.0))
+
+
+class JobScheduler:
+    """
+    Cola de cálculos con `max_workers` hilos y entrega de resultados en Tk.
+
+    on_estado: callback (en el hilo de Tk) con un texto para la barra de estado
+    (avance y errores). Al llamar on_done ya está cargado duraciones[clave].
+    """
+
+    def __init__(self, widget: Any, on_estado: Optional[Callable[[str], None]] = None,
+                 max_workers: int = 2, poll_ms: int = 15) -> None:
+        self.widget = widget
+        self.on_estado = on_estado
+        self.poll_ms = poll_ms
+        self._pendientes: "queue.Queue[Optional[Trabajo]]" = queue.Queue()
+        self._resultados: "queue.Queue[tuple]" = queue.Queue()
+        self._gen: Dict[str, int] = {}
+        self._contador = itertools.count(1)
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._polling = False
+        self.descartados = 0
+        self.duraciones: Dict[str, float] = {}   # clave -> segundos del último cálculo entregado
+        self._hilos: List[threading.Thread] = []
+        for i in range(max(1, max_workers)):
+            t = threading.Thread(target=self._worker, name=f"calculadora-job-{i}", daemon=True)
+            t.start()
+            self._hilos.append(t)
+
+    # ---------------- API (hilo de Tk) ----------------
+    def enviar(self, clave: str, fn: Callable[..., Any], *args: Any,
+               on_done: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None,
+               etiqueta: Optional[str] = None, con_progreso: bool = False) -> Trabajo:
+        """Encola fn(*args) (o fn(trabajo, *args)); reemplaza al trabajo previo de `clave`."""
+        with self._lock:
+            gen = next(self._contador)
+            self._gen[clave] = gen
+            self._en_curso += 1
+        trabajo = Trabajo(self, clave, gen, fn, args, on_done, on_error,
+                          etiqueta or clave, con_progreso)
+        self._pendientes.put(trabajo)
+        self._asegurar_polling()
+        return trabajo
+
+    def cancelar(self, clave: str) -> None:
+        """Deja obsoleto cualquier trabajo de `clave` (en cola o corriendo)."""
+        with self._lock:
+            if clave in self._gen:
+                self._gen[clave] = next(self._contador)
+
+    def vigente(self, trabajo: Trabajo) -> bool:
+        return self._gen.get(trabajo.clave) == trabajo.gen
+
+    def cerrar(self) -> None:
+        for _ in self._hilos:
+            self._pendientes.put(None)
+
+    # ---------------- hilos de trabajo ----------------
+    def _worker(self) -> None:
+        while True:
+            trabajo = self._pendientes.get()
+            if trabajo is None:
+                return
+            if not self.vigente(trabajo):
+                self._resultados.put(("descartado", trabajo, None, 0.0))
+                continue
+            trabajo.t_inicio = time.perf_counter()
+            try:
+                if trabajo.con_progreso:
+                    res = trabajo.fn(trabajo, *trabajo.args)
+                else:
+                    res = trabajo.fn(*trabajo.args)
+                tipo = "ok"
+            except Exception as exc:  # noqa: BLE001 - se entrega al hilo de Tk
+                res, tipo = exc, "error"
+            self._resultados.put((tipo, trabajo, res, time.perf_counter() - trabajo.t_inicio))
+
+    # ---------------- entrega en Tk ----------------
+    def _asegurar_polling(self) -> None:
+        if not self._polling:
+            self.widget.after(self.poll_ms, self._poll)
+            self._polling = True   # recién si after() no falló
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                try:
+                    tipo, trabajo, res, dur = self._resultados.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._entregar(tipo, trabajo, res, dur)
+                except Exception as exc:  # noqa: BLE001 - un callback roto no corta la entrega
+                    self._estado(f"{trabajo.etiqueta}: error al mostrar el resultado: {exc}")
+        finally:
+            # Siempre se reprograma (o se libera) el polling, aunque algo falle
+            self._polling = False
+            if self._en_curso > 0:
+                self._asegurar_polling()
+
+    def _entregar(self, tipo: str, trabajo: Trabajo, res: Any, dur: float) -> None:
+        if tipo == "progreso":
+            if self.vigente(trabajo):
+                fraccion, texto = res
+                self._estado(f"{trabajo.etiqueta}: {texto or 'calculando'}… {fraccion * 100:.0f} %")
+            return
+        with self._lock:
+            self._en_curso -= 1
+        if tipo == "descartado" or not self.vigente(trabajo):
+            self.descartados += 1
+            return
+        trabajo.duracion = dur
+        self.duraciones[trabajo.clave] = dur
+        if tipo == "ok":
+            trabajo.on_done(res)
+        elif trabajo.on_error is not None:
+            trabajo.on_error(res)
+        else:
+            self._estado(f"{trabajo.etiqueta}: error: {res}")
+
+    def _estado(self, texto: str) -> None:
+        if self.on_estado is not None:
+            try:
+                self.on_estado(texto)
+            except Exception:  # noqa: BLE001 - p. ej. TclError con la ventana cerrándose
+                pass
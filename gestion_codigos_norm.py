@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+gestion_codigos_norm.py — Columnas normalizadas e índice de stock libre en CODIGOS
+
+Las consultas de stock libre filtraban con TRIM(articulo),
+(deposito=1 OR TRIM(deposito)='1') y TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'):
+ningún índice sirve y se recorre toda la tabla codigos (la más grande).
+
+Esta migración agrega columnas "sombra" con los valores ya normalizados:
+
+    articulo_norm  = TRIM(articulo)
+    deposito_norm  = deposito como texto sin espacios (1, 1.0, ' 1' -> '1')
+    libre          = 1 si remito_ven es NULL / '' / '0', si no 0
+
+Triggers AFTER INSERT / AFTER UPDATE OF articulo, deposito, remito_ven las
+mantienen al día (también para lo que escriben otros programas), y un índice
+parcial idx_codigos_libres (articulo_norm, deposito_norm, codigo) WHERE libre=1
+deja las consultas de stock en búsquedas por índice.
+
+El relleno de filas existentes es por lotes de rowid y se puede cortar y
+retomar: el avance queda en codigos_norm_meta. El índice se crea recién al
+terminar, así que "existe idx_codigos_libres" == "migración completa"; hasta
+entonces los callers siguen con las consultas viejas (normalizado_listo()).
+
+Uso:
+    python gestion_codigos_norm.py --db gestion.sqlite3            (migra / retoma)
+    python gestion_codigos_norm.py --db gestion.sqlite3 --estado
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from gestion_db_pool import conexion_escritura
+from gestion_schema_cache import Esquema, esquema
+
+DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
+
+INDICE = "idx_codigos_libres"
+META = "codigos_norm_meta"
+LOTE = 20000
+
+
+def normalizado_listo(esq: Esquema) -> bool:
+    """True si codigos tiene las columnas normalizadas completas (existe el índice)."""
+    return esq.existe_indice(INDICE)
+
+
+def _expresiones(esq: Esquema, prefijo: str = "") -> Dict[str, str]:
+    """SQL de cada columna normalizada a partir de las columnas reales de codigos."""
+    cols = esq.columnas("codigos")
+    art = prefijo + cols.pick(["articulo"])
+    dep = prefijo + cols.pick(["deposito"])
+    rv = prefijo + "remito_ven"
+    return {
+        "articulo_norm": f"TRIM({art})",
+        "deposito_norm": (
+            f"CASE WHEN typeof({dep}) IN ('integer','real') AND {dep} = CAST({dep} AS INTEGER)"
+            f" THEN CAST(CAST({dep} AS INTEGER) AS TEXT) ELSE TRIM({dep}) END"
+        ),
+        "libre": f"CASE WHEN {rv} IS NULL OR TRIM(CAST({rv} AS TEXT)) IN ('', '0') THEN 1 ELSE 0 END",
+    }
+
+
+def _set_sql(expr: Dict[str, str]) -> str:
+    return ", ".join(f"{col} = {e}" for col, e in expr.items())
+
+
+def _meta(con: sqlite3.Connection, clave: str, defecto: Optional[str] = None) -> Optional[str]:
+    row = con.execute(f"SELECT valor FROM {META} WHERE clave=?", (clave,)).fetchone()
+    return row[0] if row else defecto
+
+
+def _meta_set(con: sqlite3.Connection, clave: str, valor: Any) -> None:
+    con.execute(f"INSERT OR REPLACE INTO {META} (clave, valor) VALUES (?, ?)", (clave, str(valor)))
+
+
+def _preparar(con: sqlite3.Connection) -> None:
+    """Columnas, tabla de avance y triggers (idempotente)."""
+    esq = esquema(con)
+    if not esq.existe("codigos"):
+        raise RuntimeError("No existe la tabla 'codigos'.")
+    cols = esq.columnas("codigos")
+    if not cols.tiene("remito_ven"):
+        raise RuntimeError("codigos no tiene la columna remito_ven.")
+    for col, tipo in (("articulo_norm", "TEXT"), ("deposito_norm", "TEXT"), ("libre", "INTEGER")):
+        if not cols.tiene(col):
+            con.execute(f"ALTER TABLE codigos ADD COLUMN {col} {tipo}")
+    con.execute(f"CREATE TABLE IF NOT EXISTS {META} (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    # Triggers ANTES del relleno: lo que cambie mientras tanto ya queda bien
+    esq = esquema(con)
+    col_art = esq.columnas("codigos").pick(["articulo"])
+    col_dep = esq.columnas("codigos").pick(["deposito"])
+    set_new = _set_sql(_expresiones(esq, prefijo="NEW."))
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_codigos_norm_ins AFTER INSERT ON codigos
+        BEGIN
+            UPDATE codigos SET {set_new} WHERE rowid = NEW.rowid;
+        END
+    """)
+    con.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_codigos_norm_upd AFTER UPDATE OF {col_art}, {col_dep}, remito_ven ON codigos
+        BEGIN
+            UPDATE codigos SET {set_new} WHERE rowid = NEW.rowid;
+        END
+    """)
+    if _meta(con, "ultimo_rowid") is None:
+        _meta_set(con, "ultimo_rowid", 0)
+    con.commit()
+
+
+def migrar(con: sqlite3.Connection, lote: int = LOTE, max_lotes: Optional[int] = None,
+           log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Agrega/rellena las columnas normalizadas. Cada lote de `lote` filas (por
+    rowid) se confirma junto con el avance, así que se puede cortar en
+    cualquier momento (o limitar con max_lotes) y volver a llamar.
+    Al completar crea el índice parcial.
+    """
+    if log is None:
+        log = lambda msg: None
+    t0 = time.perf_counter()
+    if normalizado_listo(esquema(con)):
+        return {"estado": "listo", "filas": 0, "segundos": 0.0}
+
+    _preparar(con)
+    set_sql = _set_sql(_expresiones(esquema(con)))
+    desde = int(_meta(con, "ultimo_rowid", "0") or 0)
+    filas = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        hasta = con.execute(
+            "SELECT MAX(rowid) FROM (SELECT rowid FROM codigos WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+            (desde, int(lote)),
+        ).fetchone()[0]
+        if hasta is None:
+            break
+        cur = con.execute(f"UPDATE codigos SET {set_sql} WHERE rowid > ? AND rowid <= ?", (desde, hasta))
+        _meta_set(con, "ultimo_rowid", hasta)
+        con.commit()
+        filas += max(0, cur.rowcount)
+        lotes += 1
+        desde = hasta
+        log(f"codigos normalizados hasta rowid {hasta} ({filas} filas en esta corrida)")
+    else:
+        return {"estado": "parcial", "filas": filas, "ultimo_rowid": desde,
+                "segundos": time.perf_counter() - t0}
+
+    con.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDICE} ON codigos (articulo_norm, deposito_norm, "
+        f"{esquema(con).columnas('codigos').pick(['codigo'])}) WHERE libre = 1"
+    )
+    _meta_set(con, "estado", "listo")
+    con.commit()
+    log(f"Índice {INDICE} creado: consultas de stock libre normalizadas")
+    return {"estado": "listo", "filas": filas, "ultimo_rowid": desde, "segundos": time.perf_counter() - t0}
+
+
+def estado(con: sqlite3.Connection) -> Dict[str, Any]:
+    esq = esquema(con)
+    info: Dict[str, Any] = {"listo": normalizado_listo(esq), "columnas": esq.columnas("codigos").tiene("libre")}
+    if esq.existe(META):
+        info["ultimo_rowid"] = int(_meta(con, "ultimo_rowid", "0") or 0)
+    info["max_rowid"] = con.execute("SELECT MAX(rowid) FROM codigos").fetchone()[0] if esq.existe("codigos") else None
+    return info
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Columnas normalizadas e índice de stock libre en codigos")
+    parser.add_argument("--db", default=DB_PATH, help="Ruta a gestion.sqlite3")
+    parser.add_argument("--lote", type=int, default=LOTE, help="Filas por lote")
+    parser.add_argument("--max-lotes", type=int, default=None, help="Cortar después de N lotes (se retoma luego)")
+    parser.add_argument("--estado", action="store_true", help="Sólo mostrar el avance")
+    args = parser.parse_args(argv)
+
+    con = conexion_escritura(args.db)
+    try:
+        if args.estado:
+            print(estado(con))
+            return 0
+        res = migrar(con, lote=args.lote, max_lotes=args.max_lotes,
+                     log=lambda msg: print(msg, file=sys.stderr, flush=True))
+        print(f"{res['estado']}: {res['filas']} filas en {res['segundos']:.2f}s")
+        return 0
+    except (sqlite3.Error, RuntimeError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+gestion_db_pool.py — Conexiones compartidas a gestion.sqlite3 (1 escritora + pool de lectura)
+
+Antes cada helper hacía sqlite3.connect(DB_PATH) y close(), a veces una vez
+por SKU por pedido. Acá hay, por archivo de base:
+
+- Una conexión ESCRITORA. La usa un préstamo por vez: los otros hilos
+  esperan (como esperarían el lock de SQLite) y, si el mismo hilo la pide
+  de nuevo sin haber devuelto la anterior, sqlite3.OperationalError. No hay
+  préstamos anidados: compartirían la transacción de afuera (su commit() o
+  rollback() actuaría sobre el trabajo del llamador). Con una conexión
+  propia por llamada, esa escritura anidada también habría chocado con el
+  lock del llamador; pasar la conexión como parámetro en su lugar.
+- Un pool chico de conexiones de LECTURA (mode=ro), una por hilo a la vez.
+  Si están todas prestadas se espera hasta busy_timeout y después
+  sqlite3.OperationalError, igual que con la escritora.
+
+Los PRAGMA (WAL, busy_timeout, cache_size, mmap_size) se aplican una sola vez
+al abrir cada conexión. Lo que se entrega es un préstamo que se usa igual que
+una sqlite3.Connection: close() la devuelve al pool (haciendo rollback de lo
+no confirmado, igual que cerrar una conexión) en lugar de cerrarla.
+
+    con = conexion_escritura(DB_PATH)
+    try:
+        ...
+        con.commit()
+    finally:
+        con.close()
+
+estadisticas() cuenta aperturas reales y préstamos, para ver que ya no se
+abren conexiones por cada llamada.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 20000                   # PRAGMA cache_size negativo = KiB
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256                 # cache de sentencias preparadas de sqlite3 por conexión
+LECTORES_MAX = 4
+
+
+class ConexionPrestada:
+    """
+    Préstamo de una conexión del pool. Delega todo en la sqlite3.Connection
+    salvo close(), que la devuelve. Usar `with con:` mantiene la semántica de
+    sqlite3 (commit/rollback), no la devuelve.
+    """
+
+    __slots__ = ("_con", "_pool", "_escritura", "_devuelta")
+
+    def __init__(self, con: sqlite3.Connection, pool: "PoolConexiones", escritura: bool) -> None:
+        self._con = con
+        self._pool = pool
+        self._escritura = escritura
+        self._devuelta = False
+
+    @property
+    def conexion(self) -> sqlite3.Connection:
+        """La sqlite3.Connection real (para APIs que la exigen por tipo)."""
+        return self._con
+
+    def close(self) -> None:
+        if self._devuelta:
+            return
+        self._devuelta = True
+        if self._escritura:
+            self._pool._devolver_escritura(self._con)
+        else:
+            self._pool._devolver_lectura(self._con)
+
+    def __getattr__(self, nombre: str) -> Any:
+        if nombre in ConexionPrestada.__slots__:
+            raise AttributeError(nombre)
+        return getattr(self._con, nombre)
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        if nombre in ConexionPrestada.__slots__:
+            object.__setattr__(self, nombre, valor)
+        else:
+            setattr(self._con, nombre, valor)
+
+    def __enter__(self):
+        self._con.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._con.__exit__(*exc)
+
+    def __del__(self):
+        # Préstamo olvidado sin close(): que no deje la escritora tomada
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def _limpiar(con: sqlite3.Connection) -> None:
+    """Deja la conexión como recién abierta antes de volver al pool."""
+    if con.in_transaction:
+        con.rollback()
+    con.isolation_level = ""
+    con.row_factory = None
+
+
+class PoolConexiones:
+    """Conexiones de un archivo de base (ver docstring del módulo)."""
+
+    def __init__(self, db_path: str, lectores_max: int = LECTORES_MAX,
+                 busy_timeout_ms: int = BUSY_TIMEOUT_MS) -> None:
+        self.db_path = db_path
+        self.lectores_max = max(1, lectores_max)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._cond = threading.Condition()
+        # escritora
+        self._escritora: Optional[sqlite3.Connection] = None
+        self._dueno: Optional[int] = None
+        # lectoras
+        self._libres: List[sqlite3.Connection] = []
+        self._lectoras_abiertas = 0
+        # contadores
+        self.aperturas = 0
+        self.prestamos = 0
+        self.esperas = 0
+
+    # ---------------- apertura ----------------
+    def _pragmas(self, con: sqlite3.Connection, escritura: bool) -> None:
+        con.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        con.execute(f"PRAGMA cache_size=-{int(CACHE_SIZE_KB)}")
+        try:
+            con.execute(f"PRAGMA mmap_size={int(MMAP_SIZE)}")
+        except sqlite3.Error:
+            pass
+        if escritura:
+            try:
+                con.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.Error:
+                pass
+
+    def _abrir(self, escritura: bool) -> sqlite3.Connection:
+        timeout = self.busy_timeout_ms / 1000.0
+        if escritura:
+            con = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False,
+                                  cached_statements=CACHED_STATEMENTS)
+        else:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            con = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False,
+                                  cached_statements=CACHED_STATEMENTS)
+        try:
+            self._pragmas(con, escritura)
+        except Exception:
+            con.close()
+            raise
+        with self._cond:
+            self.aperturas += 1
+        return con
+
+    # ---------------- escritora ----------------
+    def escritura(self) -> ConexionPrestada:
+        yo = threading.get_ident()
+        limite = time.monotonic() + self.busy_timeout_ms / 1000.0
+        with self._cond:
+            if self._dueno == yo:
+                raise sqlite3.OperationalError(
+                    "database is locked (este hilo ya tiene prestada la conexión escritora; "
+                    "pasar esa conexión en lugar de pedir otra)")
+            while self._dueno is not None:
+                self.esperas += 1
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._cond.wait(restante):
+                    if self._dueno is not None:
+                        raise sqlite3.OperationalError("database is locked (conexión escritora ocupada por otro hilo)")
+            if self._escritora is None:
+                self._escritora = self._abrir(escritura=True)
+            self._dueno = yo
+            self.prestamos += 1
+            return ConexionPrestada(self._escritora, self, escritura=True)
+
+    def _devolver_escritura(self, con: sqlite3.Connection) -> None:
+        with self._cond:
+            try:
+                _limpiar(con)
+            except sqlite3.Error:
+                # Conexión en mal estado: se descarta y se abre otra la próxima vez
+                try:
+                    con.close()
+                except Exception:
+                    pass
+                self._escritora = None
+            self._dueno = None
+            self._cond.notify_all()
+
+    # ---------------- lectoras ----------------
+    def lectura(self) -> ConexionPrestada:
+        limite = time.monotonic() + self.busy_timeout_ms / 1000.0
+        with self._cond:
+            while not self._libres and self._lectoras_abiertas >= self.lectores_max:
+                self.esperas += 1
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._cond.wait(restante):
+                    if not self._libres and self._lectoras_abiertas >= self.lectores_max:
+                        raise sqlite3.OperationalError(
+                            f"database is locked (las {self.lectores_max} conexiones de lectura están prestadas)")
+            self.prestamos += 1
+            if self._libres:
+                return ConexionPrestada(self._libres.pop(), self, escritura=False)
+            self._lectoras_abiertas += 1
+        try:
+            con = self._abrir(escritura=False)
+        except Exception:
+            with self._cond:
+                self._lectoras_abiertas -= 1
+                self._cond.notify()
+            raise
+        return ConexionPrestada(con, self, escritura=False)
+
+    def _devolver_lectura(self, con: sqlite3.Connection) -> None:
+        try:
+            _limpiar(con)
+            sano = True
+        except sqlite3.Error:
+            sano = False
+        with self._cond:
+            if sano:
+                self._libres.append(con)
+            else:
+                self._lectoras_abiertas -= 1
+                try:
+                    con.close()
+                except Exception:
+                    pass
+            self._cond.notify()
+
+    # ---------------- varios ----------------
+    def cerrar(self) -> None:
+        """Cierra las conexiones que no están prestadas."""
+        with self._cond:
+            for con in self._libres:
+                try:
+                    con.close()
+                except Exception:
+                    pass
+            self._lectoras_abiertas -= len(self._libres)
+            self._libres.clear()
+            if self._escritora is not None and self._dueno is None:
+                try:
+                    self._escritora.close()
+                except Exception:
+                    pass
+                self._escritora = None
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "db": self.db_path,
+                "aperturas": self.aperturas,
+                "prestamos": self.prestamos,
+                "esperas": self.esperas,
+                "lectoras_abiertas": self._lectoras_abiertas,
+                "lectoras_libres": len(self._libres),
+                "escritora_abierta": self._escritora is not None,
+            }
+
+
+_POOLS: Dict[str, PoolConexiones] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def pool(db_path: str) -> PoolConexiones:
+    """Pool del archivo (uno por ruta absoluta, compartido en el proceso)."""
+    clave = os.path.normcase(os.path.abspath(db_path))
+    with _POOLS_LOCK:
+        p = _POOLS.get(clave)
+        if p is None:
+            p = PoolConexiones(db_path)
+            _POOLS[clave] = p
+        return p
+
+
+def conexion_escritura(db_path: str) -> ConexionPrestada:
+    return pool(db_path).escritura()
+
+
+def conexion_lectura(db_path: str) -> ConexionPrestada:
+    return pool(db_path).lectura()
+
+
+def estadisticas() -> List[Dict[str, Any]]:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return [p.estadisticas() for p in pools]
+
+
+@atexit.register
+def cerrar_todo() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for p in pools:
+        p.cerrar()
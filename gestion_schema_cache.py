@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+gestion_schema_cache.py — Columnas de las tablas de gestion.sqlite3, resueltas una vez por proceso
+
+ventas_ops y ml_facturator_ventas_ops detectan columnas con PRAGMA table_info
+(y _pick sobre nombres candidatos) en cada venta. El esquema casi nunca cambia,
+así que acá se guarda por archivo de base:
+
+- esquema(con) hace UNA consulta (archivo + PRAGMA schema_version). Si la
+  versión es la misma que la última vista, se devuelve lo ya resuelto.
+- Si cambió (ALTER TABLE, CREATE de la tabla TEMP_REMITO_VEN_x de cada venta,
+  etc.) se relee sqlite_master una vez y sólo se descartan las tablas cuyo
+  CREATE cambió; el resto conserva columnas y mapeos de _pick.
+- Las columnas de cada tabla se leen con PRAGMA table_info recién cuando
+  alguien las pide.
+
+Uso típico (una "foto" por operación):
+
+    esq = esquema(con)
+    if not esq.existe("ventas"): ...
+    col_fec = esq.pick("ventas", ["fecha", "fech", "fch", "dia"])
+    if "remito_ven" in esq.columnas("codigos"): ...
+
+Después de un ALTER TABLE dentro de la misma operación, pedir otra foto con
+esquema(con) (o esq.refrescar()).
+
+Sentencias armadas con los nombres resueltos (INSERT/UPDATE con f-strings):
+esq.sentencia(tabla, clave, armar) llama a armar(columnas) una sola vez por
+esquema de la tabla y después devuelve el mismo texto, así el cache de
+sentencias de sqlite3 (por texto SQL, por conexión) las reutiliza.
+estadisticas_sentencias() da aciertos/armados por clave.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+
+class ColumnasTabla(tuple):
+    """
+    Columnas de una tabla en el orden de PRAGMA table_info (es una tupla:
+    `"col" in cols` y la iteración funcionan igual que con la lista de antes).
+    """
+
+    def __new__(cls, columnas: Iterable[str]):
+        obj = super().__new__(cls, columnas)
+        obj._lower = {c.lower(): c for c in obj}
+        obj._picks = {}
+        obj._sentencias = {}
+        return obj
+
+    def real(self, nombre: str) -> Optional[str]:
+        """Nombre real de la columna, sin importar mayúsculas (None si no está)."""
+        return self._lower.get(nombre.lower())
+
+    def tiene(self, nombre: str) -> bool:
+        return nombre.lower() in self._lower
+
+    def pick(self, candidatos: Sequence[str]) -> str:
+        """Mismo criterio que _pick de ml_facturator_ventas_ops, memorizado."""
+        clave = tuple(candidatos)
+        res = self._picks.get(clave)
+        if res is None:
+            res = _pick_columnas(self, self._lower, clave)
+            self._picks[clave] = res
+        return res
+
+
+def _pick_columnas(cols: Sequence[str], low: Dict[str, str], candidatos: Sequence[str]) -> str:
+    for c in candidatos:
+        if c in cols:
+            return c
+        if c.lower() in low:
+            return low[c.lower()]
+    return cols[0] if cols else (candidatos[0] if candidatos else "")
+
+
+_SIN_COLUMNAS = ColumnasTabla(())
+_FALTA = object()
+
+
+class _EsquemaArchivo:
+    """Lo resuelto para un archivo de base en una schema_version dada."""
+
+    __slots__ = ("archivo", "version", "sql", "indices", "tablas")
+
+    def __init__(self, archivo: str, version: int, sql: Dict[str, Optional[str]], indices=frozenset()) -> None:
+        self.archivo = archivo
+        self.version = version
+        self.sql = sql                                # nombre en minúsculas -> CREATE
+        self.indices = indices                        # nombres de índices en minúsculas
+        self.tablas: Dict[str, ColumnasTabla] = {}   # nombre en minúsculas -> columnas
+
+
+class Esquema:
+    """Foto del esquema para una conexión (barata: se pide una por operación)."""
+
+    __slots__ = ("con", "_datos", "_registro")
+
+    def __init__(self, con: sqlite3.Connection, datos: _EsquemaArchivo, registro: "RegistroEsquemas") -> None:
+        self.con = con
+        self._datos = datos
+        self._registro = registro
+
+    @property
+    def version(self) -> int:
+        return self._datos.version
+
+    def existe(self, tabla: str) -> bool:
+        """Tabla (o vista) en el esquema main."""
+        return tabla.lower() in self._datos.sql
+
+    def existe_indice(self, indice: str) -> bool:
+        return indice.lower() in self._datos.indices
+
+    def columnas(self, tabla: str) -> ColumnasTabla:
+        """Columnas de la tabla (vacía si no existe)."""
+        clave = tabla.lower()
+        cols = self._datos.tablas.get(clave)
+        if cols is None:
+            cols = self._registro._leer_columnas(self.con, tabla)
+            if clave in self._datos.sql:
+                self._datos.tablas[clave] = cols
+            # Si no está en sqlite_master (tabla TEMP) no se guarda: se lee cada vez
+        return cols
+
+    def pick(self, tabla: str, candidatos: Sequence[str]) -> str:
+        return self.columnas(tabla).pick(candidatos)
+
+    def sentencia(self, tabla: str, clave: str, armar: Callable[[ColumnasTabla], Any]) -> Any:
+        """
+        SQL (o lo que devuelva `armar`: tupla con el texto y qué columnas usa,
+        None si la tabla no sirve) armado con las columnas de `tabla`. Se arma
+        una vez por esquema de la tabla; si la tabla cambia se vuelve a armar.
+        """
+        cols = self.columnas(tabla)
+        res = cols._sentencias.get(clave, _FALTA)
+        acierto = res is not _FALTA
+        if not acierto:
+            res = armar(cols)
+            if cols:   # tabla inexistente: no se guarda en la tupla vacía compartida
+                cols._sentencias[clave] = res
+        self._registro._contar_sentencia(clave, acierto)
+        return res
+
+    def refrescar(self) -> "Esquema":
+        return self._registro.esquema(self.con)
+
+
+class RegistroEsquemas:
+    """
+    Esquemas por archivo de base, compartidos por todas las conexiones del
+    proceso. Thread-safe. `consultas` cuenta las lecturas de catálogo hechas
+    (PRAGMA table_info + lecturas de sqlite_master) para medir el ahorro.
+    """
+
+    def __init__(self) -> None:
+        self._por_archivo: Dict[str, _EsquemaArchivo] = {}
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.fotos = 0
+        self._sentencias: Dict[str, list] = {}   # clave -> [aciertos, armados]
+
+    def esquema(self, con: sqlite3.Connection) -> Esquema:
+        archivo, version = con.execute(
+            "SELECT (SELECT file FROM pragma_database_list WHERE name='main'),"
+            "       (SELECT schema_version FROM pragma_schema_version)"
+        ).fetchone()
+        archivo = archivo or ""
+        with self._lock:
+            self.fotos += 1
+            datos = self._por_archivo.get(archivo) if archivo else None
+        if datos is not None and datos.version == version:
+            return Esquema(con, datos, self)
+
+        sql: Dict[str, Optional[str]] = {}
+        indices = set()
+        for nombre, tipo, texto in con.execute(
+            "SELECT name, type, sql FROM sqlite_master WHERE type IN ('table','view','index')"
+        ).fetchall():
+            if tipo == "index":
+                indices.add(str(nombre).lower())
+            else:
+                sql[str(nombre).lower()] = texto
+        nuevo = _EsquemaArchivo(archivo, version, sql, frozenset(indices))
+        if datos is not None:
+            # Se conservan las tablas cuyo CREATE no cambió
+            for nombre, cols in list(datos.tablas.items()):
+                if nombre in sql and sql[nombre] == datos.sql.get(nombre):
+                    nuevo.tablas[nombre] = cols
+        with self._lock:
+            self.consultas += 1
+            if archivo:   # las bases en memoria no se comparten entre conexiones
+                self._por_archivo[archivo] = nuevo
+        return Esquema(con, nuevo, self)
+
+    def _leer_columnas(self, con: sqlite3.Connection, tabla: str) -> ColumnasTabla:
+        try:
+            filas = con.execute(f"PRAGMA table_info({tabla})").fetchall()
+        except sqlite3.Error:
+            return _SIN_COLUMNAS
+        with self._lock:
+            self.consultas += 1
+        return ColumnasTabla(r[1] for r in filas)
+
+    def _contar_sentencia(self, clave: str, acierto: bool) -> None:
+        with self._lock:
+            cont = self._sentencias.get(clave)
+            if cont is None:
+                cont = self._sentencias[clave] = [0, 0]
+            cont[0 if acierto else 1] += 1
+
+    def estadisticas_sentencias(self) -> Dict[str, Dict[str, float]]:
+        """Por clave: aciertos, armados y % de aciertos, más un total '*'."""
+        with self._lock:
+            datos = {k: tuple(v) for k, v in self._sentencias.items()}
+        out: Dict[str, Dict[str, float]] = {}
+        tot_a = tot_m = 0
+        for clave, (aciertos, armados) in sorted(datos.items()):
+            tot_a += aciertos
+            tot_m += armados
+            out[clave] = _tasa(aciertos, armados)
+        out["*"] = _tasa(tot_a, tot_m)
+        return out
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._por_archivo.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "archivos": len(self._por_archivo),
+                "fotos": self.fotos,
+                "consultas_catalogo": self.consultas,
+            }
+
+
+def _tasa(aciertos: int, armados: int) -> Dict[str, float]:
+    total = aciertos + armados
+    return {"aciertos": aciertos, "armados": armados, "pct_aciertos": (aciertos * 100.0 / total) if total else 0.0}
+
+
+REGISTRO = RegistroEsquemas()
+
+
+def esquema(con: sqlite3.Connection) -> Esquema:
+    """Foto del esquema de `con` desde el registro del proceso."""
+    return REGISTRO.esquema(con)
+
+
+def columnas(con: sqlite3.Connection, tabla: str) -> Tuple[str, ...]:
+    return REGISTRO.esquema(con).columnas(tabla)
+
+
+def estadisticas_sentencias() -> Dict[str, Dict[str, float]]:
+    return REGISTRO.estadisticas_sentencias()
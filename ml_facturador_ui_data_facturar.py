@@ -60,7 +60,7 @@ PARA EXCEPCIONES A LA REGLA PACK 6404
 from ml_facturador_ui_data_common import (
     Any, Dict, List, Optional, Tuple,
     datetime, timezone, timedelta,
-    json, os, sqlite3, tempfile,
+    json, os, tempfile,
     tk, filedialog, messagebox, ttk,
     AR_TZ, TMP_CONSULT_PATH, FALLBACK_JSON_PATH,
 )
@@ -70,6 +70,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.utils import formatdate
 import ml_facturator_ventas_ops as ventas_ops
+from gestion_codigos_norm import normalizado_listo
+from gestion_db_pool import conexion_lectura, estadisticas as estadisticas_pool
+from gestion_schema_cache import esquema, estadisticas_sentencias
 
 # Literales EXACTOS esperados
 ML_VENDEDORES = ("CANDYHO", "OMYTECH")
@@ -502,6 +505,25 @@ def _has_x_in_first_letters(txt: Any) -> bool:
     return re.match(r'^(?:\d+\s*)?X(?:\s|[-_/]|$)', s) is not None
 
 
+# --------------------- Rendimiento DB (para el resumen de Generar) ---------------------
+
+def _contadores_db() -> Tuple[int, int, int]:
+    """(sentencias reutilizadas, sentencias armadas, conexiones abiertas) acumulados del proceso."""
+    tot = estadisticas_sentencias().get("*", {})
+    aperturas = sum(int(p.get("aperturas") or 0) for p in estadisticas_pool())
+    return int(tot.get("aciertos") or 0), int(tot.get("armados") or 0), aperturas
+
+
+def _linea_rendimiento_db(antes: Tuple[int, int, int]) -> Optional[str]:
+    ahora = _contadores_db()
+    aciertos, armados, aperturas = (a - b for a, b in zip(ahora, antes))
+    total = aciertos + armados
+    if total <= 0:
+        return None
+    return (f"INFO: SQL reutilizado {aciertos * 100.0 / total:.0f}% ({aciertos}/{total} sentencias), "
+            f"conexiones abiertas: {aperturas}")
+
+
 # --------------------- KITS (expansión como Alta de Ventas) ---------------------
 
 def _get_cost_for_sku(owner, sku: str) -> float:
@@ -510,10 +532,12 @@ def _get_cost_for_sku(owner, sku: str) -> float:
     if not db or not os.path.isfile(db):
         return 0.0
     try:
-        con = sqlite3.connect(db)
+        con = conexion_lectura(db)
+    except Exception:
+        return 0.0
+    try:
         cur = con.cursor()
-        cur.execute("PRAGMA table_info(it_comp)")
-        cols = [r[1].lower() for r in cur.fetchall()]
+        cols = [c.lower() for c in esquema(con).columnas("it_comp")]
         col_codigo = 'codigo' if 'codigo' in cols else ('articulo' if 'articulo' in cols else ('sku' if 'sku' in cols else 'codigo'))
         q = (
             "SELECT ic.costo FROM it_comp AS ic "
@@ -524,10 +548,11 @@ def _get_cost_for_sku(owner, sku: str) -> float:
         )
         cur.execute(q, (str(sku).strip(),))
         row = cur.fetchone()
-        con.close()
         return float(row[0] or 0.0) if row and row[0] is not None else 0.0
     except Exception:
         return 0.0
+    finally:
+        con.close()
 
 
 def _get_articulo_descrip(owner, sku: str) -> str:
@@ -537,26 +562,26 @@ def _get_articulo_descrip(owner, sku: str) -> str:
     if not db or not os.path.isfile(db) or not sku_s:
         return sku_s
     try:
-        con = sqlite3.connect(db)
-        cur = con.cursor()
-        for col in ("codigo", "CODIGO", "cod", "COD", "ID"):
+        con = conexion_lectura(db)
+        try:
+            cur = con.cursor()
+            for col in ("codigo", "CODIGO", "cod", "COD", "ID"):
+                try:
+                    cur.execute(f"SELECT descrip FROM articulo WHERE COALESCE(CODIGO,codigo,ID,{col})=? LIMIT 1", (sku_s,))
+                    r = cur.fetchone()
+                    if r and r[0]:
+                        return str(r[0])
+                except Exception:
+                    continue
             try:
-                cur.execute(f"SELECT descrip FROM articulo WHERE COALESCE(CODIGO,codigo,ID,{col})=? LIMIT 1", (sku_s,))
+                cur.execute("SELECT descrip FROM articulo WHERE codigo=? LIMIT 1", (sku_s,))
                 r = cur.fetchone()
                 if r and r[0]:
-                    con.close()
                     return str(r[0])
             except Exception:
-                continue
-        try:
-            cur.execute("SELECT descrip FROM articulo WHERE codigo=? LIMIT 1", (sku_s,))
-            r = cur.fetchone()
-            if r and r[0]:
-                con.close()
-                return str(r[0])
-        except Exception:
-            pass
-        con.close()
+                pass
+        finally:
+            con.close()
     except Exception:
         pass
     return sku_s
@@ -577,9 +602,11 @@ def _get_kit_components_from_db(owner, kit_code: str) -> List[Dict[str, Any]]:
 
     if _kits_get_fn and dbp and os.path.isfile(dbp):
         try:
-            con = sqlite3.connect(dbp)
-            dr = _kits_get_fn(con, kit_code)
-            con.close()
+            con = conexion_lectura(dbp)
+            try:
+                dr = _kits_get_fn(con.conexion, kit_code)
+            finally:
+                con.close()
             if isinstance(dr, dict):
                 data_row = dr
             elif isinstance(dr, (list, tuple)):
@@ -590,20 +617,22 @@ def _get_kit_components_from_db(owner, kit_code: str) -> List[Dict[str, Any]]:
 
     if data_row is None and dbp and os.path.isfile(dbp):
         try:
-            con = sqlite3.connect(dbp)
-            cur = con.cursor()
-            cur.execute("SELECT * FROM kits_armados WHERE COALESCE(CODIGO,codigo,ID)=? LIMIT 1", (kit_code,))
-            row = cur.fetchone()
-            if row is None:
-                cur.execute("SELECT * FROM kits_armados WHERE LOWER(COALESCE(CODIGO,codigo,ID))=LOWER(?) LIMIT 1", (kit_code,))
-                row = cur.fetchone()
-            if row is None:
-                cur.execute("SELECT * FROM kits_armados WHERE COALESCE(CODIGO,codigo,ID) LIKE ? LIMIT 1", (f"%{kit_code}%",))
+            con = conexion_lectura(dbp)
+            try:
+                cur = con.cursor()
+                cur.execute("SELECT * FROM kits_armados WHERE COALESCE(CODIGO,codigo,ID)=? LIMIT 1", (kit_code,))
                 row = cur.fetchone()
-            if row is not None:
-                cols = [c[1] for c in cur.execute("PRAGMA table_info(kits_armados)").fetchall()]
-                data_row = {cols[i]: row[i] for i in range(len(cols))}
-            con.close()
+                if row is None:
+                    cur.execute("SELECT * FROM kits_armados WHERE LOWER(COALESCE(CODIGO,codigo,ID))=LOWER(?) LIMIT 1", (kit_code,))
+                    row = cur.fetchone()
+                if row is None:
+                    cur.execute("SELECT * FROM kits_armados WHERE COALESCE(CODIGO,codigo,ID) LIKE ? LIMIT 1", (f"%{kit_code}%",))
+                    row = cur.fetchone()
+                if row is not None:
+                    cols = [d[0] for d in cur.description]
+                    data_row = {cols[i]: row[i] for i in range(len(cols))}
+            finally:
+                con.close()
         except Exception:
             data_row = None
 
@@ -1662,24 +1691,22 @@ class DataHandlersFacturarMixin:
             if not dbp or not os.path.isfile(dbp):
                 return None
             try:
-                con = sqlite3.connect(dbp)
-                cur = con.cursor()
-                cur.execute("PRAGMA table_info(it_vent)")
-                cols = [r[1] for r in cur.fetchall()]
-                remito_col = next((c for c in ["remito", "mr", "nroremito", "id_remito"] if c in cols), "remito")
-                cant_col = next((c for c in ["cant", "cantidad"] if c in cols), None)
-                if cant_col:
-                    cur.execute(f"SELECT SUM(COALESCE({cant_col},0)) FROM it_vent WHERE {remito_col}=?", (int(remito),))
-                    row = cur.fetchone()
-                    val = int((row[0] or 0)) if row and row[0] is not None else 0
-                else:
-                    cur.execute(f"SELECT COUNT(*) FROM it_vent WHERE {remito_col}=?", (int(remito),))
-                    row = cur.fetchone()
-                    val = int((row[0] or 0)) if row and row[0] is not None else 0
+                con = conexion_lectura(dbp)
                 try:
+                    cur = con.cursor()
+                    cols = esquema(con).columnas("it_vent")
+                    remito_col = next((c for c in ["remito", "mr", "nroremito", "id_remito"] if c in cols), "remito")
+                    cant_col = next((c for c in ["cant", "cantidad"] if c in cols), None)
+                    if cant_col:
+                        cur.execute(f"SELECT SUM(COALESCE({cant_col},0)) FROM it_vent WHERE {remito_col}=?", (int(remito),))
+                        row = cur.fetchone()
+                        val = int((row[0] or 0)) if row and row[0] is not None else 0
+                    else:
+                        cur.execute(f"SELECT COUNT(*) FROM it_vent WHERE {remito_col}=?", (int(remito),))
+                        row = cur.fetchone()
+                        val = int((row[0] or 0)) if row and row[0] is not None else 0
+                finally:
                     con.close()
-                except Exception:
-                    pass
                 return val
             except Exception:
                 return None
@@ -1689,26 +1716,17 @@ class DataHandlersFacturarMixin:
             if not dbp or not os.path.isfile(dbp):
                 return None
             try:
-                con = sqlite3.connect(dbp)
-                cur = con.cursor()
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS movimientos_mp (
-                        Orden         TEXT,
-                        movimiento    TEXT,
-                        fecha         TEXT,
-                        importe       REAL,
-                        remito_venta  INTEGER,
-                        usuario_ml    TEXT
-                    )
-                """)
-                cur.execute("SELECT COUNT(*) FROM movimientos_mp WHERE remito_venta=?", (int(remito),))
-                row = cur.fetchone()
-                cnt = int(row[0] if row and row[0] is not None else 0)
+                con = conexion_lectura(dbp)
                 try:
+                    if not esquema(con).existe("movimientos_mp"):
+                        # La crea el alta de venta; si todavía no existe no hay movimientos
+                        return 0
+                    cur = con.cursor()
+                    cur.execute("SELECT COUNT(*) FROM movimientos_mp WHERE remito_venta=?", (int(remito),))
+                    row = cur.fetchone()
+                    return int(row[0] if row and row[0] is not None else 0)
+                finally:
                     con.close()
-                except Exception:
-                    pass
-                return cnt
             except Exception:
                 return None
 
@@ -1738,49 +1756,47 @@ class DataHandlersFacturarMixin:
                 return details
 
             try:
-                con = sqlite3.connect(dbp)
-                cur = con.cursor()
-                cur.execute("PRAGMA table_info(it_vent)")
-                cols_i2 = [r[1] for r in cur.fetchall()]
-                rem_i = next((c for c in ["remito", "mr", "nroremito", "id_remito"] if c in cols_i2), "remito")
-                costo_col = next((c for c in ["costo", "cost", "precio_costo", "pcosto"] if c in cols_i2), None)
-                art_col = next((c for c in ["articulo", "sku", "codigo", "art", "item"] if c in cols_i2), "articulo")
-                # Chequeo por SKU para evitar falsos OK (ej: faltante 6711 MERCADO ENVIOS)
-                if require_envio_6711 and not compra_nc_envio_6711:
-                    details.append("ERROR: Se esperaba compra silenciosa de SKU 6711 (MERCADO ENVIOS) pero no se registró NC (compra).")
-                if required_sku_qty:
-                    try:
-                        cur.execute(f"SELECT {art_col}, SUM(cantidad) FROM it_vent WHERE {rem_i}=? GROUP BY {art_col}", (int(remito),))
-                        got = { _norm_sku(r[0]): int(r[1] or 0) for r in (cur.fetchall() or []) }
-                        for sku_exp, qty_exp in (required_sku_qty or {}).items():
-                            sku_n = _norm_sku(sku_exp)
-                            if not sku_n:
-                                continue
-                            qty_got = int(got.get(sku_n, 0) or 0)
-                            if int(qty_got) != int(qty_exp):
-                                details.append(f"ERROR: it_vent MR {remito} — SKU {sku_n} cantidad {qty_got} (esperado {qty_exp})")
-                    except Exception as ex_sku:
-                        details.append(f"AVISO: chequeo por SKU MR {remito} falló: {ex_sku}")
-                if costo_col:
-                    cur.execute(f"SELECT COUNT(*) FROM it_vent WHERE {rem_i}=? AND ({costo_col} IS NULL OR {costo_col}=0)", (int(remito),))
-                    zero_cost = int((cur.fetchone() or [0])[0] or 0)
-                    details.append(("ERROR" if zero_cost > 0 else "OK") +
-                                   (f": it_vent con costo=0 para MR {remito}: {zero_cost} registro(s)." if zero_cost > 0
-                                    else f": it_vent sin costo=0 para MR {remito}."))
-                else:
-                    details.append("AVISO: it_vent sin columna de costo detectable; se omite chequeo costo=0.")
-                cur.execute("PRAGMA table_info(codigos)")
-                cols_c = [r[1] for r in cur.fetchall()]
-                if "remito_ven" in cols_c:
-                    cur.execute("SELECT COUNT(*) FROM codigos WHERE remito_ven=?", (int(remito),))
-                    reserved = int((cur.fetchone() or [0])[0] or 0)
-                    details.append(f"INFO: reservas en codigos MR {remito}: {reserved}")
-                else:
-                    details.append("AVISO: codigos sin columna remito_ven; se omite chequeo de reservas.")
+                con = conexion_lectura(dbp)
                 try:
+                    cur = con.cursor()
+                    esq = esquema(con)
+                    cols_i2 = esq.columnas("it_vent")
+                    rem_i = next((c for c in ["remito", "mr", "nroremito", "id_remito"] if c in cols_i2), "remito")
+                    costo_col = next((c for c in ["costo", "cost", "precio_costo", "pcosto"] if c in cols_i2), None)
+                    art_col = next((c for c in ["articulo", "sku", "codigo", "art", "item"] if c in cols_i2), "articulo")
+                    # Chequeo por SKU para evitar falsos OK (ej: faltante 6711 MERCADO ENVIOS)
+                    if require_envio_6711 and not compra_nc_envio_6711:
+                        details.append("ERROR: Se esperaba compra silenciosa de SKU 6711 (MERCADO ENVIOS) pero no se registró NC (compra).")
+                    if required_sku_qty:
+                        try:
+                            cur.execute(f"SELECT {art_col}, SUM(cantidad) FROM it_vent WHERE {rem_i}=? GROUP BY {art_col}", (int(remito),))
+                            got = { _norm_sku(r[0]): int(r[1] or 0) for r in (cur.fetchall() or []) }
+                            for sku_exp, qty_exp in (required_sku_qty or {}).items():
+                                sku_n = _norm_sku(sku_exp)
+                                if not sku_n:
+                                    continue
+                                qty_got = int(got.get(sku_n, 0) or 0)
+                                if int(qty_got) != int(qty_exp):
+                                    details.append(f"ERROR: it_vent MR {remito} — SKU {sku_n} cantidad {qty_got} (esperado {qty_exp})")
+                        except Exception as ex_sku:
+                            details.append(f"AVISO: chequeo por SKU MR {remito} falló: {ex_sku}")
+                    if costo_col:
+                        cur.execute(f"SELECT COUNT(*) FROM it_vent WHERE {rem_i}=? AND ({costo_col} IS NULL OR {costo_col}=0)", (int(remito),))
+                        zero_cost = int((cur.fetchone() or [0])[0] or 0)
+                        details.append(("ERROR" if zero_cost > 0 else "OK") +
+                                       (f": it_vent con costo=0 para MR {remito}: {zero_cost} registro(s)." if zero_cost > 0
+                                        else f": it_vent sin costo=0 para MR {remito}."))
+                    else:
+                        details.append("AVISO: it_vent sin columna de costo detectable; se omite chequeo costo=0.")
+                    cols_c = esq.columnas("codigos")
+                    if "remito_ven" in cols_c:
+                        cur.execute("SELECT COUNT(*) FROM codigos WHERE remito_ven=?", (int(remito),))
+                        reserved = int((cur.fetchone() or [0])[0] or 0)
+                        details.append(f"INFO: reservas en codigos MR {remito}: {reserved}")
+                    else:
+                        details.append("AVISO: codigos sin columna remito_ven; se omite chequeo de reservas.")
+                finally:
                     con.close()
-                except Exception:
-                    pass
             except Exception as ex:
                 details.append(f"AVISO: comprobaciones DB MR {remito} fallaron: {ex}")
             return details
@@ -1792,21 +1808,25 @@ class DataHandlersFacturarMixin:
                 details.append("AVISO: No se pudo abrir DB para comprobaciones (ruta no válida).")
                 return details
             try:
-                con = sqlite3.connect(dbp)
-                cur = con.cursor()
-                for sku, qty in sku_qty_map.items():
-                    try:
-                        cur.execute("""SELECT COUNT(*) FROM codigos
-                                       WHERE articulo=? AND (deposito=1 OR TRIM(deposito)='1')
-                                         AND (remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))""", (sku,))
-                        libres = int((cur.fetchone() or [0])[0] or 0)
-                        details.append(f"SKU {sku}: libres previos={libres}, pedido={qty}")
-                    except Exception as exq:
-                        details.append(f"AVISO: No se pudo consultar libres para SKU {sku}: {exq}")
+                con = conexion_lectura(dbp)
                 try:
+                    cur = con.cursor()
+                    if normalizado_listo(esquema(con)):
+                        sql_libres = """SELECT COUNT(*) FROM codigos
+                                        WHERE articulo_norm=? AND deposito_norm='1' AND libre=1"""
+                    else:
+                        sql_libres = """SELECT COUNT(*) FROM codigos
+                                        WHERE articulo=? AND (deposito=1 OR TRIM(deposito)='1')
+                                          AND (remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))"""
+                    for sku, qty in sku_qty_map.items():
+                        try:
+                            cur.execute(sql_libres, (sku,))
+                            libres = int((cur.fetchone() or [0])[0] or 0)
+                            details.append(f"SKU {sku}: libres previos={libres}, pedido={qty}")
+                        except Exception as exq:
+                            details.append(f"AVISO: No se pudo consultar libres para SKU {sku}: {exq}")
+                finally:
                     con.close()
-                except Exception:
-                    pass
             except Exception as ex:
                 details.append(f"AVISO: comprobaciones previas fallaron: {ex}")
             return details
@@ -1859,6 +1879,7 @@ class DataHandlersFacturarMixin:
                 resultados: List[str] = []
                 detalles_post: List[str] = []
                 detalle_por_mr: Dict[int, List[str]] = {}
+                contadores_db_0 = _contadores_db()
                 errores_en_proceso = False
                 sent_exc_emails = set()  # evita duplicados (por MR/ORD)
 
@@ -2507,6 +2528,10 @@ class DataHandlersFacturarMixin:
                         detalle_tmp.append(f"  Pagos Esperados: {pagos_esperados}")
                         detalles_post.extend(_check_failure(expected_items_count, sku_qty_map, str(res_ven.get('error'))))
 
+                linea_db = _linea_rendimiento_db(contadores_db_0)
+                if linea_db:
+                    detalles_post.append(linea_db)
+
                 hay_error = (
                     errores_en_proceso
                     or any(line.startswith("ERROR") or "ERROR:" in line for line in detalles_post)
@@ -2670,25 +2695,38 @@ class DataHandlersFacturarMixin:
                 out[_norm_sku("6696")] = 1
             return out
         try:
-            con = sqlite3.connect(db)
-            cur = con.cursor()
-            for s in list(out.keys()):
-                try:
+            con = conexion_lectura(db)
+            try:
+                cur = con.cursor()
+                if normalizado_listo(esquema(con)):
+                    # Un solo conteo por índice (idx_codigos_libres) para todos los SKU
+                    claves = list(out.keys())
+                    marcas = ",".join("?" for _ in claves)
                     cur.execute(
-                        "SELECT COUNT(*) FROM codigos "
-                        "WHERE TRIM(articulo)=? "
-                        "AND (deposito=1 OR TRIM(deposito)='1') "
-                        "AND (remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))",
-                        (s.strip(),)
+                        f"SELECT articulo_norm, COUNT(*) FROM codigos "
+                        f"WHERE articulo_norm IN ({marcas}) AND deposito_norm='1' AND libre=1 "
+                        f"GROUP BY articulo_norm",
+                        [c.strip() for c in claves]
                     )
-                    row = cur.fetchone()
-                    out[s] = int(row[0] if row and row[0] is not None else 0)
-                except Exception:
-                    out[s] = 0
-            try:
+                    por_art = {str(a): int(n or 0) for a, n in cur.fetchall()}
+                    for s in claves:
+                        out[s] = por_art.get(s.strip(), 0)
+                else:
+                    for s in list(out.keys()):
+                        try:
+                            cur.execute(
+                                "SELECT COUNT(*) FROM codigos "
+                                "WHERE TRIM(articulo)=? "
+                                "AND (deposito=1 OR TRIM(deposito)='1') "
+                                "AND (remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))",
+                                (s.strip(),)
+                            )
+                            row = cur.fetchone()
+                            out[s] = int(row[0] if row and row[0] is not None else 0)
+                        except Exception:
+                            out[s] = 0
+            finally:
                 con.close()
-            except Exception:
-                pass
             if _norm_sku("0888") in out:
                 out[_norm_sku("0888")] = max(1, int(out.get(_norm_sku("0888")) or 0))
             if _norm_sku("6696") in out:
@@ -22,6 +22,17 @@ Se mantiene:
 - Contadores paramet separados ventas/compras.
 - Reservas de códigos, deposito='' al asignar remito_ven.
 - movimientos_mp (PACK, TIPO) y envios_flex.
+
+Columnas y tablas se consultan en el registro de esquema del proceso
+(gestion_schema_cache): cada alta toma una foto con esquema(con) y no repite
+PRAGMA table_info por venta. La conexión es la escritora compartida de
+gestion_db_pool (close() la devuelve al pool). Los INSERT/UPDATE que dependen
+de nombres de columnas se arman con las funciones _sql_* una vez por esquema
+(esq.sentencia) y se reutilizan en cada fila y cada venta.
+
+Stock libre en codigos: si ya se corrió gestion_codigos_norm (existe
+idx_codigos_libres), las reservas filtran por articulo_norm / deposito_norm /
+libre=1 y usan el índice parcial; si no, siguen con TRIM/CAST como antes.
 """
 import os
 import sqlite3
@@ -30,6 +41,10 @@ from typing import Dict, List, Any, Optional, Iterable, Mapping, Tuple
 
 DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
 
+from gestion_codigos_norm import normalizado_listo
+from gestion_db_pool import conexion_escritura
+from gestion_schema_cache import Esquema, esquema
+
 from ml_facturador_remito_temporal_codigos_ops import (
     tomar_codigos_para_remito,
     liberar_codigos_de_remito,
@@ -46,11 +61,13 @@ def _tomar_codigos_para_remito_compat(con: sqlite3.Connection,
                                      articulo: str,
                                      cantidad: int,
                                      remito: int,
-                                     deposito: int = 1) -> List[str]:
+                                     deposito: int = 1,
+                                     esq: Optional[Esquema] = None) -> List[str]:
     """
     Reserva 'cantidad' códigos de CODIGOS para un artículo, tratando remito_ven NULL / '' / '0' como LIBRE.
     Es un blindeo para casos donde remito_ven quedó en 0.
     Devuelve la lista de códigos reservados (len puede ser < cantidad si no alcanza stock).
+    esq: foto de esquema de la operación (si no se pasa, se toma una).
     """
     try:
         cantidad = int(cantidad or 0)
@@ -64,27 +81,21 @@ def _tomar_codigos_para_remito_compat(con: sqlite3.Connection,
     dep_s = str(dep_i)
 
     cur = con.cursor()
-    cols = _table_cols(cur, "codigos")
-    if not cols:
+    esq = esq or esquema(con)
+    if not esq.columnas("codigos"):
         return []
-
-    col_codigo = _pick(cols, ["codigo"])
-    col_art    = _pick(cols, ["articulo"])
-    col_dep    = _pick(cols, ["deposito"])
-    col_remven = "remito_ven" if "remito_ven" in cols else None
-    if not col_remven:
+    if normalizado_listo(esq):
+        sql = esq.sentencia("codigos", "codigos.tomar_libres_norm", _sql_codigos_tomar_libres_norm)
+        params = (art, dep_s, cantidad)
+    else:
+        sql = esq.sentencia("codigos", "codigos.tomar_libres", _sql_codigos_tomar_libres)
+        params = (art, dep_i, dep_s, cantidad)
+    if sql is None:
         return []
+    sql_libres, sql_reservar = sql
 
     # Seleccionar códigos libres (remito_ven NULL/''/'0') en el depósito indicado
-    cur.execute(f"""
-        SELECT {col_codigo}
-          FROM codigos
-         WHERE TRIM({col_art})=?
-           AND ({col_dep}=? OR TRIM({col_dep})=?)
-           AND ({col_remven} IS NULL OR TRIM(CAST({col_remven} AS TEXT)) IN ('', '0'))
-         ORDER BY {col_codigo}
-         LIMIT ?
-    """, (art, dep_i, dep_s, cantidad))
+    cur.execute(sql_libres, params)
     rows = cur.fetchall() or []
     cods = [str(r[0]) for r in rows if r and r[0] is not None]
 
@@ -92,36 +103,105 @@ def _tomar_codigos_para_remito_compat(con: sqlite3.Connection,
         return []
 
     # Reservar: remito_ven = remito, deposito = '' (igual que el flujo actual)
-    cur.executemany(
-        f"UPDATE codigos SET {col_remven}=?, {col_dep}='' WHERE {col_codigo}=?",
-        [(int(remito), c) for c in cods]
-    )
+    cur.executemany(sql_reservar, [(int(remito), c) for c in cods])
     return cods
 
 
+# ---------------- reserva en bloque: todos los SKU del remito de una vez ----------------
+def _tomar_codigos_bulk(con: sqlite3.Connection,
+                        pedido: Mapping[str, int],
+                        remito: int,
+                        deposito: int = 1,
+                        esq: Optional[Esquema] = None) -> Tuple[Dict[str, List[str]], Dict[str, Tuple[int, int]]]:
+    """
+    Reserva códigos libres (mismo criterio que _tomar_codigos_para_remito_compat)
+    para todos los SKU de {sku: cantidad} de una sola vez:
+
+    - Un SELECT con ROW_NUMBER() por artículo elige los primeros N códigos
+      libres de cada SKU (ORDER BY codigo, igual que antes).
+    - Si a algún SKU no le alcanza, NO se reserva nada y se devuelven todos los
+      faltantes juntos: {sku: (pedido, disponibles)}.
+    - Si alcanza, un único UPDATE sobre una tabla temporal con los códigos
+      elegidos pone remito_ven = remito y deposito = ''.
+
+    Devuelve (reservados {sku: [codigos]}, faltantes). No hace commit.
+    """
+    cant_por_sku: Dict[str, int] = {}
+    for sku, cant in pedido.items():
+        try:
+            cant_i = int(cant or 0)
+        except Exception:
+            cant_i = 0
+        art = _norm_sku(sku)
+        if cant_i > 0 and art:
+            cant_por_sku[art] = cant_por_sku.get(art, 0) + cant_i
+    if not cant_por_sku:
+        return {}, {}
+
+    esq = esq or esquema(con)
+    dep_i = int(deposito or 1)
+    if not esq.columnas("codigos"):
+        sql = None
+    elif normalizado_listo(esq):
+        sql = esq.sentencia("codigos", "codigos.tomar_bulk_norm", _sql_codigos_tomar_bulk_norm)
+        params = (str(dep_i),)
+    else:
+        sql = esq.sentencia("codigos", "codigos.tomar_bulk", _sql_codigos_tomar_bulk)
+        params = (dep_i, str(dep_i))
+    if sql is None:
+        # Sin tabla / sin remito_ven: no hay stock reservable
+        return {}, {sku: (cant, 0) for sku, cant in cant_por_sku.items()}
+    sql_elegir, sql_reservar = sql
+
+    cur = con.cursor()
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS _pedido_codigos (art TEXT PRIMARY KEY, cant INTEGER)")
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS _codigos_elegidos (cod PRIMARY KEY)")
+    try:
+        cur.executemany("INSERT INTO _pedido_codigos (art, cant) VALUES (?,?)", list(cant_por_sku.items()))
+        cur.execute(sql_elegir, params)
+        elegidos = cur.fetchall() or []
+
+        reservados: Dict[str, List[str]] = {sku: [] for sku in cant_por_sku}
+        for art, cod in elegidos:
+            if cod is not None:
+                reservados[art].append(cod)
+        faltantes = {
+            sku: (cant, len(reservados[sku]))
+            for sku, cant in cant_por_sku.items() if len(reservados[sku]) < cant
+        }
+        if faltantes:
+            return {}, faltantes
+
+        cur.executemany("INSERT OR IGNORE INTO _codigos_elegidos (cod) VALUES (?)",
+                        [(cod,) for cods in reservados.values() for cod in cods])
+        cur.execute(sql_reservar, (int(remito),))
+        total = sum(len(cods) for cods in reservados.values())
+        if cur.rowcount < total:
+            # Otro proceso tomó alguno entre el SELECT y el UPDATE: el caller libera el remito
+            raise RuntimeError(f"Códigos tomados por otra operación durante la reserva (MR {remito}).")
+        return {sku: [str(c) for c in cods] for sku, cods in reservados.items()}, {}
+    finally:
+        cur.execute("DELETE FROM _pedido_codigos")
+        cur.execute("DELETE FROM _codigos_elegidos")
+
+
 # ---------------- utilidades generales ----------------
 def _ensure_db() -> sqlite3.Connection:
+    # WAL y demás PRAGMA los aplica el pool al abrir la conexión
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
-    try:
-        con.execute("PRAGMA journal_mode=WAL")
-    except Exception:
-        pass
-    return con
+    return conexion_escritura(DB_PATH)
 
 
 def _has_table(cur: sqlite3.Cursor, name: str) -> bool:
     try:
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (name,))
-        return cur.fetchone() is not None
+        return esquema(cur.connection).existe(name)
     except Exception:
         return False
 
 
 def _table_cols(cur: sqlite3.Cursor, name: str) -> List[str]:
     try:
-        cur.execute(f"PRAGMA table_info({name})")
-        return [r[1] for r in cur.fetchall()]
+        return list(esquema(cur.connection).columnas(name))
     except Exception:
         return []
 
@@ -136,6 +216,236 @@ def _pick(cols: List[str], candidates: List[str]) -> str:
     return cols[0] if cols else (candidates[0] if candidates else "")
 
 
+# ---------------- SQL armado por esquema (se cachea con esq.sentencia) ----------------
+def _sql_codigos_tomar_libres(cols) -> Optional[Tuple[str, str]]:
+    if "remito_ven" not in cols:
+        return None
+    col_codigo = cols.pick(["codigo"])
+    col_art = cols.pick(["articulo"])
+    col_dep = cols.pick(["deposito"])
+    libres = f"""
+        SELECT {col_codigo}
+          FROM codigos
+         WHERE TRIM({col_art})=?
+           AND ({col_dep}=? OR TRIM({col_dep})=?)
+           AND (remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))
+         ORDER BY {col_codigo}
+         LIMIT ?
+    """
+    reservar = f"UPDATE codigos SET remito_ven=?, {col_dep}='' WHERE {col_codigo}=?"
+    return libres, reservar
+
+
+def _sql_codigos_tomar_libres_norm(cols) -> Optional[Tuple[str, str]]:
+    """Igual que _sql_codigos_tomar_libres sobre las columnas normalizadas (índice idx_codigos_libres)."""
+    if "remito_ven" not in cols:
+        return None
+    col_codigo = cols.pick(["codigo"])
+    col_dep = cols.pick(["deposito"])
+    libres = f"""
+        SELECT {col_codigo}
+          FROM codigos
+         WHERE articulo_norm=?
+           AND deposito_norm=?
+           AND libre=1
+         ORDER BY {col_codigo}
+         LIMIT ?
+    """
+    reservar = f"UPDATE codigos SET remito_ven=?, {col_dep}='' WHERE {col_codigo}=?"
+    return libres, reservar
+
+
+def _sql_codigos_tomar_bulk(cols) -> Optional[Tuple[str, str]]:
+    """(elegir por ROW_NUMBER, reservar desde temp._codigos_elegidos) para _tomar_codigos_bulk."""
+    if "remito_ven" not in cols:
+        return None
+    col_codigo = cols.pick(["codigo"])
+    col_art = cols.pick(["articulo"])
+    col_dep = cols.pick(["deposito"])
+    libre = "(remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))"
+    elegir = f"""
+        SELECT x.art, x.cod
+          FROM (SELECT TRIM(c.{col_art}) AS art, c.{col_codigo} AS cod,
+                       ROW_NUMBER() OVER (PARTITION BY TRIM(c.{col_art}) ORDER BY c.{col_codigo}) AS rn
+                  FROM codigos AS c
+                 WHERE TRIM(c.{col_art}) IN (SELECT art FROM temp._pedido_codigos)
+                   AND (c.{col_dep}=? OR TRIM(c.{col_dep})=?)
+                   AND {libre}) AS x
+          JOIN temp._pedido_codigos AS p ON p.art = x.art
+         WHERE x.rn <= p.cant
+         ORDER BY x.art, x.rn
+    """
+    reservar = f"""
+        UPDATE codigos
+           SET remito_ven=?, {col_dep}=''
+         WHERE {col_codigo} IN (SELECT cod FROM temp._codigos_elegidos)
+           AND {libre}
+    """
+    return elegir, reservar
+
+
+def _sql_codigos_tomar_bulk_norm(cols) -> Optional[Tuple[str, str]]:
+    """_sql_codigos_tomar_bulk sobre articulo_norm / deposito_norm / libre."""
+    if "remito_ven" not in cols:
+        return None
+    col_codigo = cols.pick(["codigo"])
+    col_dep = cols.pick(["deposito"])
+    elegir = f"""
+        SELECT x.art, x.cod
+          FROM (SELECT c.articulo_norm AS art, c.{col_codigo} AS cod,
+                       ROW_NUMBER() OVER (PARTITION BY c.articulo_norm ORDER BY c.{col_codigo}) AS rn
+                  FROM codigos AS c
+                 WHERE c.articulo_norm IN (SELECT art FROM temp._pedido_codigos)
+                   AND c.deposito_norm=?
+                   AND c.libre=1) AS x
+          JOIN temp._pedido_codigos AS p ON p.art = x.art
+         WHERE x.rn <= p.cant
+         ORDER BY x.art, x.rn
+    """
+    reservar = f"""
+        UPDATE codigos
+           SET remito_ven=?, {col_dep}=''
+         WHERE {col_codigo} IN (SELECT cod FROM temp._codigos_elegidos)
+           AND libre=1
+    """
+    return elegir, reservar
+
+
+def _sql_codigos_reserva_6696(cols) -> Optional[Tuple[str, str]]:
+    """(por código exacto, por remito de compra) para reservar el 6696."""
+    if "remito_ven" not in cols:
+        return None
+    col_remito = cols.pick(["remito"])
+    col_art = cols.pick(["articulo", "codigo", "sku", "cod_art"])
+    col_codigo = cols.pick(["codigo"])
+    col_dep = cols.pick(["deposito"])
+    libre = "(remito_ven IS NULL OR TRIM(CAST(remito_ven AS TEXT)) IN ('', '0'))"
+    por_codigo = f"""
+                UPDATE codigos
+                   SET remito_ven=?, {col_dep}=''
+                 WHERE {col_codigo}=?
+                   AND TRIM({col_art})=?
+                   AND {libre}
+            """
+    por_remito = f"""
+                UPDATE codigos
+                   SET remito_ven=?, {col_dep}=''
+                 WHERE {col_remito}=?
+                   AND TRIM({col_art})=?
+                   AND {libre}
+            """
+    return por_codigo, por_remito
+
+
+def _sql_codigos_reserva_6696_norm(cols) -> Optional[Tuple[str, str]]:
+    """_sql_codigos_reserva_6696 sobre articulo_norm / libre."""
+    if "remito_ven" not in cols:
+        return None
+    col_remito = cols.pick(["remito"])
+    col_codigo = cols.pick(["codigo"])
+    col_dep = cols.pick(["deposito"])
+    por_codigo = f"""
+                UPDATE codigos
+                   SET remito_ven=?, {col_dep}=''
+                 WHERE {col_codigo}=?
+                   AND articulo_norm=?
+                   AND libre=1
+            """
+    por_remito = f"""
+                UPDATE codigos
+                   SET remito_ven=?, {col_dep}=''
+                 WHERE {col_remito}=?
+                   AND articulo_norm=?
+                   AND libre=1
+            """
+    return por_codigo, por_remito
+
+
+def _sql_codigos_vaciar_deposito(cols) -> Optional[str]:
+    if "remito_ven" not in cols or "deposito" not in cols:
+        return None
+    return f"UPDATE codigos SET {cols.pick(['deposito'])}='' WHERE remito_ven=?"
+
+
+_CAMPOS_CODIGO_COMPRA = ("remito", "articulo", "codigo", "deposito", "mdate", "mhora", "musu", "control", "leido")
+
+
+def _sql_codigos_insert_compra(cols) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """INSERT en codigos con las columnas que existan; devuelve (sql, campos en orden)."""
+    campos: List[str] = []
+    nombres: List[str] = []
+    for campo in _CAMPOS_CODIGO_COMPRA:
+        cname = cols.pick([campo])
+        if cname and cname in cols:
+            campos.append(campo)
+            nombres.append(cname)
+    if "remito_ven" in cols:
+        campos.append("remito_ven")
+        nombres.append("remito_ven")
+    if not nombres:
+        return None
+    cols_sql = ",".join(f'"{c}"' for c in nombres)
+    qs_sql = ",".join(["?"] * len(nombres))
+    return f"INSERT INTO codigos ({cols_sql}) VALUES ({qs_sql})", tuple(campos)
+
+
+def _sql_compras_insert(cols) -> str:
+    col_num = cols.pick(["compra", "nro", "numero", "id", "mr", "remito"])
+    col_pro = cols.pick(["proveedor", "prov", "vendor", "cod_prov", "codigo_proveedor"])
+    col_tot = cols.pick(["total", "tot", "importe"])
+    col_fec = cols.pick(["fecha", "fech", "fch", "dia"])
+    return f'INSERT INTO compras ("{col_num}","{col_pro}","{col_tot}","{col_fec}") VALUES (?,?,?,?)'
+
+
+def _sql_it_comp_insert(cols) -> str:
+    rem_c = cols.pick(["remito", "mr", "nroremito", "id_remito"])
+    art_c = cols.pick(["articulo", "codigo", "sku", "cod_art"])
+    cant_c = cols.pick(["cant", "cantidad"])
+    costo_c = cols.pick(["costo", "cost", "precio_costo", "pcosto"])
+    precio_c = cols.pick(["precio", "precio_unit", "punit", "importe"])
+    return f'INSERT INTO it_comp ("{rem_c}","{art_c}","{cant_c}","{costo_c}","{precio_c}") VALUES (?,?,?,?,?)'
+
+
+def _sql_ventas_insert(cols) -> str:
+    col_num = cols.pick(["venta", "nro", "numero", "id", "mr", "remito"])
+    col_cli = cols.pick(["cliente", "cod_cli", "id_cliente", "cli"])
+    col_tot = cols.pick(["total", "tot", "importe"])
+    col_fec = cols.pick(["fecha", "fech", "fch", "dia"])
+    col_gir = cols.pick(["giros", "giro", "neto", "neto_giros", "total_giros"])
+    return f'INSERT INTO ventas ("{col_num}","{col_cli}","{col_tot}","{col_fec}","{col_gir}") VALUES (?,?,?,?,?)'
+
+
+def _sql_it_vent_insert(cols) -> Tuple[str, bool, bool]:
+    """(sql, lleva costo, lleva venta): costo y venta sólo si la tabla los tiene."""
+    remito_col = cols.pick(["remito", "mr", "nroremito", "id_remito"])
+    art_i = cols.pick(["articulo", "codigo", "sku", "cod_art"])
+    cant_i = cols.pick(["cant", "cantidad"])
+    precio_i = cols.pick(["precio", "precio_unit", "punit", "importe"])
+    costo_col = None
+    for cand in ["costo", "cost", "precio_costo", "pcosto"]:
+        if cols.tiene(cand):
+            costo_col = cols.pick([cand])
+            break
+    venta_col = "venta" if cols.tiene("venta") else None
+    nombres = [remito_col, art_i, cant_i, precio_i] + [c for c in (costo_col, venta_col) if c]
+    cols_sql = ",".join(f'"{c}"' for c in nombres)
+    qs_sql = ",".join(["?"] * len(nombres))
+    return f"INSERT INTO it_vent ({cols_sql}) VALUES ({qs_sql})", costo_col is not None, venta_col is not None
+
+
+def _sql_movimientos_mp_insert(cols) -> Tuple[str, bool, bool]:
+    """(sql, lleva PACK, lleva TIPO)."""
+    con_pack = any(c.upper() == "PACK" for c in cols)
+    con_tipo = any(c.upper() == "TIPO" for c in cols)
+    nombres = ["Orden", "movimiento", "fecha", "importe", "remito_venta", "usuario_ml"]
+    if con_pack:
+        nombres.append("PACK")
+    if con_tipo:
+        nombres.append("TIPO")
+    qs_sql = ",".join(["?"] * len(nombres))
+    return f"INSERT INTO movimientos_mp ({', '.join(nombres)}) VALUES ({qs_sql})", con_pack, con_tipo
+
+
 def _to_float(x) -> float:
     """Parsea números monetarios en formato AR (1.234,56) y US (1,234.56 / 1234.56).
     Evita el bug de interpretar '.' decimal como separador de miles.
@@ -390,48 +700,26 @@ def _build_codigo_for_compra(articulo: str, remito_compra_num: int) -> str:
 
 
 def _insert_codigo_for_compra(cur: sqlite3.Cursor, next_nc: int, deposito: str, articulo: str, fecha: str, hora: str, usu: str = "AUTO") -> str:
-    cols = _table_cols(cur, "codigos")
-    col_remito    = _pick(cols, ["remito"])
-    col_articulo  = _pick(cols, ["articulo"])
-    col_codigo    = _pick(cols, ["codigo"])
-    col_deposito  = _pick(cols, ["deposito"])
-    col_mdate     = _pick(cols, ["mdate"])
-    col_mhora     = _pick(cols, ["mhora"])
-    col_musu      = _pick(cols, ["musu"])
-    col_control   = _pick(cols, ["control"])
-    col_leido     = _pick(cols, ["leido"])
-    col_remito_ven= "remito_ven" if "remito_ven" in cols else None
+    plan = esquema(cur.connection).sentencia("codigos", "codigos.insert_compra", _sql_codigos_insert_compra)
+    if plan is None:
+        raise RuntimeError("No se pudieron mapear columnas de 'codigos' para insertar el código de compra.")
+    sql, campos = plan
 
     articulo_norm = _norm_sku(articulo)
     codigo_gen = _build_codigo_for_compra(articulo_norm, next_nc)
-
-    insert_cols = []
-    insert_vals = []
-
-    def add(cname, value):
-        if cname and cname in cols:
-            insert_cols.append(cname)
-            insert_vals.append(value)
-
-    add(col_remito, int(next_nc))
-    add(col_articulo, str(articulo_norm))
-    add(col_codigo, str(codigo_gen))
-    add(col_deposito, str(deposito))
-    add(col_mdate, str(fecha))
-    add(col_mhora, str(hora))
-    add(col_musu, str(usu))
-    add(col_control, 0)
-    add(col_leido, 0)
-    if col_remito_ven:
-        insert_cols.append(col_remito_ven)
-        insert_vals.append(None)
-
-    if not insert_cols:
-        raise RuntimeError("No se pudieron mapear columnas de 'codigos' para insertar el código de compra.")
-
-    cols_sql = ",".join([f'"{c}"' for c in insert_cols])
-    qs_sql = ",".join(["?"] * len(insert_vals))
-    cur.execute(f"INSERT INTO codigos ({cols_sql}) VALUES ({qs_sql})", tuple(insert_vals))
+    valores = {
+        "remito": int(next_nc),
+        "articulo": str(articulo_norm),
+        "codigo": str(codigo_gen),
+        "deposito": str(deposito),
+        "mdate": str(fecha),
+        "mhora": str(hora),
+        "musu": str(usu),
+        "control": 0,
+        "leido": 0,
+        "remito_ven": None,
+    }
+    cur.execute(sql, tuple(valores[c] for c in campos))
     return codigo_gen
 
 
@@ -448,8 +736,7 @@ def _ensure_movimientos_mp(cur: sqlite3.Cursor):
         )
     """)
     try:
-        cur.execute("PRAGMA table_info(movimientos_mp)")
-        cols = [r[1] for r in cur.fetchall()]
+        cols = esquema(cur.connection).columnas("movimientos_mp")
         if "PACK" not in cols and "pack" not in cols:
             try:
                 cur.execute("ALTER TABLE movimientos_mp ADD COLUMN PACK TEXT")
@@ -504,24 +791,14 @@ def alta_compra_silenciosa_6696(vendor_name: Optional[str], amount: float, depos
         prov_code_int = _resolve_proveedor_code(cur, prov_up)
         prov_code_str = _norm_proveedor_code_3(prov_code_int)
 
-        cols_c = _table_cols(cur, "compras")
-        col_num = _pick(cols_c, ["compra", "nro", "numero", "id", "mr", "remito"])
-        col_pro = _pick(cols_c, ["proveedor", "prov", "vendor", "cod_prov", "codigo_proveedor"])
-        col_tot = _pick(cols_c, ["total", "tot", "importe"])
-        col_fec = _pick(cols_c, ["fecha", "fech", "fch", "dia"])
+        esq = esquema(con)
         cur.execute(
-            f'INSERT INTO compras ("{col_num}","{col_pro}","{col_tot}","{col_fec}") VALUES (?,?,?,?)',
+            esq.sentencia("compras", "compras.insert", _sql_compras_insert),
             (int(next_nc), str(prov_code_str), float(amount or 0.0), fecha_solo)
         )
 
-        cols_ic = _table_cols(cur, "it_comp")
-        rem_c = _pick(cols_ic, ["remito", "mr", "nroremito", "id_remito"])
-        art_c = _pick(cols_ic, ["articulo", "codigo", "sku", "cod_art"])
-        cant_c = _pick(cols_ic, ["cant", "cantidad"])
-        costo_c = _pick(cols_ic, ["costo", "cost", "precio_costo", "pcosto"])
-        precio_c = _pick(cols_ic, ["precio", "precio_unit", "punit", "importe"])
         cur.execute(
-            f'INSERT INTO it_comp ("{rem_c}","{art_c}","{cant_c}","{costo_c}","{precio_c}") VALUES (?,?,?,?,?)',
+            esq.sentencia("it_comp", "it_comp.insert", _sql_it_comp_insert),
             (int(next_nc), _norm_sku("6696"), 1, float(amount or 0.0), float(amount or 0.0))
         )
 
@@ -580,24 +857,14 @@ def alta_compra_silenciosa_6711_mercado_envios(proveedor_code: str = "034",
         fecha_solo = dt.datetime.now().strftime("%Y-%m-%d")
         hora_solo = dt.datetime.now().strftime("%H:%M:%S")
 
-        cols_c = _table_cols(cur, "compras")
-        col_num = _pick(cols_c, ["compra", "nro", "numero", "id", "mr", "remito"])
-        col_pro = _pick(cols_c, ["proveedor", "prov", "vendor", "cod_prov", "codigo_proveedor"])
-        col_tot = _pick(cols_c, ["total", "tot", "importe"])
-        col_fec = _pick(cols_c, ["fecha", "fech", "fch", "dia"])
+        esq = esquema(con)
         cur.execute(
-            f'INSERT INTO compras ("{col_num}","{col_pro}","{col_tot}","{col_fec}") VALUES (?,?,?,?)',
+            esq.sentencia("compras", "compras.insert", _sql_compras_insert),
             (int(next_nc), str(prov_code_str), float(amount or 0.0), fecha_solo)
         )
 
-        cols_ic = _table_cols(cur, "it_comp")
-        rem_c = _pick(cols_ic, ["remito", "mr", "nroremito", "id_remito"])
-        art_c = _pick(cols_ic, ["articulo", "codigo", "sku", "cod_art"])
-        cant_c = _pick(cols_ic, ["cant", "cantidad"])
-        costo_c = _pick(cols_ic, ["costo", "cost", "precio_costo", "pcosto"])
-        precio_c = _pick(cols_ic, ["precio", "precio_unit", "punit", "importe"])
         cur.execute(
-            f'INSERT INTO it_comp ("{rem_c}","{art_c}","{cant_c}","{costo_c}","{precio_c}") VALUES (?,?,?,?,?)',
+            esq.sentencia("it_comp", "it_comp.insert", _sql_it_comp_insert),
             (int(next_nc), _norm_sku("6711"), 1, float(amount or 0.0), 0.0)
         )
 
@@ -625,36 +892,25 @@ def alta_compra_silenciosa_6711_mercado_envios(proveedor_code: str = "034",
 def _reservar_codigo_envio_exacto(con: sqlite3.Connection,
                                   remito_mr: int,
                                   compra_nc: Optional[int],
-                                  codigo_envio: Optional[str]) -> Tuple[bool, str]:
+                                  codigo_envio: Optional[str],
+                                  esq: Optional[Esquema] = None) -> Tuple[bool, str]:
     try:
         cur = con.cursor()
-        cols = _table_cols(cur, "codigos")
-        col_remito = _pick(cols, ["remito"])
-        col_art = _pick(cols, ["articulo", "codigo", "sku", "cod_art"])
-        col_codigo = _pick(cols, ["codigo"])
-        col_dep = _pick(cols, ["deposito"])
-        col_rem_ven = "remito_ven" if "remito_ven" in cols else None
-
-        if codigo_envio and col_rem_ven:
-            cur.execute(f"""
-                UPDATE codigos
-                   SET {col_rem_ven}=?, {col_dep}=''
-                 WHERE {col_codigo}=?
-                   AND TRIM({col_art})=?
-                   AND ({col_rem_ven} IS NULL OR TRIM(CAST({col_rem_ven} AS TEXT)) IN ('', '0'))
-            """, (int(remito_mr), str(codigo_envio), _norm_sku("6696")))
+        esq = esq or esquema(con)
+        if normalizado_listo(esq):
+            sql = esq.sentencia("codigos", "codigos.reserva_6696_norm", _sql_codigos_reserva_6696_norm)
+        else:
+            sql = esq.sentencia("codigos", "codigos.reserva_6696", _sql_codigos_reserva_6696)
+        sql_por_codigo, sql_por_remito = sql if sql is not None else (None, None)
+
+        if codigo_envio and sql_por_codigo:
+            cur.execute(sql_por_codigo, (int(remito_mr), str(codigo_envio), _norm_sku("6696")))
             if cur.rowcount and cur.rowcount > 0:
                 con.commit()
                 return True, "Reservado código 6696 exacto (deposito='')."
 
-        if compra_nc is not None and col_rem_ven:
-            cur.execute(f"""
-                UPDATE codigos
-                   SET {col_rem_ven}=?, {col_dep}=''
-                 WHERE {col_remito}=?
-                   AND TRIM({col_art})=?
-                   AND ({col_rem_ven} IS NULL OR TRIM(CAST({col_rem_ven} AS TEXT)) IN ('', '0'))
-            """, (int(remito_mr), int(compra_nc), _norm_sku("6696")))
+        if compra_nc is not None and sql_por_remito:
+            cur.execute(sql_por_remito, (int(remito_mr), int(compra_nc), _norm_sku("6696")))
             if cur.rowcount and cur.rowcount > 0:
                 con.commit()
                 return True, "Reservado código 6696 de compra silenciosa (deposito='')."
@@ -703,8 +959,16 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
     except Exception as ex:
         return {"ok": False, "error": f"No se pudo abrir DB: {ex}", "pedido_id": order_id}
     cur = con.cursor()
+    try:
+        esq = esquema(con)
+    except Exception as ex:
+        try:
+            con.close()
+        except Exception:
+            pass
+        return {"ok": False, "error": f"No se pudo leer el esquema de la DB: {ex}", "pedido_id": order_id}
 
-    if not (_has_table(cur, "ventas") and _has_table(cur, "it_vent") and _has_table(cur, "paramet") and _has_table(cur, "codigos")):
+    if not (esq.existe("ventas") and esq.existe("it_vent") and esq.existe("paramet") and esq.existe("codigos")):
         try:
             con.close()
         except Exception:
@@ -746,16 +1010,18 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
                     con,
                     remito_mr=next_mr,
                     compra_nc=compra_nc_for_envio,
-                    codigo_envio=codigo_envio_creado
+                    codigo_envio=codigo_envio_creado,
+                    esq=esq,
                 )
             else:
                 ok_exact, msg_exact = (False, "Sin codigo_envio ni remito de compra para 6696.")
             if not ok_exact:
-                taken_fallback = _tomar_codigos_para_remito_compat(con, articulo=_norm_sku("6696"), cantidad=qty_6696, remito=next_mr, deposito=1)
+                taken_fallback = _tomar_codigos_para_remito_compat(con, articulo=_norm_sku("6696"), cantidad=qty_6696, remito=next_mr, deposito=1, esq=esq)
                 if len(taken_fallback) != qty_6696:
                     liberar_codigos_de_remito(con, next_mr)
                     raise RuntimeError(f"Stock insuficiente 6696: pedido {qty_6696}, reservado {len(taken_fallback)}. Motivo: {msg_exact}")
 
+        pedido_codigos: Dict[str, int] = {}
         for li in items:
             sku = _norm_sku(li.get("sku"))
             if sku == _norm_sku("6696"):
@@ -763,28 +1029,23 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
             cantidad = int(li.get("quantity") or 0)
             if cantidad <= 0 or not sku:
                 continue
-            taken = _tomar_codigos_para_remito_compat(con, articulo=sku, cantidad=cantidad, remito=next_mr, deposito=1)
-            if len(taken) != cantidad:
+            pedido_codigos[sku] = pedido_codigos.get(sku, 0) + cantidad
+        if pedido_codigos:
+            _reservados, faltantes = _tomar_codigos_bulk(con, pedido_codigos, remito=next_mr, deposito=1, esq=esq)
+            if faltantes:
                 liberar_codigos_de_remito(con, next_mr)
-                raise RuntimeError(f"Stock insuficiente {sku}: pedido {cantidad}, reservado {len(taken)}.")
+                detalle = "; ".join(f"{sku}: pedido {ped}, disponible {disp}" for sku, (ped, disp) in sorted(faltantes.items()))
+                raise RuntimeError(f"Stock insuficiente — {detalle}.")
 
         try:
-            cols_cd = _table_cols(cur, "codigos")
-            col_rem_ven = "remito_ven" if "remito_ven" in cols_cd else None
-            col_dep = _pick(cols_cd, ["deposito"]) if "deposito" in cols_cd else None
-            if col_rem_ven and col_dep:
-                cur.execute(f"UPDATE codigos SET {col_dep}='' WHERE {col_rem_ven}=?", (int(next_mr),))
+            sql_dep = esq.sentencia("codigos", "codigos.vaciar_deposito", _sql_codigos_vaciar_deposito)
+            if sql_dep:
+                cur.execute(sql_dep, (int(next_mr),))
                 con.commit()
         except Exception:
             pass
 
         fecha_solo = dt.datetime.now().strftime("%Y-%m-%d")
-        cols_v = _table_cols(cur, "ventas")
-        col_num = _pick(cols_v, ["venta", "nro", "numero", "id", "mr", "remito"])
-        col_cli = _pick(cols_v, ["cliente", "cod_cli", "id_cliente", "cli"])
-        col_tot = _pick(cols_v, ["total", "tot", "importe"])
-        col_fec = _pick(cols_v, ["fecha", "fech", "fch", "dia"])
-        col_gir = _pick(cols_v, ["giros", "giro", "neto", "neto_giros", "total_giros"])
         tipo_envio_up = str(pedido.get("tipo_envio") or "").strip().upper()
         is_me_tab_flag = bool(pedido.get("is_me_tab") or False)
         es_mercado_envios = (
@@ -794,21 +1055,11 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
         )
         cliente_final = "889" if es_flex else ("100" if es_mercado_envios else (cliente_codigo if cliente_codigo else "0"))
         cur.execute(
-            f'INSERT INTO ventas ("{col_num}","{col_cli}","{col_tot}","{col_fec}","{col_gir}") VALUES (?,?,?,?,?)',
+            esq.sentencia("ventas", "ventas.insert", _sql_ventas_insert),
             (int(next_mr), str(cliente_final or ""), float(total_server or 0.0), fecha_solo, float(total_server or 0.0))
         )
 
-        cols_i = _table_cols(cur, "it_vent")
-        remito_col = _pick(cols_i, ["remito", "mr", "nroremito", "id_remito"])
-        venta_col = "venta" if any(c.lower() == "venta" for c in cols_i) else None
-        art_i = _pick(cols_i, ["articulo", "codigo", "sku", "cod_art"])
-        cant_i = _pick(cols_i, ["cant", "cantidad"])
-        precio_i = _pick(cols_i, ["precio", "precio_unit", "punit", "importe"])
-        costo_col = None
-        for cand in ["costo", "cost", "precio_costo", "pcosto"]:
-            if cand in cols_i or cand.lower() in [c.lower() for c in cols_i]:
-                costo_col = _pick(cols_i, [cand])
-                break
+        sql_it_vent, it_con_costo, it_con_venta = esq.sentencia("it_vent", "it_vent.insert", _sql_it_vent_insert)
 
         for li in items:
             sku = _norm_sku(li.get("sku"))
@@ -830,26 +1081,12 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
                 if cost_unit is None:
                     cost_unit = costo_para_it_vent(con, sku, li.get("costo"))
 
-            if venta_col and costo_col:
-                cur.execute(
-                    f'INSERT INTO it_vent ("{remito_col}","{art_i}","{cant_i}","{precio_i}","{costo_col}","{venta_col}") VALUES (?,?,?,?,?,?)',
-                    (int(next_mr), sku, int(cant), float(price_unit), float(cost_unit), float(price_unit))
-                )
-            elif venta_col and not costo_col:
-                cur.execute(
-                    f'INSERT INTO it_vent ("{remito_col}","{art_i}","{cant_i}","{precio_i}","{venta_col}") VALUES (?,?,?,?,?)',
-                    (int(next_mr), sku, int(cant), float(price_unit), float(price_unit))
-                )
-            elif not venta_col and costo_col:
-                cur.execute(
-                    f'INSERT INTO it_vent ("{remito_col}","{art_i}","{cant_i}","{precio_i}","{costo_col}") VALUES (?,?,?,?,?)',
-                    (int(next_mr), sku, int(cant), float(price_unit), float(cost_unit))
-                )
-            else:
-                cur.execute(
-                    f'INSERT INTO it_vent ("{remito_col}","{art_i}","{cant_i}","{precio_i}") VALUES (?,?,?,?)',
-                    (int(next_mr), sku, int(cant), float(price_unit))
-                )
+            fila = [int(next_mr), sku, int(cant), float(price_unit)]
+            if it_con_costo:
+                fila.append(float(cost_unit))
+            if it_con_venta:
+                fila.append(float(price_unit))
+            cur.execute(sql_it_vent, fila)
 
         con.commit()
 
@@ -860,9 +1097,9 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
         _ensure_movimientos_mp(cur)
         _ensure_envios_flex(cur)
 
-        mov_cols = _table_cols(cur, "movimientos_mp")
-        has_pack_col = any(c.upper() == "PACK" for c in mov_cols)
-        has_tipo_col = any(c.upper() == "TIPO" for c in mov_cols)
+        # _ensure_movimientos_mp puede haber hecho ALTER TABLE: foto nueva
+        sql_mov, has_pack_col, has_tipo_col = esquema(con).sentencia(
+            "movimientos_mp", "movimientos_mp.insert", _sql_movimientos_mp_insert)
 
         # Si es MERCADO ENVIOS, marcar tipo para insertar en la columna TIPO (si existe)
         tipo_val_for_insert = "MERCADOENVIO" if es_mercado_envios else None
@@ -870,66 +1107,21 @@ def alta_venta_silenciosa_directa(pedido: Dict[str, Any],
         if pagos_info:
             # Construir filas teniendo en cuenta PACK y TIPO si existen
             rows_to_insert = []
-            if has_pack_col and has_tipo_col:
-                for p in pagos_info:
-                    rows_to_insert.append((
-                        str(p.get("orden") or p.get("order") or ""),
-                        str(p.get("pago_id") or p.get("id") or ""),
-                        now_s,
-                        float(p.get("neto") or 0.0),
-                        int(next_mr),
-                        usuario_ml_s,
-                        str(p.get("pack") or "") if p.get("pack") is not None else None,
-                        tipo_val_for_insert
-                    ))
-                cur.executemany(
-                    "INSERT INTO movimientos_mp (Orden, movimiento, fecha, importe, remito_venta, usuario_ml, PACK, TIPO) VALUES (?,?,?,?,?,?,?,?)",
-                    rows_to_insert
-                )
-            elif has_pack_col and not has_tipo_col:
-                for p in pagos_info:
-                    rows_to_insert.append((
-                        str(p.get("orden") or p.get("order") or ""),
-                        str(p.get("pago_id") or p.get("id") or ""),
-                        now_s,
-                        float(p.get("neto") or 0.0),
-                        int(next_mr),
-                        usuario_ml_s,
-                        str(p.get("pack") or "") if p.get("pack") is not None else None,
-                    ))
-                cur.executemany(
-                    "INSERT INTO movimientos_mp (Orden, movimiento, fecha, importe, remito_venta, usuario_ml, PACK) VALUES (?,?,?,?,?,?,?)",
-                    rows_to_insert
-                )
-            elif (not has_pack_col) and has_tipo_col:
-                for p in pagos_info:
-                    rows_to_insert.append((
-                        str(p.get("orden") or p.get("order") or ""),
-                        str(p.get("pago_id") or p.get("id") or ""),
-                        now_s,
-                        float(p.get("neto") or 0.0),
-                        int(next_mr),
-                        usuario_ml_s,
-                        tipo_val_for_insert
-                    ))
-                cur.executemany(
-                    "INSERT INTO movimientos_mp (Orden, movimiento, fecha, importe, remito_venta, usuario_ml, TIPO) VALUES (?,?,?,?,?,?,?)",
-                    rows_to_insert
-                )
-            else:
-                for p in pagos_info:
-                    rows_to_insert.append((
-                        str(p.get("orden") or p.get("order") or ""),
-                        str(p.get("pago_id") or p.get("id") or ""),
-                        now_s,
-                        float(p.get("neto") or 0.0),
-                        int(next_mr),
-                        usuario_ml_s,
-                    ))
-                cur.executemany(
-                    "INSERT INTO movimientos_mp (Orden, movimiento, fecha, importe, remito_venta, usuario_ml) VALUES (?,?,?,?,?,?)",
-                    rows_to_insert
-                )
+            for p in pagos_info:
+                fila = [
+                    str(p.get("orden") or p.get("order") or ""),
+                    str(p.get("pago_id") or p.get("id") or ""),
+                    now_s,
+                    float(p.get("neto") or 0.0),
+                    int(next_mr),
+                    usuario_ml_s,
+                ]
+                if has_pack_col:
+                    fila.append(str(p.get("pack") or "") if p.get("pack") is not None else None)
+                if has_tipo_col:
+                    fila.append(tipo_val_for_insert)
+                rows_to_insert.append(fila)
+            cur.executemany(sql_mov, rows_to_insert)
 
         cobro = float(envio_cobro_value or 0.0) if es_flex else 0.0
         costo = float(envio_cost_value or 0.0)
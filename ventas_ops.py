@@ -13,17 +13,20 @@
 #  - Búsqueda de costo con SKU NORMALIZADO (zfill a 4 si es numérico corto).
 #  - Guardar it_vent.articulo NORMALIZADO a 4 cifras (cero a la izquierda).
 
-import sqlite3
+#  - Columnas detectadas con el registro de esquema del proceso (gestion_schema_cache):
+#    PRAGMA table_info una vez por tabla, no en cada venta.
+#  - Conexión escritora compartida (gestion_db_pool) en lugar de abrir una por venta.
+
 from datetime import datetime
 
-DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
+from gestion_db_pool import conexion_escritura
+from gestion_schema_cache import esquema
 
-def _columns(conn, table: str):
-    cur = conn.execute(f"PRAGMA table_info({table})")
-    return [r[1] for r in cur.fetchall()]
+DB_PATH = r"C:\!GESTION2026\gestion.sqlite3"
 
-def _require_columns(conn, table: str, required: list, log):
-    cols = _columns(conn, table)
+def _require_columns(esq, table: str, required: list, log):
+    """esq: foto de esquema (gestion_schema_cache.esquema) tomada al inicio de la operación."""
+    cols = list(esq.columnas(table))
     try:
         log(f'[{table}] Columnas detectadas: ' + ', '.join(cols))
     except Exception:
@@ -66,18 +69,19 @@ def confirmar_venta(MR, cliente_codigo, total, efectivo, transferencia,
     if not cliente_codigo:
         raise RuntimeError("Cliente no seleccionado.")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = conexion_escritura(DB_PATH)
     try:
         conn.isolation_level = None
         conn.execute("BEGIN")
 
         # --- Validaciones de columnas ---
-        _require_columns(conn, "clientes", ["saldo", "codigo"], log)
-        _require_columns(conn, "ventas",   ["remito","fecha","cliente","total","efectivo","cheques","giros"], log)
+        esq = esquema(conn)
+        _require_columns(esq, "clientes", ["saldo", "codigo"], log)
+        _require_columns(esq, "ventas",   ["remito","fecha","cliente","total","efectivo","cheques","giros"], log)
         if tree_rows:
-            _require_columns(conn, "it_vent", ["remito","articulo","cantidad","costo","venta"], log)
-            _require_columns(conn, tr_table, ["SKU","CODIGO","remito","costo","Precio de Venta"], log)
-        _require_columns(conn, "codigos",  ["codigo","remito_ven","deposito"], log)
+            _require_columns(esq, "it_vent", ["remito","articulo","cantidad","costo","venta"], log)
+            _require_columns(esq, tr_table, ["SKU","CODIGO","remito","costo","Precio de Venta"], log)
+        _require_columns(esq, "codigos",  ["codigo","remito_ven","deposito"], log)
 
         # --- Tamaño TR e índices opcionales (solo si conviene) ---
         tr_count = conn.execute(f"SELECT COUNT(*) FROM {tr_table}").fetchone()[0] or 0